@@ -0,0 +1,42 @@
+"""Generation counter that lets in-process caches refuse stale loads.
+
+A cache takes :attr:`ChangeLog.generation` before reading from the database
+and stores the result only if :meth:`ChangeLog.changed_since` says the key
+was not modified in between. One counter serves the whole cache, and only
+the ``max_entries`` most recently changed keys are remembered; older keys
+count as changed at the newest forgotten generation, which may reject a
+good load but never accepts a stale one.
+
+Not thread-safe on its own: callers hold their cache lock.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+
+class ChangeLog(Generic[K]):
+    """Cache-wide generation counter and the generation of each recent change."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.generation = 0
+        self._changed: OrderedDict[K, int] = OrderedDict()
+        self._forgotten = 0  # newest generation dropped from ``_changed``
+
+    def bump(self, key: K) -> None:
+        self.generation += 1
+        self._changed[key] = self.generation
+        self._changed.move_to_end(key)
+        while len(self._changed) > self.max_entries:
+            _, self._forgotten = self._changed.popitem(last=False)
+
+    def changed_since(self, key: K, generation: int) -> bool:
+        return self._changed.get(key, self._forgotten) > generation
+
+    def clear(self) -> None:
+        self._changed.clear()
+        self._forgotten = self.generation
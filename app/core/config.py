@@ -1,14 +1,99 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     app_name: str = "Cinema Reservations API"
+    # debug adds per-request X-DB-Queries / X-DB-Time-Ms / X-DB-N-Plus-One headers
+    debug: bool = False
+    # identical statements per request at which a likely N+1 is logged
+    n_plus_one_threshold: int = 5
     jwt_secret: str = "CHANGE_ME_SUPER_SECRET"
     jwt_algorithm: str = "HS256"
     jwt_exp_minutes: int = 60 * 24
     database_url: str = "sqlite:///./cinema.db"
+    # "async" serves reservations and availability through AsyncSession
+    db_mode: Literal["sync", "async"] = "sync"
+    async_database_url: str | None = None
+
+    # SQLite connection pragmas, applied on every new connection
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size: int = -64 * 1024  # negative = KiB
+    sqlite_foreign_keys: bool = True
+
+    # Pool sizing for server databases (ignored for SQLite)
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_pre_ping: bool = True
+    db_pool_recycle_seconds: int = 1800
     secret_key: str = "change-me"
+    # bcrypt cost; stored hashes with another cost are rehashed on login
+    bcrypt_rounds: int = 12
+    # process pool for bcrypt (0 = hash inline in the request thread)
+    password_hash_workers: int = 2
+    password_hash_max_pending: int = 64
+    password_hash_queue_timeout_seconds: float = 5.0
     access_token_expire_minutes: int = 60
+    # token buckets for /auth/login and /auth/register; burst 0 disables one
+    auth_ip_burst: int = 20
+    auth_ip_per_minute: float = 20.0
+    auth_identity_burst: int = 10
+    auth_identity_per_minute: float = 5.0
+    # reverse proxies (IPs or CIDRs) whose X-Forwarded-For names the client IP;
+    # set it behind a proxy, or every client shares the proxy's IP bucket
+    trusted_proxies: list[str] = []
+    # SQLite file shared by all workers for those buckets (in-process if unset)
+    rate_limit_sqlite_path: str | None = None
+    # list endpoints: page size when ?limit is omitted, and its upper bound
+    page_size_default: int = 100
+    page_size_max: int = 200
+    # ?query= movie searches: matches returned when ?limit is omitted
+    search_limit_default: int = 50
+    # bulk user import: rows per insert batch, hashing processes per import
+    # (0 = inline); uploaded imports run one at a time in the background
+    user_import_chunk_size: int = 1000
+    user_import_hash_workers: int = 1
+    # authorize role-guarded routes from JWT claims instead of the users table
+    stateless_auth: bool = False
+    # how long a worker trusts its copy of a user's token version, and how
+    # many users' versions it keeps
+    token_version_ttl_seconds: float = 5.0
+    token_version_cache_size: int = 65536
+    # authenticated principals cached per (user id, token); 0 disables
+    principal_cache_size: int = 4096
+    principal_cache_ttl_seconds: float = 30.0
+    # rendered catalog list responses, keyed by URL and data version; 0 disables
+    response_cache_size: int = 1024
+    response_cache_max_bytes: int = 16 * 1024 * 1024
+    response_cache_ttl_seconds: float = 300.0
+    seat_map_cache_size: int = 1024
+    seat_map_cache_ttl_seconds: float = 30.0
+    seat_allocation_attempts: int = 3
+    availability_stream_keepalive_seconds: float = 15.0
+    availability_stream_max_pending: int = 256
+    # how often a worker re-reads streamed screenings for other workers' bookings
+    availability_stream_poll_seconds: float = 2.0
+    # showtimes: seats-left figures are at most this old; widest date range served
+    showtimes_max_age_seconds: int = 15
+    showtimes_max_days: int = 14
+    # recommendations: neighbours kept per movie, review stars that count as a like,
+    # likes per user used for co-occurrence, and how often the index catches up
+    recommendation_top_k: int = 50
+    recommendation_min_rating: int = 4
+    recommendation_max_likes_per_user: int = 500
+    recommendation_refresh_seconds: float = 30.0
+    recommendation_rebuild_seconds: float = 3600.0
+    # score multiplier for movies that still have screenings ahead
+    recommendation_upcoming_boost: float = 2.0
+    # cleaning time kept free in a hall after each screening ends
+    screening_turnaround_minutes: int = 15
+    pending_hold_minutes: int = 15
+    hold_sweep_interval_seconds: float = 60.0
+    hold_sweep_batch_size: int = 500
 
 
 settings = Settings()
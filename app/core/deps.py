@@ -1,10 +1,15 @@
-from typing import Generator, Callable
+from typing import Any, AsyncGenerator, Awaitable, Generator, Callable
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.principals import Principal, principals, token_versions
 from app.core.security import decode_token
+from app.db import session as db_session
 from app.db.session import SessionLocal
 from app.models.user import User, UserRole
 
@@ -19,26 +24,133 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    if db_session.AsyncSessionLocal is None:
+        raise RuntimeError("Async database access requires db_mode='async'")
+    async with db_session.AsyncSessionLocal() as db:
+        yield db
+
+
+def _claims(token: str) -> dict[str, Any]:
     try:
         payload = decode_token(token)
-        user_id_str = payload.get("sub")
-        if not user_id_str:
+        if not payload.get("sub"):
             raise ValueError("missing sub")
-        user_id = int(user_id_str)
+        payload["sub"] = int(payload["sub"])
+        return payload
     except Exception as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token") from exc
 
-    user = db.get(User, user_id)
+
+def _checks_version(claims: dict[str, Any]) -> bool:
+    return settings.stateless_auth and "ver" in claims
+
+
+def _ensure_current(claims: dict[str, Any], current_version: int | None) -> None:
+    if current_version is None or claims["ver"] != current_version:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
+
+
+def _claims_principal(claims: dict[str, Any], current_version: int | None) -> Principal:
+    _ensure_current(claims, current_version)
+    try:
+        role = UserRole(claims["role"])
+        return Principal(id=claims["sub"], role=role, username=claims["name"], email=claims["email"])
+    except (KeyError, ValueError) as exc:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token") from exc
+
+
+def _token_version_query(user_id: int) -> Select[tuple[int]]:
+    return select(User.token_version).where(User.id == user_id)
+
+
+def _current_token_version(db: Session, user_id: int) -> int | None:
+    version = token_versions.get(user_id)
+    if version is None:
+        version = db.scalar(_token_version_query(user_id))
+        if version is not None:
+            token_versions.put(user_id, version)
+    return version
+
+
+async def _current_token_version_async(db: AsyncSession, user_id: int) -> int | None:
+    version = token_versions.get(user_id)
+    if version is None:
+        version = await db.scalar(_token_version_query(user_id))
+        if version is not None:
+            token_versions.put(user_id, version)
+    return version
+
+
+def _check_role(user: Principal, allowed: tuple[UserRole, ...]) -> Principal:
+    if user.role not in allowed:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    return user
+
+
+def _remember(token: str, user: User | None, generation: int) -> Principal:
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
+    principal = Principal.from_user(user)
+    principals.put(token, principal, generation)
+    return principal
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+) -> Principal:
+    # the session only checks out a connection on a cache miss
+    claims = _claims(token)
+    user_id = claims["sub"]
+    if _checks_version(claims):
+        _ensure_current(claims, _current_token_version(db, user_id))
+    cached = principals.get(user_id, token)
+    if cached is not None:
+        return cached
+    generation = principals.generation()
+    return _remember(token, db.get(User, user_id), generation)
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    claims = _claims(token)
+    user_id = claims["sub"]
+    if _checks_version(claims):
+        _ensure_current(claims, await _current_token_version_async(db, user_id))
+    cached = principals.get(user_id, token)
+    if cached is not None:
+        return cached
+    generation = principals.generation()
+    return _remember(token, await db.get(User, user_id), generation)
+
+
+def require_role(*allowed: UserRole) -> Callable[..., Principal]:
+    """Guard for role-restricted routes.
+
+    In ``stateless_auth`` mode tokens carrying a ``ver`` claim are
+    authorized from their claims; older tokens fall back to the user lookup.
+    ``get_current_user`` checks the same ``ver`` before its lookup.
+    """
+
+    def _guard(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+        claims = _claims(token)
+        if _checks_version(claims):
+            version = _current_token_version(db, claims["sub"])
+            return _check_role(_claims_principal(claims, version), allowed)
+        return _check_role(get_current_user(token, db), allowed)
+
+    return _guard
 
 
-def require_role(*allowed: UserRole) -> Callable[..., User]:
-    def _guard(user: User = Depends(get_current_user)) -> User:
-        if user.role not in allowed:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
-        return user
+def require_role_async(*allowed: UserRole) -> Callable[..., Awaitable[Principal]]:
+    async def _guard(
+        token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+    ) -> Principal:
+        claims = _claims(token)
+        if _checks_version(claims):
+            version = await _current_token_version_async(db, claims["sub"])
+            return _check_role(_claims_principal(claims, version), allowed)
+        return _check_role(await get_current_user_async(token, db), allowed)
 
     return _guard
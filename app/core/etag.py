@@ -0,0 +1,67 @@
+"""Strong ETags derived from data version counters.
+
+Catalog datasets keep their counter in the ``data_versions`` table, bumped in
+the same transaction as the write, so every worker agrees on it. Seat maps
+carry an in-process version instead; those tags include a per-process epoch
+so two workers can never hand out the same tag for different content.
+"""
+
+import secrets
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.response_cache import invalidate_after_commit
+from app.db.upsert import upsert
+from app.models.version import DataVersion
+
+PROCESS_EPOCH = secrets.token_hex(4)
+
+
+def bump_version(db: Session, name: str) -> None:
+    """Increment ``name``'s version; call before committing the write.
+
+    Cached responses for ``name`` are dropped once the write commits. One
+    upsert, so concurrent first writes to a dataset cannot collide.
+    """
+    db.execute(
+        upsert(db, DataVersion)
+        .values(name=name, version=1)
+        .on_conflict_do_update(
+            index_elements=[DataVersion.name], set_={"version": DataVersion.version + 1}
+        )
+    )
+    invalidate_after_commit(db, name)
+
+
+def current_version(db: Session, name: str) -> int:
+    row = db.get(DataVersion, name)
+    return row.version if row else 0
+
+
+def current_versions(db: Session, *names: str) -> list[int]:
+    """Versions of several datasets in one query, in the order given."""
+    stmt = select(DataVersion.name, DataVersion.version).where(DataVersion.name.in_(names))
+    found = dict(db.execute(stmt).tuples().all())
+    return [found.get(name, 0) for name in names]
+
+
+def make_etag(*parts: object) -> str:
+    return '"' + "-".join(str(p) for p in parts) + '"'
+
+
+def matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def conditional(request: Request, response: Response, etag: str) -> Response | None:
+    """Return a 304 if the client already has ``etag``, else tag ``response``."""
+    if matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
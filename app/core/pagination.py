@@ -0,0 +1,99 @@
+"""Keyset (cursor) pagination for list endpoints.
+
+A page is ordered by a fixed key, ending with the primary key, e.g.
+``(starts_at, id)``. The next page starts strictly after the last row's
+key values, so each page is one index range scan at any depth. The cursor
+is those key values, JSON-encoded and base64url'd. Clients should treat it
+as opaque.
+
+List bodies stay plain JSON arrays. When more rows exist, the cursor for
+the next page is returned in the ``X-Next-Cursor`` header and is passed
+back as ``?cursor=``.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Sequence, TypeVar
+
+from fastapi import HTTPException, Response
+from sqlalchemy import Select, tuple_
+from sqlalchemy.orm import InstrumentedAttribute, Query
+
+from app.core.config import settings
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+Stmt = TypeVar("Stmt", Query[Any], Select[Any])
+Row = TypeVar("Row")
+Key = InstrumentedAttribute[Any]
+
+
+def page_limit(limit: int | None, default: int | None = None) -> int:
+    """Requested page size, defaulted and capped by the settings."""
+    return min(limit or default or settings.page_size_default, settings.page_size_max)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    plain = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(plain, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _parse(key: Key, value: Any) -> Any:
+    python_type = key.type.python_type
+    return datetime.fromisoformat(value) if python_type is datetime else python_type(value)
+
+
+def decode_cursor(cursor: str, keys: Sequence[Key]) -> list[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("wrong arity")
+        return [
+            _parse(key, v) for key, v in zip(keys, values)
+        ]
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
+def keyset(
+    stmt: Stmt, keys: Sequence[Key], cursor: str | None, limit: int, descending: bool = False
+) -> Stmt:
+    """Order by ``keys``, start after ``cursor``, and fetch one look-ahead row."""
+    if cursor:
+        values = decode_cursor(cursor, keys)
+        left, right = (keys[0], values[0]) if len(keys) == 1 else (tuple_(*keys), tuple_(*values))
+        stmt = stmt.filter(left < right if descending else left > right)
+    order = [k.desc() if descending else k.asc() for k in keys]
+    return stmt.order_by(*order).limit(limit + 1)
+
+
+def page(rows: Sequence[Row], keys: Sequence[Key], limit: int, response: Response) -> list[Row]:
+    """Trim the look-ahead row and advertise the next cursor when there is one."""
+    items = list(rows[:limit])
+    if len(rows) > limit:
+        last = items[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(last, k.key) for k in keys])
+    return items
+
+
+def paginate(  # pylint: disable=too-many-arguments
+    query: Query[Row],
+    keys: Sequence[Key],
+    cursor: str | None,
+    limit: int | None,
+    response: Response,
+    descending: bool = False,
+    skip: int = 0,
+) -> list[Row]:
+    """One page of ``query``; ``skip`` is the deprecated OFFSET, ignored once a cursor is used."""
+    size = page_limit(limit)
+    q = keyset(query, keys, cursor, size, descending)
+    if skip and not cursor:
+        q = q.offset(skip)
+    return page(q.all(), keys, size, response)
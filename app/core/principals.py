@@ -0,0 +1,148 @@
+"""Authenticated principal snapshots and their in-process TTL/LRU cache.
+
+``get_current_user`` resolves a bearer token to a :class:`Principal` and
+caches it per user id and SHA-256 digest of the token, so authenticated
+requests do not each pay for a ``SELECT`` on ``users`` and no raw tokens
+sit in memory. Endpoints that change a user's role, identity or existence
+call :meth:`PrincipalCache.invalidate` after commit; a lookup that read
+the row before that commit is not cached. Other worker processes keep
+their entries until the TTL expires.
+
+With ``stateless_auth`` enabled, role-guarded routes build the principal
+from the token's claims instead and only compare its ``ver`` claim with the
+user's current token version held in :data:`token_versions`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.core.change_log import ChangeLog
+from app.core.config import settings
+from app.models.user import User, UserRole
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Immutable view of the authenticated user; never attached to a session."""
+
+    id: int
+    role: UserRole
+    username: str
+    email: str
+
+    @classmethod
+    def from_user(cls, user: User) -> Principal:
+        return cls(id=user.id, role=user.role, username=user.username, email=user.email)
+
+
+def _key(user_id: int, token: str) -> tuple[int, bytes]:
+    return user_id, hashlib.sha256(token.encode()).digest()
+
+
+class PrincipalCache:
+    """Bounded LRU of principals keyed by user id and token digest, with a TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple[int, bytes], tuple[float, Principal]] = OrderedDict()
+        self._changes: ChangeLog[int] = ChangeLog(max_entries)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int, token: str) -> Principal | None:
+        key = _key(user_id, token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def generation(self) -> int:
+        """Take before loading the user; pass to :meth:`put` with the result."""
+        with self._lock:
+            return self._changes.generation
+
+    def put(self, token: str, principal: Principal, generation: int) -> None:
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        key = _key(principal.id, token)
+        with self._lock:
+            if self._changes.changed_since(principal.id, generation):
+                return
+            self._entries[key] = (time.monotonic(), principal)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._changes.bump(user_id)
+            for key in [k for k in self._entries if k[0] == user_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self._changes.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class TokenVersions:
+    """Per-process revocation table: user id -> current token version.
+
+    Entries are trusted for ``ttl_seconds`` and then re-read from the
+    database, which bounds how long another worker accepts revoked tokens.
+    At most ``max_entries`` users are kept, least recently used first out.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[int, tuple[float, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> int | None:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                self._entries.pop(user_id, None)
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+    def put(self, user_id: int, version: int) -> None:
+        with self._lock:
+            self._entries[user_id] = (time.monotonic(), version)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def forget(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+principals = PrincipalCache(settings.principal_cache_size, settings.principal_cache_ttl_seconds)
+token_versions = TokenVersions(
+    settings.token_version_cache_size, settings.token_version_ttl_seconds
+)
@@ -0,0 +1,114 @@
+"""Per-request SQL statement counts, DB time and N+1 detection.
+
+Engine event hooks count every statement executed while a request is in
+flight, the time spent in the driver, and how often each statement *shape*
+(its SQL text, without parameter values) ran. A shape repeated
+``n_plus_one_threshold`` times within one request is reported as a likely
+N+1: the same lookup issued once per row instead of once for all rows.
+
+:class:`QueryStatsMiddleware` opens the window for each HTTP request. It
+logs suspected N+1s, and in ``debug`` mode adds ``X-DB-Queries``,
+``X-DB-Time-Ms`` and ``X-DB-N-Plus-One`` to the response. Functions in
+:data:`observers` receive the finished stats of every request; the test
+suite uses that to assert query budgets per endpoint.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryStats:
+    method: str
+    path: str
+    statements: int = 0
+    db_seconds: float = 0.0
+    shapes: Counter[str] = field(default_factory=Counter)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.statements += 1
+        self.db_seconds += seconds
+        self.shapes[statement] += 1
+
+    def repeated(self, threshold: int | None = None) -> dict[str, int]:
+        """Statement shapes run at least ``threshold`` times: likely N+1s."""
+        at_least = settings.n_plus_one_threshold if threshold is None else threshold
+        return {sql: count for sql, count in self.shapes.items() if count >= at_least}
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+observers: list[Callable[[QueryStats], None]] = []
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_execute(conn: Any, *_: Any) -> None:
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_execute(conn: Any, _cursor: Any, statement: str, *_: Any) -> None:
+    stats = _current.get()
+    started = conn.info.get("query_started")
+    if stats is not None and started:
+        stats.record(statement, time.perf_counter() - started.pop())
+
+
+class QueryStatsMiddleware:
+    """Collect :class:`QueryStats` for each HTTP request."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = QueryStats(scope["method"], scope["path"])
+        token = _current.set(stats)
+
+        async def send_with_stats(message: Message) -> None:
+            if message["type"] == "http.response.start" and settings.debug:
+                message["headers"] = [*message.get("headers", []), *_headers(stats)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current.reset(token)
+            _report(stats)
+
+
+def _headers(stats: QueryStats) -> list[tuple[bytes, bytes]]:
+    return [
+        (b"x-db-queries", str(stats.statements).encode()),
+        (b"x-db-time-ms", f"{stats.db_seconds * 1000:.2f}".encode()),
+        (b"x-db-n-plus-one", str(len(stats.repeated())).encode()),
+    ]
+
+
+def _report(stats: QueryStats) -> None:
+    for statement, count in stats.repeated().items():
+        logger.warning(
+            "Possible N+1 on %s %s: statement ran %d times: %s",
+            stats.method,
+            stats.path,
+            count,
+            " ".join(statement.split())[:200],
+        )
+    for observer in observers:
+        observer(stats)
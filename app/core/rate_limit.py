@@ -0,0 +1,244 @@
+"""Token-bucket admission control for the unauthenticated auth endpoints.
+
+Each bucket holds up to ``burst`` tokens and refills at ``per_minute``.
+Login and register take one token from the client IP's bucket and one
+from the bucket of that username/email *from that IP* before touching the
+database or bcrypt, and answer 429 with ``Retry-After`` when either is
+empty. Both buckets are checked before either is spent, and keying the
+identity bucket on the IP too means nobody can lock an account out of
+login for everyone else.
+
+The client IP is the socket peer, unless the peer is one of
+``trusted_proxies``: then it is the right-most ``X-Forwarded-For`` address
+that is not itself a trusted proxy. Behind a reverse proxy that setting is
+required, or every client shares the proxy's IP bucket.
+
+Buckets live in process memory by default. Setting
+``rate_limit_sqlite_path`` moves them into a small SQLite file so that all
+workers on a host share one budget.
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Protocol, Sequence
+
+from fastapi import HTTPException, Request
+
+from app.core.config import settings
+
+
+# (key, burst, refill per second)
+Bucket = tuple[str, float, float]
+
+
+def _refill(tokens: float, updated: float, now: float, burst: float, per_second: float) -> float:
+    return min(burst, tokens + max(0.0, now - updated) * per_second)
+
+
+def _spend(buckets: Sequence[Bucket], tokens: list[float]) -> tuple[list[float], list[float]]:
+    """Take one token from every bucket, or from none if any is short.
+
+    Return ``(tokens_left, retry_after)``; each ``retry_after`` is 0 unless
+    that bucket was the one short of a token.
+    """
+    retry_after = [
+        0.0 if left >= 1.0 else (1.0 - left) / per_second
+        for left, (_, _, per_second) in zip(tokens, buckets)
+    ]
+    if any(retry_after):
+        return tokens, retry_after
+    return [left - 1.0 for left in tokens], retry_after
+
+
+class BucketStore(Protocol):
+    def take(self, buckets: Sequence[Bucket]) -> list[float]:
+        """Spend a token from each bucket if all have one; return the per-bucket wait."""
+
+    def reset(self) -> None: ...
+
+
+class MemoryBucketStore:
+    """Per-process buckets; least recently used keys are dropped past ``max_keys``."""
+
+    def __init__(self, max_keys: int = 100_000) -> None:
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, buckets: Sequence[Bucket]) -> list[float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens = []
+            for key, burst, per_second in buckets:
+                left, updated = self._buckets.get(key, (burst, now))
+                tokens.append(_refill(left, updated, now, burst, per_second))
+            tokens, retry_after = _spend(buckets, tokens)
+            for (key, _, _), left in zip(buckets, tokens):
+                self._buckets[key] = (left, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class SqliteBucketStore:
+    """Buckets shared through a SQLite file; each take is one IMMEDIATE transaction."""
+
+    # rows untouched for this long are full again and can be dropped
+    idle_seconds = 3600.0
+    prune_every = 1000
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._takes = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_buckets "
+                "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def take(self, buckets: Sequence[Bucket]) -> list[float]:
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            tokens = []
+            for key, burst, per_second in buckets:
+                row = conn.execute(
+                    "SELECT tokens, updated FROM rate_buckets WHERE key = ?", (key,)
+                ).fetchone()
+                left, updated = row if row is not None else (burst, now)
+                tokens.append(_refill(left, updated, now, burst, per_second))
+            tokens, retry_after = _spend(buckets, tokens)
+            conn.executemany(
+                "INSERT INTO rate_buckets (key, tokens, updated) VALUES (?, ?, ?) ON CONFLICT(key) "
+                "DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                [(key, left, now) for (key, _, _), left in zip(buckets, tokens)],
+            )
+            self._takes += 1
+            if self._takes % self.prune_every == 0:
+                cutoff = now - self.idle_seconds
+                conn.execute("DELETE FROM rate_buckets WHERE updated < ?", (cutoff,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return retry_after
+
+    def reset(self) -> None:
+        self._connect().execute("DELETE FROM rate_buckets")
+
+
+class AuthRateLimiter:
+    """Applies the IP and identity buckets and counts outcomes per bucket kind."""
+
+    def __init__(self, store: BucketStore) -> None:
+        self.store = store
+        self._lock = threading.Lock()
+        self.counters: dict[str, int] = {}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def check(self, request: Request, identity: str) -> None:
+        ip = client_ip(request)
+        limits = [
+            ("ip", ip, settings.auth_ip_burst, settings.auth_ip_per_minute),
+            # not per IP: an attack on one account spread over many addresses
+            # must still drain the account's bucket
+            (
+                "identity",
+                identity.strip().lower(),
+                settings.auth_identity_burst,
+                settings.auth_identity_per_minute,
+            ),
+        ]
+        enabled = [limit for limit in limits if limit[2] > 0 and limit[3] > 0]
+        if not enabled:
+            return
+        buckets = [
+            (f"{kind}:{key}", float(burst), per_minute / 60.0)
+            for kind, key, burst, per_minute in enabled
+        ]
+        retry_after = self.store.take(buckets)
+        for (kind, _, _, _), wait in zip(enabled, retry_after):
+            self._count(f"{kind}_rejected" if wait > 0 else f"{kind}_allowed")
+        if any(retry_after):
+            raise HTTPException(
+                status_code=429,
+                detail="Too many attempts, please retry later",
+                headers={"Retry-After": str(max(1, int(max(retry_after) + 0.999)))},
+            )
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self.counters)
+
+    def reset(self) -> None:
+        self.store.reset()
+        with self._lock:
+            self.counters.clear()
+
+
+IPNetwork = ipaddress.IPv4Network | ipaddress.IPv6Network
+
+
+@lru_cache(maxsize=8)
+def _networks(proxies: tuple[str, ...]) -> tuple[IPNetwork, ...]:
+    return tuple(ipaddress.ip_network(proxy, strict=False) for proxy in proxies)
+
+
+def _trusted(address: str, networks: tuple[IPNetwork, ...]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address.strip())
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
+def client_ip(request: Request) -> str:
+    """The caller's address, seen through ``trusted_proxies``."""
+    peer = request.client.host if request.client else "unknown"
+    networks = _networks(tuple(settings.trusted_proxies))
+    if not networks or not _trusted(peer, networks):
+        return peer
+    forwarded = [
+        hop.strip()
+        for header in request.headers.getlist("x-forwarded-for")
+        for hop in header.split(",")
+        if hop.strip()
+    ]
+    for hop in reversed(forwarded):
+        if not _trusted(hop, networks):
+            return hop
+    return forwarded[0] if forwarded else peer
+
+
+def _default_store() -> BucketStore:
+    if settings.rate_limit_sqlite_path:
+        return SqliteBucketStore(settings.rate_limit_sqlite_path)
+    return MemoryBucketStore()
+
+
+auth_limiter = AuthRateLimiter(_default_store())
@@ -0,0 +1,163 @@
+"""Read-through cache of rendered catalog responses.
+
+Catalog list endpoints render their JSON once per distinct URL and data
+version and replay the bytes afterwards, skipping the row query and model
+building. Keys combine the request path, the sorted query string and the
+ETag, which embeds the dataset's ``data_versions`` counter. A write in any
+worker therefore makes older entries unreachable, and no stale body is
+ever served. Entries are tagged with their dataset (``movies``, ``halls``,
+``screenings``). :func:`app.core.etag.bump_version` drops a dataset's
+entries in the writing process as soon as the write commits. Elsewhere
+they age out through the LRU, byte and TTL bounds.
+
+:class:`ResponseCache` is the backend interface; a shared store (e.g.
+Redis) only needs ``get``/``put``/``invalidate``, since keys are already
+coherent across workers.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Iterable, Protocol
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+_PENDING_TAGS = "response_cache_tags"
+
+
+@dataclass(frozen=True, slots=True)
+class CachedResponse:
+    body: bytes
+    headers: tuple[tuple[str, str], ...]
+    tags: frozenset[str]
+    stored_at: float
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(k) + len(v) for k, v in self.headers)
+
+    def render(self) -> Response:
+        return Response(self.body, media_type="application/json", headers=dict(self.headers))
+
+
+class ResponseCache(Protocol):
+    def get(self, key: str) -> CachedResponse | None: ...
+
+    def put(self, key: str, entry: CachedResponse) -> None: ...
+
+    def invalidate(self, tag: str) -> None: ...
+
+    def clear(self) -> None: ...
+
+    def stats(self) -> dict[str, float]: ...
+
+
+class MemoryResponseCache:
+    """Per-process LRU bounded by entry count, total body bytes and age."""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = dict.fromkeys(("hits", "misses", "evictions", "invalidations"), 0)
+
+    def _drop(self, key: str) -> None:
+        self._bytes -= len(key) + self._entries.pop(key).size
+
+    def get(self, key: str) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry.stored_at > self.ttl_seconds:
+                if entry is not None:
+                    self._drop(key)
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters["hits"] += 1
+            return entry
+
+    def put(self, key: str, entry: CachedResponse) -> None:
+        size = len(key) + entry.size
+        if self.max_entries <= 0 or self.ttl_seconds <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = entry
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.counters["evictions"] += 1
+
+    def invalidate(self, tag: str) -> None:
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if tag in e.tags]:
+                self._drop(key)
+                self.counters["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.counters = dict.fromkeys(self.counters, 0)
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            hits, lookups = self.counters["hits"], self.counters["hits"] + self.counters["misses"]
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                **self.counters,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def cache_key(request: Request, etag: str) -> str:
+    """Path, normalized (sorted) query string and data version."""
+    query = urlencode(sorted(request.query_params.multi_items()))
+    return f"{request.url.path}?{query}#{etag}"
+
+
+def store(key: str, tags: Iterable[str], content: Any, response: Response) -> Response:
+    """Render ``content`` with the headers set on ``response``, cache and return it."""
+    rendered = JSONResponse(jsonable_encoder(content))
+    headers = tuple((k, v) for k, v in response.headers.items() if k != "content-length")
+    entry = CachedResponse(rendered.body, headers, frozenset(tags), time.monotonic())
+    response_cache.put(key, entry)
+    return Response(rendered.body, media_type="application/json", headers=dict(headers))
+
+
+def invalidate_after_commit(db: Session, tag: str) -> None:
+    """Drop ``tag``'s entries once ``db`` commits; forgotten on rollback."""
+    db.info.setdefault(_PENDING_TAGS, set()).add(tag)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    for tag in session.info.pop(_PENDING_TAGS, ()):
+        response_cache.invalidate(tag)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_pending(session: Session) -> None:
+    session.info.pop(_PENDING_TAGS, None)
+
+
+response_cache: ResponseCache = MemoryResponseCache(
+    settings.response_cache_size,
+    settings.response_cache_max_bytes,
+    settings.response_cache_ttl_seconds,
+)
@@ -1,27 +1,115 @@
+import itertools
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Optional, cast
+from multiprocessing.context import BaseContext
+from typing import Any, Callable, Dict, Optional, Sequence, TypeVar, cast
 
 import bcrypt
+from fastapi import HTTPException
 from jose import JWTError, jwt
 
 from app.core.config import settings
 
+T = TypeVar("T")
+
+
+def _hashpw(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _checkpw(password: bytes, hashed_password: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed_password)
+
+
+def process_context() -> BaseContext:
+    # forkserver avoids forking a process that already runs threads
+    forkserver = "forkserver" in multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if forkserver else "spawn")
+
+
+class PasswordHasher:
+    """Runs bcrypt in a small process pool so hashing never holds the API's GIL.
+
+    At most ``max_pending`` calls may be queued or running; callers that cannot
+    get a slot within ``queue_timeout`` get a 503 instead of piling up. With
+    ``workers=0`` bcrypt runs inline in the calling thread. The pool is
+    started on first use and lives as long as the process.
+    """
+
+    def __init__(self, workers: int, max_pending: int, queue_timeout: float) -> None:
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pool: Executor | None = None
+
+    def _executor(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=process_context())
+            return self._pool
+
+    def run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self.workers <= 0:
+            return fn(*args)
+        if not self._slots.acquire(timeout=self.queue_timeout):  # pylint: disable=consider-using-with
+            raise HTTPException(
+                status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"}
+            )
+        try:
+            return self._executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+
+password_hasher = PasswordHasher(
+    settings.password_hash_workers,
+    settings.password_hash_max_pending,
+    settings.password_hash_queue_timeout_seconds,
+)
+
 
 def hash_password(password: str) -> str:
-    hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
+    hashed = password_hasher.run(_hashpw, password.encode("utf-8"), settings.bcrypt_rounds)
     return hashed.decode("utf-8")
 
 
+def hash_passwords(passwords: Sequence[str], executor: Executor | None = None) -> list[str]:
+    """Hash a batch, spread over ``executor`` when given (bulk jobs bring their own pool)."""
+    encoded = [p.encode("utf-8") for p in passwords]
+    rounds = itertools.repeat(settings.bcrypt_rounds)
+    if executor is None:
+        hashed = list(map(_hashpw, encoded, rounds))
+    else:
+        hashed = list(executor.map(_hashpw, encoded, rounds, chunksize=16))
+    return [h.decode("utf-8") for h in hashed]
+
+
 def verify_password(password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
+    return password_hasher.run(_checkpw, password.encode("utf-8"), hashed_password.encode("utf-8"))
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True when a stored ``$2b$<cost>$...`` hash was made with a different cost."""
+    parts = hashed_password.split("$")
+    return len(parts) < 4 or not parts[2].isdigit() or int(parts[2]) != settings.bcrypt_rounds
 
 
-def create_access_token(subject: str, expires_minutes: Optional[int] = None) -> str:
+def create_access_token(
+    subject: str, expires_minutes: Optional[int] = None, claims: Optional[Dict[str, Any]] = None
+) -> str:
     expire_minutes = expires_minutes or settings.access_token_expire_minutes
     now = datetime.now(timezone.utc)
     exp = now + timedelta(minutes=expire_minutes)
 
-    payload: Dict[str, Any] = {"sub": subject, "iat": int(now.timestamp()), "exp": int(exp.timestamp())}
+    payload: Dict[str, Any] = {
+        **(claims or {}),
+        "sub": subject,
+        "iat": int(now.timestamp()),
+        "exp": int(exp.timestamp()),
+    }
     return cast(str, jwt.encode(payload, settings.secret_key, algorithm=settings.jwt_algorithm))
 
 
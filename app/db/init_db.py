@@ -2,7 +2,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import select
 
 from app.models.user import User, UserRole
-from app.core.security import hash_password
+from app.core.security import hash_passwords
 
 
 def ensure_admin(db: Session) -> None:
@@ -13,7 +13,8 @@ def ensure_admin(db: Session) -> None:
     admin_user = User(
         email="admin@example.com",
         username="admin",
-        hashed_password=hash_password("admin1234"),
+        # inline: this runs while app.main is imported, too early to start the hashing pool
+        hashed_password=hash_passwords(["admin1234"])[0],
         role=UserRole.ADMIN,
     )
     db.add(admin_user)
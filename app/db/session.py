@@ -1,11 +1,71 @@
-from sqlalchemy import create_engine
+from typing import Any
+
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if settings.database_url.startswith("sqlite") else {},
-)
+
+def engine_options(url: str) -> dict[str, Any]:
+    """Pool/driver keyword arguments for ``create_engine`` based on the URL."""
+    if url.startswith("sqlite"):
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+    }
+
+
+def sqlite_pragmas() -> list[str]:
+    return [
+        f"PRAGMA journal_mode={settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}",
+        f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}",
+        f"PRAGMA cache_size={int(settings.sqlite_cache_size)}",
+        f"PRAGMA foreign_keys={'ON' if settings.sqlite_foreign_keys else 'OFF'}",
+    ]
+
+
+def configure_sqlite(target: Engine) -> None:
+    """Apply the SQLite tuning profile to every connection ``target`` opens."""
+    if target.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(target, "connect")
+    def _set_pragmas(dbapi_connection: Any, _: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in sqlite_pragmas():
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+engine = create_engine(settings.database_url, **engine_options(settings.database_url))
+configure_sqlite(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def async_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver."""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url.removeprefix("sqlite:")
+    if url.startswith(("postgresql:", "postgresql+psycopg2:")):
+        return "postgresql+asyncpg:" + url.split(":", 1)[1]
+    return url
+
+
+# Only built in async mode, so the asyncio driver stays an optional dependency
+AsyncSessionLocal: async_sessionmaker[AsyncSession] | None = None
+if settings.db_mode == "async":
+    _async_url = settings.async_database_url or async_url(settings.database_url)
+    _async_options = engine_options(_async_url)
+    _async_options.pop("connect_args", None)
+    async_engine = create_async_engine(_async_url, **_async_options)
+    configure_sqlite(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
@@ -0,0 +1,111 @@
+"""Bring a database created by an older version up to the current schema.
+
+``create_all`` only creates missing tables, so on an existing database this
+adds the columns and indexes that tables gained since, backfilling values
+that cannot be a constant default, then creates the new tables (including
+SQLite's ``movies_fts``) and fills ``movie_ratings`` if it was just made::
+
+    python -m app.db.upgrade
+
+Safe to run more than once; it only adds what is missing. On SQLite a
+backfilled ``NOT NULL`` column stays nullable, since SQLite cannot alter
+a column after adding it.
+"""
+
+from __future__ import annotations
+
+from typing import Callable
+
+from sqlalchemy import Column, Connection, DefaultClause, Engine, inspect, select, text, update
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.models import favorite, user, version  # pylint: disable=unused-import
+from app.models.cinema import Movie, Screening
+from app.services import movie_search  # pylint: disable=unused-import
+from app.services.ratings import rebuild_ratings
+from app.services.scheduling import screening_end
+
+# replaced by ix_reservations_screening_status, which starts with the same column
+_OBSOLETE_INDEXES = ["ix_reservations_screening_id"]
+
+
+def _backfill_ends_at(conn: Connection) -> None:
+    rows = conn.execute(
+        select(Screening.id, Screening.starts_at, Movie.runtime_minutes)
+        .join(Movie, Movie.id == Screening.movie_id)
+        .where(Screening.ends_at.is_(None))
+    ).tuples()
+    for screening_id, starts_at, runtime in rows.all():
+        conn.execute(
+            update(Screening)
+            .where(Screening.id == screening_id)
+            .values(ends_at=screening_end(starts_at, runtime))
+        )
+
+
+# NOT NULL columns without a server default, and how to fill them in
+_BACKFILLS: dict[tuple[str, str], Callable[[Connection], None]] = {
+    ("screenings", "ends_at"): _backfill_ends_at,
+}
+
+
+def _add_column(conn: Connection, table: str, column: Column[object]) -> None:
+    backfill = _BACKFILLS.get((table, column.name))
+    spec = f"{column.name} {column.type.compile(conn.dialect)}"
+    default = column.server_default
+    if isinstance(default, DefaultClause) and isinstance(default.arg, str):
+        # quoted like create_all renders it; the column's type converts the value
+        spec += f" DEFAULT '{default.arg}'"
+        if not column.nullable:
+            spec += " NOT NULL"
+    elif not column.nullable and backfill is None:
+        raise RuntimeError(f"Don't know how to fill {table}.{column.name} in existing rows")
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {spec}"))
+    if backfill is not None:
+        backfill(conn)
+        if conn.dialect.name != "sqlite":
+            conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column.name} SET NOT NULL"))
+
+
+def upgrade(engine: Engine) -> list[str]:
+    """Apply the missing schema changes; returns a line per change made."""
+    changes: list[str] = []
+    with engine.begin() as conn:
+        existing = set(inspect(conn).get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing:
+                continue
+            columns = {c["name"] for c in inspect(conn).get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in columns:
+                    _add_column(conn, table.name, column)
+                    changes.append(f"added {table.name}.{column.name}")
+            indexes = {i["name"] for i in inspect(conn).get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(conn)
+                    changes.append(f"created index {index.name}")
+            for name in _OBSOLETE_INDEXES:
+                if name in indexes:
+                    conn.execute(text(f"DROP INDEX {name}"))
+                    changes.append(f"dropped index {name}")
+        Base.metadata.create_all(conn)
+        created = set(inspect(conn).get_table_names()) - existing
+        changes += [f"created table {name}" for name in sorted(created)]
+    if existing and "movie_ratings" in created:
+        with Session(engine) as db:
+            changes.append(f"rebuilt ratings for {rebuild_ratings(db)} movies")
+    return changes
+
+
+def main() -> None:
+    # imported lazily so the module imports without a configured database
+    from app.db.session import engine  # pylint: disable=import-outside-toplevel
+
+    changes = upgrade(engine)
+    print("\n".join(changes) if changes else "schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
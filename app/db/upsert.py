@@ -0,0 +1,17 @@
+"""``INSERT ... ON CONFLICT`` for the databases this app runs on.
+
+SQLite and PostgreSQL spell the statement the same way, but SQLAlchemy
+builds it from dialect-specific ``insert`` constructs.
+"""
+
+from typing import Any
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def upsert(db: Session, entity: Any) -> sqlite.Insert | postgresql.Insert:
+    """An insert into ``entity`` supporting ``on_conflict_do_update`` on ``db``'s database."""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(entity)
+    return sqlite.insert(entity)
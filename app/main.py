@@ -6,13 +6,19 @@ handlers, and seeds the database with default data.
 
 from __future__ import annotations
 
+import asyncio
 import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
 from fastapi import FastAPI, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
+from app.core.config import settings
+from app.core.query_stats import QueryStatsMiddleware
 from app.db.base import Base
 from app.db.init_db import ensure_admin
 from app.db.session import SessionLocal, engine
@@ -20,17 +26,43 @@ from app.routers.admin import router as admin_router
 from app.routers.admin_tools import router as admin_tools_router
 from app.routers.auth import router as auth_router
 from app.routers.availability import router as availability_router
+from app.routers.availability_async import router as availability_async_router
 from app.routers.cinema import router as cinema_router
 from app.routers.favorites import router as favorites_router
 from app.routers.provider_reservations import router as provider_reservations_router
 from app.routers.reservations import router as reservations_router
+from app.routers.reservations_async import router as reservations_async_router
 from app.routers.reviews import router as reviews_router
 from app.routers.users import router as users_router
+from app.services.recommendations import build_recommendation_index, run_recommendation_rebuilder
+from app.services.reservation_service import run_hold_sweeper
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 
-app = FastAPI(title="Cinema Reservations API")
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    """Build in-process indexes, then run background maintenance for the app's lifetime."""
+    try:
+        await asyncio.to_thread(build_recommendation_index, SessionLocal)
+    except Exception:  # pylint: disable=broad-exception-caught
+        # the first recommendation request builds it instead
+        logger.exception("Recommendation index build failed")
+    tasks: list[asyncio.Task[None]] = []
+    interval = settings.hold_sweep_interval_seconds
+    if interval > 0:
+        tasks.append(asyncio.create_task(run_hold_sweeper(SessionLocal, interval)))
+    interval = settings.recommendation_rebuild_seconds
+    if interval > 0:
+        tasks.append(asyncio.create_task(run_recommendation_rebuilder(SessionLocal, interval)))
+    yield
+    for task in tasks:
+        task.cancel()
+
+
+app = FastAPI(title="Cinema Reservations API", lifespan=lifespan)
+app.add_middleware(QueryStatsMiddleware)
 
 Base.metadata.create_all(bind=engine)
 
@@ -39,8 +71,12 @@ with SessionLocal() as db:
 
 app.include_router(auth_router)
 app.include_router(cinema_router)
-app.include_router(availability_router)
-app.include_router(reservations_router)
+if settings.db_mode == "async":
+    app.include_router(availability_async_router)
+    app.include_router(reservations_async_router)
+else:
+    app.include_router(availability_router)
+    app.include_router(reservations_router)
 app.include_router(reviews_router)
 app.include_router(favorites_router)
 app.include_router(admin_tools_router)
@@ -59,14 +95,16 @@ def root() -> dict[str, str]:
 async def validation_exception_handler(request: Request, exc: RequestValidationError) -> JSONResponse:
     """Return a consistent response for validation errors."""
     logger.warning("Validation error on %s %s: %s", request.method, request.url, exc.errors())
-    return JSONResponse(status_code=422, content={"detail": exc.errors()})
+    return JSONResponse(status_code=422, content={"detail": jsonable_encoder(exc.errors())})
 
 
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request: Request, exc: StarletteHTTPException) -> JSONResponse:
     """Return a consistent response for HTTP errors."""
     logger.info("HTTP exception on %s %s: %s", request.method, request.url, exc.detail)
-    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+    return JSONResponse(
+        status_code=exc.status_code, content={"detail": exc.detail}, headers=exc.headers
+    )
 
 
 @app.exception_handler(Exception)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import ForeignKey, String, DateTime, Integer
+from sqlalchemy import ForeignKey, String, DateTime, Float, Index, Integer
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -11,6 +11,31 @@ class Movie(Base):
     title: Mapped[str] = mapped_column(String(200), index=True)
     description: Mapped[str] = mapped_column(String(2000), default="")
     category: Mapped[str] = mapped_column(String(100), default="General")
+    runtime_minutes: Mapped[int] = mapped_column(Integer, default=120, server_default="120")
+
+    rating = relationship("MovieRating", uselist=False, back_populates="movie", viewonly=True)
+
+
+class MovieRating(Base):
+    """Running review totals of a movie, updated in the same transaction as ``reviews``."""
+
+    __tablename__ = "movie_ratings"
+    movie_id: Mapped[int] = mapped_column(ForeignKey("movies.id"), primary_key=True)
+    review_count: Mapped[int] = mapped_column(Integer, default=0)
+    rating_sum: Mapped[int] = mapped_column(Integer, default=0)
+    average: Mapped[float] = mapped_column(Float, default=0.0)
+    stars_1: Mapped[int] = mapped_column(Integer, default=0)
+    stars_2: Mapped[int] = mapped_column(Integer, default=0)
+    stars_3: Mapped[int] = mapped_column(Integer, default=0)
+    stars_4: Mapped[int] = mapped_column(Integer, default=0)
+    stars_5: Mapped[int] = mapped_column(Integer, default=0)
+
+    movie = relationship("Movie", back_populates="rating")
+
+    __table_args__ = (
+        # "top rated" listings walk this index from the top
+        Index("ix_movie_ratings_average", "average", "movie_id"),
+    )
 
 
 class Hall(Base):
@@ -23,12 +48,19 @@ class Hall(Base):
 
 class Screening(Base):
     __tablename__ = "screenings"
+    __table_args__ = (
+        # covers the hall overlap check: range on starts_at, filter on ends_at
+        Index("ix_screenings_hall_schedule", "hall_id", "starts_at", "ends_at"),
+        # provider reservation inbox: a provider's screenings, optionally by date
+        Index("ix_screenings_provider_starts", "provider_id", "starts_at"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
 
     movie_id: Mapped[int] = mapped_column(ForeignKey("movies.id"))
     hall_id: Mapped[int] = mapped_column(ForeignKey("halls.id"))
 
     starts_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+    ends_at: Mapped[datetime] = mapped_column(DateTime)
     provider_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
 
     movie = relationship("Movie")
@@ -7,7 +7,7 @@ ticket records.
 import enum
 from datetime import datetime, timezone
 
-from sqlalchemy import ForeignKey, String, DateTime, Enum, UniqueConstraint, Integer
+from sqlalchemy import ForeignKey, String, DateTime, Enum, UniqueConstraint, Integer, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -29,10 +29,13 @@ class Reservation(Base):
     status: Mapped[ReservationStatus] = mapped_column(Enum(ReservationStatus), default=ReservationStatus.PENDING)
 
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)   
-    screening_id: Mapped[int] = mapped_column(ForeignKey("screenings.id"), index=True)
+    screening_id: Mapped[int] = mapped_column(ForeignKey("screenings.id"))
 
     notes: Mapped[str] = mapped_column(String(1000), default="")
 
+    # Seat hold deadline for PENDING reservations; cleared once confirmed
+    expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True, default=None)
+
     user = relationship("User")
     screening = relationship("Screening")
     tickets = relationship(
@@ -41,6 +44,12 @@ class Reservation(Base):
     back_populates="reservation",
     )
 
+    __table_args__ = (
+        Index("ix_reservations_status_expires_at", "status", "expires_at"),
+        # per-screening lookups, and the provider inbox filtered by status
+        Index("ix_reservations_screening_status", "screening_id", "status", "id"),
+    )
+
 
 class ReservationTicket(Base):
     __tablename__ = "reservation_tickets"
@@ -1,5 +1,7 @@
 import enum
-from sqlalchemy import Enum, String
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, Enum, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
@@ -19,3 +21,28 @@ class User(Base):
     username: Mapped[str] = mapped_column(String(50), unique=True, index=True)
     hashed_password: Mapped[str] = mapped_column(String(255))
     role: Mapped[UserRole] = mapped_column(Enum(UserRole), default=UserRole.USER, index=True)
+    # bumped on role changes; tokens carrying an older "ver" claim are revoked
+    token_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+
+class ImportJobStatus(str, enum.Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+
+class UserImportJob(Base):
+    """A bulk user import uploaded through the admin API, and its report."""
+
+    __tablename__ = "user_import_jobs"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    status: Mapped[ImportJobStatus] = mapped_column(
+        Enum(ImportJobStatus), default=ImportJobStatus.QUEUED
+    )
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True, default=None)
+    # UserImportOut as JSON once DONE; the failure message once FAILED
+    report: Mapped[str | None] = mapped_column(Text, nullable=True, default=None)
+    error: Mapped[str | None] = mapped_column(String(500), nullable=True, default=None)
@@ -1,27 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+)
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
 from app.core.deps import get_db, require_role
-from app.models.user import User, UserRole
+from app.core.etag import bump_version
+from app.core.pagination import paginate
+from app.core.principals import Principal, principals, token_versions
+from app.models.user import User, UserImportJob, UserRole
 from app.models.cinema import Movie, Hall, Screening
 from app.models.reservation import Reservation, ReservationTicket, ReservationStatus
 from app.schemas.reservation import ReservationOut, ReservationTicketOut
 from app.models.review import Review
 from app.models.favorite import FavoriteMovie
-from app.schemas.user import UserOut, UserRoleUpdateIn
+from app.schemas.user import UserImportJobOut, UserOut, UserRoleUpdateIn
+from app.services.ratings import drop_summary, forget_reviews
+from app.services.reservation_service import hold_expired
+from app.services.seat_map import seat_maps
+from app.services.user_import import (
+    ImportFormat,
+    guess_format,
+    job_out,
+    job_sessions,
+    queue_import,
+    run_import_job,
+)
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 
 @router.get("/users", response_model=list[UserOut])
 def list_users(
+    response: Response,
     db: Session = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100,
-    _: User = Depends(require_role(UserRole.ADMIN)),
+    cursor: str | None = None,
+    limit: int | None = Query(default=None, ge=1),
+    skip: int = Query(default=0, ge=0, deprecated=True),
+    _: Principal = Depends(require_role(UserRole.ADMIN)),
 ) -> list[UserOut]:
-    rows = db.query(User).order_by(User.id.asc()).offset(skip).limit(min(limit, 100)).all()
+    rows = paginate(db.query(User), [User.id], cursor, limit, response, skip=skip)
     return [UserOut(id=u.id, email=u.email, username=u.username, role=u.role) for u in rows]
 
 
@@ -29,7 +56,7 @@ def list_users(
 def get_user(
     user_id: int,
     db: Session = Depends(get_db),
-    _: User = Depends(require_role(UserRole.ADMIN)),
+    _: Principal = Depends(require_role(UserRole.ADMIN)),
 ) -> UserOut:
     u = db.get(User, user_id)
     if not u:
@@ -37,12 +64,44 @@ def get_user(
     return UserOut(id=u.id, email=u.email, username=u.username, role=u.role)
 
 
+@router.post("/users/import", response_model=UserImportJobOut, status_code=202)
+def import_users_file(  # pylint: disable=too-many-arguments
+    response: Response,
+    background: BackgroundTasks,
+    file: UploadFile = File(...),
+    fmt: Optional[ImportFormat] = Query(None, alias="format"),
+    db: Session = Depends(get_db),
+    _: Principal = Depends(require_role(UserRole.ADMIN)),
+) -> UserImportJobOut:
+    """Queue USER accounts from an uploaded CSV or NDJSON file (email, username, password).
+
+    The import runs after the response; poll the returned job for its report.
+    """
+    fmt = fmt or guess_format(file.filename or "")
+    job, path = queue_import(db, file.file)
+    background.add_task(run_import_job, job_sessions(db), job.id, path, fmt)
+    response.headers["Location"] = f"/admin/users/import/{job.id}"
+    return job_out(job)
+
+
+@router.get("/users/import/{job_id}", response_model=UserImportJobOut)
+def get_import_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    _: Principal = Depends(require_role(UserRole.ADMIN)),
+) -> UserImportJobOut:
+    job = db.get(UserImportJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job_out(job)
+
+
 @router.patch("/users/{user_id}/role", response_model=UserOut)
 def update_user_role(
     user_id: int,
     payload: UserRoleUpdateIn,
     db: Session = Depends(get_db),
-    current: User = Depends(require_role(UserRole.ADMIN)),
+    current: Principal = Depends(require_role(UserRole.ADMIN)),
 ) -> UserOut:
     u = db.get(User, user_id)
     if not u:
@@ -55,8 +114,11 @@ def update_user_role(
         raise HTTPException(status_code=400, detail="Admin role cannot be assigned/changed via API")
 
     u.role = payload.role
+    u.token_version += 1
     db.commit()
     db.refresh(u)
+    principals.invalidate(u.id)
+    token_versions.put(u.id, u.token_version)
     return UserOut(id=u.id, email=u.email, username=u.username, role=u.role)
 
 
@@ -64,7 +126,7 @@ def update_user_role(
 def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current: User = Depends(require_role(UserRole.ADMIN)),
+    current: Principal = Depends(require_role(UserRole.ADMIN)),
 ) -> dict[str, bool]:
     u = db.get(User, user_id)
     if not u:
@@ -76,17 +138,30 @@ def delete_user(
     if u.role == UserRole.ADMIN:
         raise HTTPException(status_code=400, detail="Admin user cannot be deleted via API")
 
+    has_screenings = db.query(Screening.id).filter(Screening.provider_id == user_id).first() is not None
+    if has_screenings:
+        raise HTTPException(status_code=400, detail="Cannot delete user who provides screenings")
+
     db.query(FavoriteMovie).filter(FavoriteMovie.user_id == user_id).delete()
 
+    forget_reviews(db, Review.user_id == user_id)
     db.query(Review).filter(Review.user_id == user_id).delete()
 
-    reservations = db.query(Reservation).filter(Reservation.user_id == user_id).all()
-    for r in reservations:
-        db.query(ReservationTicket).filter(ReservationTicket.reservation_id == r.id).delete()
-        db.delete(r)
+    theirs = select(Reservation.id).where(Reservation.user_id == user_id)
+    screenings = select(Reservation.screening_id).where(Reservation.user_id == user_id)
+    touched_screenings = set(db.scalars(screenings.distinct()))
+    # "fetch" also drops any of these rows already loaded into the session
+    db.query(ReservationTicket).filter(ReservationTicket.reservation_id.in_(theirs)).delete(
+        synchronize_session="fetch"
+    )
+    db.query(Reservation).filter(Reservation.user_id == user_id).delete(synchronize_session="fetch")
 
     db.delete(u)
     db.commit()
+    principals.invalidate(user_id)
+    token_versions.forget(user_id)
+    for screening_id in touched_screenings:
+        seat_maps.invalidate(screening_id)
     return {"ok": True}
 
 
@@ -94,15 +169,17 @@ def delete_user(
 def admin_delete_reservation(
     reservation_id: int,
     db: Session = Depends(get_db),
-    _: User = Depends(require_role(UserRole.ADMIN)),
+    _: Principal = Depends(require_role(UserRole.ADMIN)),
 ) -> dict[str, bool]:
     r = db.get(Reservation, reservation_id)
     if not r:
         raise HTTPException(status_code=404, detail="Reservation not found")
 
-    db.query(ReservationTicket).filter(ReservationTicket.reservation_id == reservation_id).delete()
-    db.delete(r)
+    screening_id = r.screening_id
+    released = [(t.seat_row, t.seat_col) for t in r.tickets]
+    db.delete(r)  # the loaded tickets go with it
     db.commit()
+    seat_maps.release(screening_id, released)
     return {"ok": True}
 
 
@@ -110,7 +187,7 @@ def admin_delete_reservation(
 def admin_confirm_reservation(
     reservation_id: int,
     db: Session = Depends(get_db),
-    _: User = Depends(require_role(UserRole.ADMIN)),
+    _: Principal = Depends(require_role(UserRole.ADMIN)),
 ) -> ReservationOut:
     r = db.get(Reservation, reservation_id)
     if not r:
@@ -119,7 +196,11 @@ def admin_confirm_reservation(
     if r.status != ReservationStatus.PENDING:
         raise HTTPException(status_code=400, detail="Can confirm only pending reservations")
 
+    if hold_expired(r):
+        raise HTTPException(status_code=400, detail="Reservation hold expired")
+
     r.status = ReservationStatus.CONFIRMED
+    r.expires_at = None
     db.commit()
     db.refresh(r)
 
@@ -131,6 +212,7 @@ def admin_confirm_reservation(
         created_at=r.created_at,
         notes=r.notes,
         tickets=[ReservationTicketOut(seat_row=t.seat_row, seat_col=t.seat_col) for t in r.tickets],
+        expires_at=r.expires_at,
     )
 
 
@@ -138,7 +220,7 @@ def admin_confirm_reservation(
 def admin_complete_reservation(
     reservation_id: int,
     db: Session = Depends(get_db),
-    _: User = Depends(require_role(UserRole.ADMIN)),
+    _: Principal = Depends(require_role(UserRole.ADMIN)),
 ) -> ReservationOut:
     r = db.get(Reservation, reservation_id)
     if not r:
@@ -162,6 +244,7 @@ def admin_complete_reservation(
         created_at=r.created_at,
         notes=r.notes,
         tickets=[ReservationTicketOut(seat_row=t.seat_row, seat_col=t.seat_col) for t in r.tickets],
+        expires_at=r.expires_at,
     )
 
 
@@ -169,7 +252,7 @@ def admin_complete_reservation(
 def admin_delete_movie(
     movie_id: int,
     db: Session = Depends(get_db),
-    _: User = Depends(require_role(UserRole.ADMIN)),
+    _: Principal = Depends(require_role(UserRole.ADMIN)),
 ) -> dict[str, bool]:
     m = db.get(Movie, movie_id)
     if not m:
@@ -180,9 +263,11 @@ def admin_delete_movie(
         raise HTTPException(status_code=400, detail="Cannot delete movie with screenings")
 
     db.query(Review).filter(Review.movie_id == movie_id).delete()
+    drop_summary(db, movie_id)
     db.query(FavoriteMovie).filter(FavoriteMovie.movie_id == movie_id).delete()
 
     db.delete(m)
+    bump_version(db, "movies")
     db.commit()
     return {"ok": True}
 
@@ -191,7 +276,7 @@ def admin_delete_movie(
 def admin_delete_hall(
     hall_id: int,
     db: Session = Depends(get_db),
-    _: User = Depends(require_role(UserRole.ADMIN)),
+    _: Principal = Depends(require_role(UserRole.ADMIN)),
 ) -> dict[str, bool]:
     h = db.get(Hall, hall_id)
     if not h:
@@ -202,6 +287,7 @@ def admin_delete_hall(
         raise HTTPException(status_code=400, detail="Cannot delete hall with screenings")
 
     db.delete(h)
+    bump_version(db, "halls")
     db.commit()
     return {"ok": True}
 
@@ -210,7 +296,7 @@ def admin_delete_hall(
 def admin_delete_screening(
     screening_id: int,
     db: Session = Depends(get_db),
-    _: User = Depends(require_role(UserRole.ADMIN)),
+    _: Principal = Depends(require_role(UserRole.ADMIN)),
 ) -> dict[str, bool]:
     s = db.get(Screening, screening_id)
     if not s:
@@ -221,5 +307,7 @@ def admin_delete_screening(
         raise HTTPException(status_code=400, detail="Cannot delete screening with reservations")
 
     db.delete(s)
+    bump_version(db, "screenings")
     db.commit()
+    seat_maps.invalidate(screening_id)
     return {"ok": True}
@@ -1,11 +1,18 @@
+from collections.abc import Mapping
 from datetime import datetime, timezone
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from app.core.deps import get_db, require_role
-from app.models.user import User, UserRole
+from app.core.principals import Principal, principals
+from app.core.rate_limit import auth_limiter
+from app.core.response_cache import response_cache
+from app.models.user import UserRole
 from app.models.reservation import Reservation, ReservationStatus
 from app.models.cinema import Screening
+from app.services.recommendations import recommender
+from app.services.reservation_service import release_expired_holds
+from app.services.seat_map import seat_maps
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -13,7 +20,7 @@ router = APIRouter(prefix="/admin", tags=["admin"])
 @router.post("/complete-past-reservations")
 def complete_past_reservations(
     db: Session = Depends(get_db),
-    _: User = Depends(require_role(UserRole.ADMIN, UserRole.PROVIDER)),
+    _: Principal = Depends(require_role(UserRole.ADMIN, UserRole.PROVIDER)),
 ) -> dict[str, int]:
     now = datetime.now(timezone.utc).replace(tzinfo=None)
 
@@ -32,3 +39,24 @@ def complete_past_reservations(
 
     db.commit()
     return {"completed": count}
+
+
+@router.post("/release-expired-holds")
+def release_expired_seat_holds(
+    db: Session = Depends(get_db),
+    _: Principal = Depends(require_role(UserRole.ADMIN, UserRole.PROVIDER)),
+) -> dict[str, int]:
+    return {"released": release_expired_holds(db)}
+
+
+@router.get("/metrics")
+def metrics(
+    _: Principal = Depends(require_role(UserRole.ADMIN)),
+) -> dict[str, Mapping[str, float]]:
+    return {
+        "principal_cache": principals.stats(),
+        "response_cache": response_cache.stats(),
+        "recommendations": recommender.stats(),
+        "seat_map_cache": {"hits": seat_maps.hits, "misses": seat_maps.misses},
+        "auth_rate_limit": auth_limiter.stats(),
+    }
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 
 from app.core.deps import get_db
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.rate_limit import auth_limiter
+from app.core.security import hash_password, verify_password, create_access_token, needs_rehash
 from app.models.user import User, UserRole
 from app.schemas.auth import RegisterIn, LoginIn, TokenOut
 from fastapi.security import OAuth2PasswordRequestForm
@@ -11,8 +12,19 @@ from fastapi.security import OAuth2PasswordRequestForm
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+def _token_for(user: User) -> TokenOut:
+    claims = {
+        "role": user.role.value,
+        "ver": user.token_version,
+        "name": user.username,
+        "email": user.email,
+    }
+    return TokenOut(access_token=create_access_token(subject=str(user.id), claims=claims))
+
+
 @router.post("/register", response_model=TokenOut)
-def register(payload: RegisterIn, db: Session = Depends(get_db)) -> TokenOut:
+def register(payload: RegisterIn, request: Request, db: Session = Depends(get_db)) -> TokenOut:
+    auth_limiter.check(request, str(payload.email))
     exists = db.query(User).filter(or_(User.email == payload.email, User.username == payload.username)).first()
     if exists:
         raise HTTPException(status_code=400, detail="User already exists")
@@ -26,15 +38,16 @@ def register(payload: RegisterIn, db: Session = Depends(get_db)) -> TokenOut:
     db.add(user)
     db.commit()
     db.refresh(user)
-
-    token = create_access_token(subject=str(user.id))
-    return TokenOut(access_token=token)
+    return _token_for(user)
 
 
 @router.post("/login", response_model=TokenOut)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)) -> TokenOut:
+def login(
+    request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+) -> TokenOut:
     username_or_email = form_data.username
     password = form_data.password
+    auth_limiter.check(request, username_or_email)
 
     user = (
         db.query(User)
@@ -43,6 +56,7 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     )
     if not user or not verify_password(password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
-
-    token = create_access_token(subject=str(user.id))
-    return TokenOut(access_token=token)
+    if needs_rehash(user.hashed_password):
+        user.hashed_password = hash_password(password)
+        db.commit()
+    return _token_for(user)
@@ -1,28 +1,121 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import Any
+import asyncio
+import json
+from typing import Any, AsyncIterator, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Connection, Engine
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.deps import get_db
-from app.models.cinema import Screening
-from app.models.reservation import ReservationTicket
+from app.core.etag import PROCESS_EPOCH, conditional, make_etag
+from app.services.seat_events import SeatEvent, SeatPoller, Subscription, seat_events
+from app.services.seat_map import Seat, SeatMap, get_seat_map, load_taken_seats
 
 router = APIRouter(prefix="/screenings", tags=["availability"])
 
 
-@router.get("/{screening_id}/availability")
-def screening_availability(screening_id: int, db: Session = Depends(get_db)) -> dict[str, Any]:
-    screening = db.get(Screening, screening_id)
-    if not screening:
-        raise HTTPException(status_code=404, detail="Screening not found")
+SeatFormat = Literal["list", "bitmap", "rle"]
 
-    hall = screening.hall
-    taken = (
-        db.query(ReservationTicket.seat_row, ReservationTicket.seat_col)
-        .filter(ReservationTicket.screening_id == screening_id)
-        .all()
-    )
-    return {
+
+def availability_payload(screening_id: int, seat_map: SeatMap, seat_format: SeatFormat) -> dict[str, Any]:
+    out: dict[str, Any] = {
         "screening_id": screening_id,
-        "hall": {"rows": hall.rows, "cols": hall.cols},
-        "taken_seats": [{"seat_row": r, "seat_col": c} for (r, c) in taken],
+        "hall": {"rows": seat_map.rows, "cols": seat_map.cols},
     }
+    if seat_format == "bitmap":
+        out["encoding"] = "bitmap"
+        out["seat_map"] = seat_map.to_base64()
+    elif seat_format == "rle":
+        out["encoding"] = "rle"
+        out["seat_map"] = seat_map.to_rle()
+    else:
+        out["taken_seats"] = [{"seat_row": r, "seat_col": c} for (r, c) in seat_map.taken_seats()]
+    return out
+
+
+def seat_map_etag(seat_map: SeatMap) -> str:
+    return make_etag(PROCESS_EPOCH, seat_map.version)
+
+
+@router.get("/{screening_id}/availability", response_model=None)
+def screening_availability(
+    screening_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    seat_format: SeatFormat = Query(default="list", alias="format"),
+) -> dict[str, Any] | Response:
+    seat_map = get_seat_map(db, screening_id)
+    if seat_map is None:
+        raise HTTPException(status_code=404, detail="Screening not found")
+    unchanged = conditional(request, response, seat_map_etag(seat_map))
+    if unchanged is not None:
+        return unchanged
+    return availability_payload(screening_id, seat_map, seat_format)
+
+
+def _sse(event: SeatEvent) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+
+def snapshot_event(screening_id: int, seat_map: SeatMap) -> SeatEvent:
+    return {"type": "snapshot", **availability_payload(screening_id, seat_map, "list")}
+
+
+def seat_poller(bind: Engine | Connection, screening_id: int) -> SeatPoller:
+    """Reads the screening's taken seats in a session of its own, off the loop."""
+
+    def taken_now() -> set[Seat]:
+        with Session(bind) as db:
+            return load_taken_seats(db, screening_id)
+
+    async def poll() -> set[Seat]:
+        return await run_in_threadpool(taken_now)
+
+    return poll
+
+
+async def event_stream(request: Request, sub: Subscription, snapshot: SeatEvent) -> AsyncIterator[str]:
+    try:
+        yield _sse(snapshot)
+        while True:
+            try:
+                event = await asyncio.wait_for(sub.queue.get(), timeout=settings.availability_stream_keepalive_seconds)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keepalive\n\n"
+                continue
+            yield _sse(event)
+    finally:
+        seat_events.unsubscribe(sub)
+
+
+@router.get("/{screening_id}/availability/stream")
+async def stream_availability(
+    screening_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+) -> StreamingResponse:
+    """Server-Sent Events: one ``snapshot`` followed by seat deltas.
+
+    Deltas are ``seat_taken`` / ``seat_released`` with the affected seats, or
+    ``reset`` when the client should fetch a fresh snapshot.
+    """
+    # Subscribe before reading the snapshot so no change can fall in between;
+    # replaying a delta already reflected in the snapshot is harmless.
+    sub = seat_events.subscribe(screening_id, seat_poller(db.get_bind(), screening_id))
+    seat_map = await run_in_threadpool(get_seat_map, db, screening_id)
+    if seat_map is None:
+        seat_events.unsubscribe(sub)
+        raise HTTPException(status_code=404, detail="Screening not found")
+    sub.known = set(seat_map.taken_seats())
+
+    return StreamingResponse(
+        event_stream(request, sub, snapshot_event(screening_id, seat_map)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
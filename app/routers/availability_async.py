@@ -0,0 +1,68 @@
+"""AsyncSession-backed availability endpoints, mounted when ``db_mode="async"``.
+
+Same paths and payloads as :mod:`app.routers.availability`.
+"""
+
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.deps import get_async_db
+from app.core.etag import conditional
+from app.routers.availability import (
+    SeatFormat, availability_payload, event_stream, seat_map_etag, snapshot_event
+)
+from app.services.seat_events import SeatPoller, seat_events
+from app.services.seat_map import Seat, get_seat_map_async, load_taken_seats_async
+
+router = APIRouter(prefix="/screenings", tags=["availability"])
+
+
+@router.get("/{screening_id}/availability", response_model=None)
+async def screening_availability(
+    screening_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    seat_format: SeatFormat = Query(default="list", alias="format"),
+) -> dict[str, Any] | Response:
+    seat_map = await get_seat_map_async(db, screening_id)
+    if seat_map is None:
+        raise HTTPException(status_code=404, detail="Screening not found")
+    unchanged = conditional(request, response, seat_map_etag(seat_map))
+    if unchanged is not None:
+        return unchanged
+    return availability_payload(screening_id, seat_map, seat_format)
+
+
+def seat_poller(db: AsyncSession, screening_id: int) -> SeatPoller:
+    """Reads the screening's taken seats in a session of its own."""
+    bind = db.bind
+
+    async def poll() -> set[Seat]:
+        async with AsyncSession(bind) as poll_db:
+            return await load_taken_seats_async(poll_db, screening_id)
+
+    return poll
+
+
+@router.get("/{screening_id}/availability/stream")
+async def stream_availability(
+    screening_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+) -> StreamingResponse:
+    sub = seat_events.subscribe(screening_id, seat_poller(db, screening_id))
+    seat_map = await get_seat_map_async(db, screening_id)
+    if seat_map is None:
+        seat_events.unsubscribe(sub)
+        raise HTTPException(status_code=404, detail="Screening not found")
+    sub.known = set(seat_map.taken_seats())
+
+    return StreamingResponse(
+        event_stream(request, sub, snapshot_event(screening_id, seat_map)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
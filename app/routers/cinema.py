@@ -1,34 +1,103 @@
-from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+import time
+from datetime import date, datetime
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session, contains_eager, selectinload
 from sqlalchemy import and_
 
+from app.core.config import settings
 from app.core.deps import get_db, require_role
-from app.models.user import User, UserRole
-from app.models.cinema import Movie, Hall, Screening
+from app.core.etag import bump_version, conditional, current_version, current_versions, make_etag
+from app.core.pagination import page_limit, paginate
+from app.core.principals import Principal
+from app.core.response_cache import cache_key, response_cache, store
+from app.models.user import UserRole
+from app.models.cinema import Movie, MovieRating, Hall, Screening
 from app.models.reservation import Reservation
+from app.models.review import Review
+from app.models.favorite import FavoriteMovie
 from app.schemas.cinema import (
     MovieCreateIn, MovieOut, MovieUpdateIn,
     HallCreateIn, HallOut, HallUpdateIn,
-    ScreeningCreateIn, ScreeningOut, ScreeningUpdateIn
+    ScreeningCreateIn, ScreeningOut, ScreeningUpdateIn,
+    ScheduleImportIn, ScheduleImportOut, ShowtimeOut,
 )
+from app.services.movie_search import search_movies
+from app.services.ratings import drop_summary, movie_out
+from app.services.scheduling import (
+    check_schedule,
+    ensure_hall_free,
+    ensure_retimed_fit,
+    screening_end,
+)
+from app.services.seat_map import seat_maps
+from app.services.showtimes import list_showtimes
 
 router = APIRouter(prefix="/cinema", tags=["cinema"])
 
 
+def screening_out(s: Screening) -> ScreeningOut:
+    return ScreeningOut(
+        id=s.id,
+        movie_id=s.movie_id,
+        hall_id=s.hall_id,
+        starts_at=s.starts_at,
+        ends_at=s.ends_at,
+        provider_id=s.provider_id,
+    )
+
+
 @router.get("/movies", response_model=list[MovieOut])
-def list_movies(
+def list_movies(  # pylint: disable=too-many-arguments,too-many-locals
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     query: str | None = Query(default=None, max_length=200),
     category: str | None = Query(default=None, max_length=100),
-) -> list[MovieOut]:
-    q = db.query(Movie)
+    sort: Literal["newest", "rating"] = "newest",
+    min_rating: float | None = Query(default=None, ge=1, le=5),
+    cursor: str | None = None,
+    limit: int | None = Query(default=None, ge=1),
+) -> Response:
+    """One page of movies, newest or best rated first.
+
+    ``query`` returns the best full-text matches instead. ``sort=rating``
+    lists rated movies only, highest average first.
+    """
+    etag = make_etag("movies", *current_versions(db, "movies", "ratings"))
+    unchanged = conditional(request, response, etag)
+    if unchanged is not None:
+        return unchanged
+    key = cache_key(request, etag)
+    if (hit := response_cache.get(key)) is not None:
+        return hit.render()
+
     if query:
-        q = q.filter(Movie.title.ilike(f"%{query}%"))
-    if category:
-        q = q.filter(Movie.category == category)
-    rows = q.order_by(Movie.id.desc()).all()
-    return [MovieOut(id=m.id, title=m.title, description=m.description, category=m.category) for m in rows]
+        rows = search_movies(
+            db, query, category, page_limit(limit, settings.search_limit_default), min_rating
+        )
+    elif sort == "rating":
+        rated = (
+            db.query(MovieRating)
+            .join(MovieRating.movie)
+            .options(contains_eager(MovieRating.movie))
+            .filter(MovieRating.review_count > 0)
+        )
+        if category:
+            rated = rated.filter(Movie.category == category)
+        if min_rating is not None:
+            rated = rated.filter(MovieRating.average >= min_rating)
+        keys = [MovieRating.average, MovieRating.movie_id]
+        rows = [r.movie for r in paginate(rated, keys, cursor, limit, response, descending=True)]
+    else:
+        q = db.query(Movie).options(selectinload(Movie.rating))
+        if category:
+            q = q.filter(Movie.category == category)
+        if min_rating is not None:
+            q = q.join(Movie.rating).filter(MovieRating.average >= min_rating)
+        rows = paginate(q, [Movie.id], cursor, limit, response, descending=True)
+    out = [movie_out(m) for m in rows]
+    return store(key, ["movies", "ratings"], out, response)
 
 
 @router.get("/movies/{movie_id}", response_model=MovieOut)
@@ -36,20 +105,26 @@ def get_movie(movie_id: int, db: Session = Depends(get_db)) -> MovieOut:
     m = db.get(Movie, movie_id)
     if not m:
         raise HTTPException(status_code=404, detail="Movie not found")
-    return MovieOut(id=m.id, title=m.title, description=m.description, category=m.category)
+    return movie_out(m)
 
 
 @router.post("/movies", response_model=MovieOut)
 def create_movie(
     payload: MovieCreateIn,
     db: Session = Depends(get_db),
-    _: User = Depends(require_role(UserRole.PROVIDER, UserRole.ADMIN)),
+    _: Principal = Depends(require_role(UserRole.PROVIDER, UserRole.ADMIN)),
 ) -> MovieOut:
-    m = Movie(title=payload.title, description=payload.description, category=payload.category)
+    m = Movie(
+        title=payload.title,
+        description=payload.description,
+        category=payload.category,
+        runtime_minutes=payload.runtime_minutes,
+    )
     db.add(m)
+    bump_version(db, "movies")
     db.commit()
     db.refresh(m)
-    return MovieOut(id=m.id, title=m.title, description=m.description, category=m.category)
+    return movie_out(m)
 
 
 @router.put("/movies/{movie_id}", response_model=MovieOut)
@@ -57,7 +132,7 @@ def update_movie(
     movie_id: int,
     payload: MovieUpdateIn,
     db: Session = Depends(get_db),
-    _: User = Depends(require_role(UserRole.PROVIDER, UserRole.ADMIN)),
+    _: Principal = Depends(require_role(UserRole.PROVIDER, UserRole.ADMIN)),
 ) -> MovieOut:
     m = db.get(Movie, movie_id)
     if not m:
@@ -69,17 +144,26 @@ def update_movie(
         m.description = payload.description
     if payload.category is not None:
         m.category = payload.category
-
+    if payload.runtime_minutes is not None and payload.runtime_minutes != m.runtime_minutes:
+        m.runtime_minutes = payload.runtime_minutes
+        # screenings keep their start; their new ends must all still fit their halls
+        screenings = db.query(Screening).filter(Screening.movie_id == movie_id).all()
+        for s in screenings:
+            s.ends_at = screening_end(s.starts_at, m.runtime_minutes)
+        ensure_retimed_fit(db, screenings)
+        bump_version(db, "screenings")
+
+    bump_version(db, "movies")
     db.commit()
     db.refresh(m)
-    return MovieOut(id=m.id, title=m.title, description=m.description, category=m.category)
+    return movie_out(m)
 
 
 @router.delete("/movies/{movie_id}")
 def delete_movie(
     movie_id: int,
     db: Session = Depends(get_db),
-    _: User = Depends(require_role(UserRole.ADMIN)),
+    _: Principal = Depends(require_role(UserRole.ADMIN)),
 ) -> dict[str, bool]:
     m = db.get(Movie, movie_id)
     if not m:
@@ -89,15 +173,35 @@ def delete_movie(
     if has_screenings:
         raise HTTPException(status_code=400, detail="Cannot delete movie with screenings")
 
+    db.query(Review).filter(Review.movie_id == movie_id).delete()
+    drop_summary(db, movie_id)
+    db.query(FavoriteMovie).filter(FavoriteMovie.movie_id == movie_id).delete()
+
     db.delete(m)
+    bump_version(db, "movies")
     db.commit()
     return {"ok": True}
 
 
 @router.get("/halls", response_model=list[HallOut])
-def list_halls(db: Session = Depends(get_db)) -> list[HallOut]:
-    rows = db.query(Hall).order_by(Hall.id.asc()).all()
-    return [HallOut(id=h.id, name=h.name, rows=h.rows, cols=h.cols) for h in rows]
+def list_halls(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    cursor: str | None = None,
+    limit: int | None = Query(default=None, ge=1),
+) -> Response:
+    etag = make_etag("halls", current_version(db, "halls"))
+    unchanged = conditional(request, response, etag)
+    if unchanged is not None:
+        return unchanged
+    key = cache_key(request, etag)
+    if (hit := response_cache.get(key)) is not None:
+        return hit.render()
+
+    rows = paginate(db.query(Hall), [Hall.id], cursor, limit, response)
+    out = [HallOut(id=h.id, name=h.name, rows=h.rows, cols=h.cols) for h in rows]
+    return store(key, ["halls"], out, response)
 
 
 @router.get("/halls/{hall_id}", response_model=HallOut)
@@ -112,7 +216,7 @@ def get_hall(hall_id: int, db: Session = Depends(get_db)) -> HallOut:
 def create_hall(
     payload: HallCreateIn,
     db: Session = Depends(get_db),
-    _: User = Depends(require_role(UserRole.PROVIDER, UserRole.ADMIN)),
+    _: Principal = Depends(require_role(UserRole.PROVIDER, UserRole.ADMIN)),
 ) -> HallOut:
     exists = db.query(Hall).filter(Hall.name == payload.name).first()
     if exists:
@@ -120,6 +224,7 @@ def create_hall(
 
     h = Hall(name=payload.name, rows=payload.rows, cols=payload.cols)
     db.add(h)
+    bump_version(db, "halls")
     db.commit()
     db.refresh(h)
     return HallOut(id=h.id, name=h.name, rows=h.rows, cols=h.cols)
@@ -130,7 +235,7 @@ def update_hall(
     hall_id: int,
     payload: HallUpdateIn,
     db: Session = Depends(get_db),
-    _: User = Depends(require_role(UserRole.PROVIDER, UserRole.ADMIN)),
+    _: Principal = Depends(require_role(UserRole.PROVIDER, UserRole.ADMIN)),
 ) -> HallOut:
     h = db.get(Hall, hall_id)
     if not h:
@@ -152,6 +257,7 @@ def update_hall(
     if payload.cols is not None:
         h.cols = payload.cols
 
+    bump_version(db, "halls")
     db.commit()
     db.refresh(h)
     return HallOut(id=h.id, name=h.name, rows=h.rows, cols=h.cols)
@@ -161,7 +267,7 @@ def update_hall(
 def delete_hall(
     hall_id: int,
     db: Session = Depends(get_db),
-    _: User = Depends(require_role(UserRole.ADMIN)),
+    _: Principal = Depends(require_role(UserRole.ADMIN)),
 ) -> dict[str, bool]:
     h = db.get(Hall, hall_id)
     if not h:
@@ -172,18 +278,31 @@ def delete_hall(
         raise HTTPException(status_code=400, detail="Cannot delete hall with screenings")
 
     db.delete(h)
+    bump_version(db, "halls")
     db.commit()
     return {"ok": True}
 
 
 @router.get("/screenings", response_model=list[ScreeningOut])
-def list_screenings(
+def list_screenings(  # pylint: disable=too-many-arguments,too-many-locals
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     date_from: datetime | None = None,
     date_to: datetime | None = None,
     movie_id: int | None = None,
     hall_id: int | None = None,
-) -> list[ScreeningOut]:
+    cursor: str | None = None,
+    limit: int | None = Query(default=None, ge=1),
+) -> Response:
+    etag = make_etag("screenings", current_version(db, "screenings"))
+    unchanged = conditional(request, response, etag)
+    if unchanged is not None:
+        return unchanged
+    key = cache_key(request, etag)
+    if (hit := response_cache.get(key)) is not None:
+        return hit.render()
+
     q = db.query(Screening)
     filters = []
     if date_from is not None:
@@ -197,11 +316,44 @@ def list_screenings(
     if filters:
         q = q.filter(and_(*filters))
 
-    rows = q.order_by(Screening.starts_at.asc()).all()
-    return [
-        ScreeningOut(id=s.id, movie_id=s.movie_id, hall_id=s.hall_id, starts_at=s.starts_at, provider_id=s.provider_id)
-        for s in rows
-    ]
+    rows = paginate(q, [Screening.starts_at, Screening.id], cursor, limit, response)
+    out = [screening_out(s) for s in rows]
+    return store(key, ["screenings"], out, response)
+
+
+@router.get("/showtimes", response_model=list[ShowtimeOut])
+def list_showtimes_for_dates(
+    request: Request,
+    response: Response,
+    date_from: date,
+    date_to: date | None = None,
+    db: Session = Depends(get_db),
+) -> Response:
+    """What's on from ``date_from`` through ``date_to`` (inclusive) with seats left.
+
+    Cached per date range and catalog version. Seats-left figures are
+    refreshed every ``showtimes_max_age_seconds``.
+    """
+    last = date_to or date_from
+    max_days = settings.showtimes_max_days
+    if last < date_from or (last - date_from).days >= max_days:
+        raise HTTPException(status_code=400, detail=f"Date range must span 1 to {max_days} days")
+
+    max_age = max(settings.showtimes_max_age_seconds, 1)
+    now = int(time.time())
+    versions = current_versions(db, "movies", "halls", "screenings")
+    etag = make_etag("showtimes", *versions, now // max_age)
+    result = conditional(request, response, etag)
+    if result is None:
+        key = cache_key(request, etag)
+        hit = response_cache.get(key)
+        if hit is not None:
+            result = hit.render()
+        else:
+            rows = list_showtimes(db, date_from, last)
+            result = store(key, ["movies", "halls", "screenings"], rows, response)
+    result.headers["Cache-Control"] = f"public, max-age={max_age - now % max_age}"
+    return result
 
 
 @router.get("/screenings/{screening_id}", response_model=ScreeningOut)
@@ -209,35 +361,65 @@ def get_screening(screening_id: int, db: Session = Depends(get_db)) -> Screening
     s = db.get(Screening, screening_id)
     if not s:
         raise HTTPException(status_code=404, detail="Screening not found")
-    return ScreeningOut(id=s.id, movie_id=s.movie_id, hall_id=s.hall_id, starts_at=s.starts_at, provider_id=s.provider_id)
+    return screening_out(s)
 
 
 @router.post("/screenings", response_model=ScreeningOut)
 def create_screening(
     payload: ScreeningCreateIn,
     db: Session = Depends(get_db),
-    user: User = Depends(require_role(UserRole.PROVIDER, UserRole.ADMIN)),
+    user: Principal = Depends(require_role(UserRole.PROVIDER, UserRole.ADMIN)),
 ) -> ScreeningOut:
-    if not db.get(Movie, payload.movie_id):
+    movie = db.get(Movie, payload.movie_id)
+    if not movie:
         raise HTTPException(status_code=404, detail="Movie not found")
     if not db.get(Hall, payload.hall_id):
         raise HTTPException(status_code=404, detail="Hall not found")
 
-    from datetime import timedelta
-    overlap_buffer = timedelta(minutes=15)
-    overlapping = db.query(Screening).filter(
-        Screening.hall_id == payload.hall_id,
-        Screening.starts_at >= payload.starts_at - overlap_buffer,
-        Screening.starts_at < payload.starts_at + overlap_buffer
-    ).first()
-    if overlapping:
-        raise HTTPException(status_code=400, detail="Screening overlaps with existing one in this hall")
-
-    s = Screening(movie_id=payload.movie_id, hall_id=payload.hall_id, starts_at=payload.starts_at, provider_id=user.id)
+    ends_at = screening_end(payload.starts_at, movie.runtime_minutes)
+    ensure_hall_free(db, payload.hall_id, payload.starts_at, ends_at)
+
+    s = Screening(
+        movie_id=payload.movie_id,
+        hall_id=payload.hall_id,
+        starts_at=payload.starts_at,
+        ends_at=ends_at,
+        provider_id=user.id,
+    )
     db.add(s)
+    bump_version(db, "screenings")
     db.commit()
     db.refresh(s)
-    return ScreeningOut(id=s.id, movie_id=s.movie_id, hall_id=s.hall_id, starts_at=s.starts_at, provider_id=s.provider_id)
+    return screening_out(s)
+
+
+@router.post("/screenings/bulk", response_model=ScheduleImportOut)
+def import_schedule(
+    payload: ScheduleImportIn,
+    db: Session = Depends(get_db),
+    user: Principal = Depends(require_role(UserRole.PROVIDER, UserRole.ADMIN)),
+) -> ScheduleImportOut:
+    """Create a program of screenings in one transaction; clashing rows are reported, not created."""
+    accepted, conflicts = check_schedule(db, payload.screenings)
+    created = [
+        Screening(
+            movie_id=row.movie_id,
+            hall_id=row.hall_id,
+            starts_at=row.starts_at,
+            ends_at=accepted[i],
+            provider_id=user.id,
+        )
+        for i, row in enumerate(payload.screenings)
+        if i in accepted
+    ]
+    if created:
+        db.add_all(created)
+        bump_version(db, "screenings")
+        # one multi-row INSERT; render before commit expires the new rows
+        db.flush()
+    out = ScheduleImportOut(created=[screening_out(s) for s in created], conflicts=conflicts)
+    db.commit()
+    return out
 
 
 @router.put("/screenings/{screening_id}", response_model=ScreeningOut)
@@ -245,7 +427,7 @@ def update_screening(
     screening_id: int,
     payload: ScreeningUpdateIn,
     db: Session = Depends(get_db),
-    user: User = Depends(require_role(UserRole.PROVIDER, UserRole.ADMIN)),
+    user: Principal = Depends(require_role(UserRole.PROVIDER, UserRole.ADMIN)),
 ) -> ScreeningOut:
     s = db.get(Screening, screening_id)
     if not s:
@@ -258,8 +440,10 @@ def update_screening(
     if has_reservations and (payload.hall_id is not None or payload.movie_id is not None):
         raise HTTPException(status_code=400, detail="Cannot change hall/movie when reservations exist")
 
+    movie = s.movie
     if payload.movie_id is not None:
-        if not db.get(Movie, payload.movie_id):
+        movie = db.get(Movie, payload.movie_id)
+        if not movie:
             raise HTTPException(status_code=404, detail="Movie not found")
         s.movie_id = payload.movie_id
 
@@ -271,16 +455,22 @@ def update_screening(
     if payload.starts_at is not None:
         s.starts_at = payload.starts_at
 
+    s.ends_at = screening_end(s.starts_at, movie.runtime_minutes)
+    ensure_hall_free(db, s.hall_id, s.starts_at, s.ends_at, exclude_id=s.id)
+
+    bump_version(db, "screenings")
     db.commit()
+    if payload.hall_id is not None:
+        seat_maps.invalidate(screening_id)
     db.refresh(s)
-    return ScreeningOut(id=s.id, movie_id=s.movie_id, hall_id=s.hall_id, starts_at=s.starts_at, provider_id=s.provider_id)
+    return screening_out(s)
 
 
 @router.delete("/screenings/{screening_id}")
 def delete_screening(
     screening_id: int,
     db: Session = Depends(get_db),
-    user: User = Depends(require_role(UserRole.PROVIDER, UserRole.ADMIN)),
+    user: Principal = Depends(require_role(UserRole.PROVIDER, UserRole.ADMIN)),
 ) -> dict[str, bool]:
     s = db.get(Screening, screening_id)
     if not s:
@@ -294,5 +484,7 @@ def delete_screening(
         raise HTTPException(status_code=400, detail="Cannot delete screening with reservations")
 
     db.delete(s)
+    bump_version(db, "screenings")
     db.commit()
+    seat_maps.invalidate(screening_id)
     return {"ok": True}
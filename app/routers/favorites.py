@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
 from app.core.deps import get_db, get_current_user
+from app.core.pagination import paginate
+from app.core.principals import Principal
 from app.models.favorite import FavoriteMovie
 from app.models.cinema import Movie
-from app.models.user import User
 from app.schemas.favorite import FavoriteOut
 
 router = APIRouter(prefix="/favorites", tags=["favorites"])
@@ -13,17 +14,20 @@ router = APIRouter(prefix="/favorites", tags=["favorites"])
 
 @router.get("/movies", response_model=list[FavoriteOut])
 def list_favorites(
+    response: Response,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
-    skip: int = 0,
-    limit: int = 100,
+    user: Principal = Depends(get_current_user),
+    cursor: str | None = None,
+    limit: int | None = Query(default=None, ge=1),
+    skip: int = Query(default=0, ge=0, deprecated=True),
 ) -> list[FavoriteOut]:
-    rows = db.query(FavoriteMovie).filter(FavoriteMovie.user_id == user.id).order_by(FavoriteMovie.id.desc()).offset(skip).limit(min(limit, 100)).all()
+    mine = db.query(FavoriteMovie).filter(FavoriteMovie.user_id == user.id)
+    rows = paginate(mine, [FavoriteMovie.id], cursor, limit, response, descending=True, skip=skip)
     return [FavoriteOut(id=f.id, user_id=f.user_id, movie_id=f.movie_id) for f in rows]
 
 
 @router.post("/movies/{movie_id}", response_model=FavoriteOut)
-def add_favorite(movie_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> FavoriteOut:
+def add_favorite(movie_id: int, db: Session = Depends(get_db), user: Principal = Depends(get_current_user)) -> FavoriteOut:
     if not db.get(Movie, movie_id):
         raise HTTPException(status_code=404, detail="Movie not found")
 
@@ -39,7 +43,7 @@ def add_favorite(movie_id: int, db: Session = Depends(get_db), user: User = Depe
 
 
 @router.delete("/movies/{movie_id}")
-def remove_favorite(movie_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> dict[str, bool]:
+def remove_favorite(movie_id: int, db: Session = Depends(get_db), user: Principal = Depends(get_current_user)) -> dict[str, bool]:
     fav = db.query(FavoriteMovie).filter(FavoriteMovie.user_id == user.id, FavoriteMovie.movie_id == movie_id).first()
     if not fav:
         raise HTTPException(status_code=404, detail="Not in favorites")
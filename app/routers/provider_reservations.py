@@ -1,22 +1,66 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session, selectinload
 
 from app.core.deps import get_db, require_role
-from app.models.user import User, UserRole
+from app.core.pagination import paginate
+from app.core.principals import Principal
+from app.models.cinema import Screening
+from app.models.user import UserRole
 from app.models.reservation import Reservation, ReservationStatus
 from app.schemas.reservation import ReservationOut, ReservationTicketOut
+from app.services.reservation_service import hold_expired
+from app.services.scheduling import wall_clock
+from app.services.seat_map import seat_maps
 
 router = APIRouter(prefix="/provider/reservations", tags=["provider-reservations"])
 
 
+def _incoming(db: Session, reservation_id: int, user: Principal) -> Reservation:
+    """The reservation, if it is for one of the caller's screenings (any, for admins)."""
+    r = db.get(Reservation, reservation_id)
+    if not r or (user.role != UserRole.ADMIN and r.screening.provider_id != user.id):
+        raise HTTPException(status_code=404, detail="Reservation not found")
+    return r
+
+
 @router.get("", response_model=list[ReservationOut])
-def list_incoming_reservations(
+def list_incoming_reservations(  # pylint: disable=too-many-arguments
+    response: Response,
     db: Session = Depends(get_db),
-    user: User = Depends(require_role(UserRole.PROVIDER, UserRole.ADMIN)),
-    skip: int = 0,
-    limit: int = 100,
+    user: Principal = Depends(require_role(UserRole.PROVIDER, UserRole.ADMIN)),
+    status: ReservationStatus | None = None,
+    screening_id: int | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    cursor: str | None = None,
+    limit: int | None = Query(default=None, ge=1),
+    skip: int = Query(default=0, ge=0, deprecated=True),
 ) -> list[ReservationOut]:
-    rows = db.query(Reservation).order_by(Reservation.id.desc()).offset(skip).limit(min(limit, 100)).all()
+    """Reservations for the caller's screenings, newest first; admins see all.
+
+    ``date_from``/``date_to`` bound the screening start time, read as wall
+    clock like the stored times (any offset is dropped, as on ``/cinema/screenings``).
+    """
+    q = (
+        db.query(Reservation)
+        .join(Screening, Screening.id == Reservation.screening_id)
+        .options(selectinload(Reservation.tickets))
+    )
+    filters = []
+    if user.role != UserRole.ADMIN:
+        filters.append(Screening.provider_id == user.id)
+    if status is not None:
+        filters.append(Reservation.status == status)
+    if screening_id is not None:
+        filters.append(Reservation.screening_id == screening_id)
+    if date_from is not None:
+        filters.append(Screening.starts_at >= wall_clock(date_from))
+    if date_to is not None:
+        filters.append(Screening.starts_at <= wall_clock(date_to))
+    q = q.filter(*filters)
+    rows = paginate(q, [Reservation.id], cursor, limit, response, descending=True, skip=skip)
     return [
         ReservationOut(
             id=r.id,
@@ -26,6 +70,7 @@ def list_incoming_reservations(
             created_at=r.created_at,
             notes=r.notes,
             tickets=[ReservationTicketOut(seat_row=t.seat_row, seat_col=t.seat_col) for t in r.tickets],
+            expires_at=r.expires_at,
         )
         for r in rows
     ]
@@ -35,16 +80,18 @@ def list_incoming_reservations(
 def approve_reservation(
     reservation_id: int,
     db: Session = Depends(get_db),
-    _: User = Depends(require_role(UserRole.PROVIDER, UserRole.ADMIN)),
+    user: Principal = Depends(require_role(UserRole.PROVIDER, UserRole.ADMIN)),
 ) -> ReservationOut:
-    r = db.get(Reservation, reservation_id)
-    if not r:
-        raise HTTPException(status_code=404, detail="Reservation not found")
+    r = _incoming(db, reservation_id, user)
 
     if r.status != ReservationStatus.PENDING:
         raise HTTPException(status_code=400, detail="Can approve only pending reservations")
 
+    if hold_expired(r):
+        raise HTTPException(status_code=400, detail="Reservation hold expired")
+
     r.status = ReservationStatus.CONFIRMED
+    r.expires_at = None
     db.commit()
     db.refresh(r)
 
@@ -56,6 +103,7 @@ def approve_reservation(
         created_at=r.created_at,
         notes=r.notes,
         tickets=[ReservationTicketOut(seat_row=t.seat_row, seat_col=t.seat_col) for t in r.tickets],
+        expires_at=r.expires_at,
     )
 
 
@@ -63,17 +111,18 @@ def approve_reservation(
 def decline_reservation(
     reservation_id: int,
     db: Session = Depends(get_db),
-    _: User = Depends(require_role(UserRole.PROVIDER, UserRole.ADMIN)),
+    user: Principal = Depends(require_role(UserRole.PROVIDER, UserRole.ADMIN)),
 ) -> ReservationOut:
-    r = db.get(Reservation, reservation_id)
-    if not r:
-        raise HTTPException(status_code=404, detail="Reservation not found")
+    r = _incoming(db, reservation_id, user)
 
     if r.status in (ReservationStatus.CANCELED, ReservationStatus.COMPLETED):
         raise HTTPException(status_code=400, detail="Cannot decline in this status")
 
+    released = [(t.seat_row, t.seat_col) for t in r.tickets]
+    r.tickets.clear()
     r.status = ReservationStatus.CANCELED
     db.commit()
+    seat_maps.release(r.screening_id, released)
     db.refresh(r)
 
     return ReservationOut(
@@ -84,4 +133,5 @@ def decline_reservation(
         created_at=r.created_at,
         notes=r.notes,
         tickets=[ReservationTicketOut(seat_row=t.seat_row, seat_col=t.seat_col) for t in r.tickets],
+        expires_at=r.expires_at,
     )
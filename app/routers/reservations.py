@@ -4,18 +4,21 @@ Endpoints for users to create, view, confirm, cancel and reschedule
 reservations. Enforces role-based access and status transitions.
 """
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session, selectinload
 from datetime import datetime, timezone
 
 from app.core.deps import get_db, get_current_user, require_role
-from app.models.user import User, UserRole
+from app.core.pagination import paginate
+from app.core.principals import Principal
+from app.models.user import UserRole
 from app.models.reservation import Reservation, ReservationStatus
 from app.schemas.reservation import ReservationCreateIn, ReservationOut, ReservationTicketOut
-from app.services.reservation_service import create_reservation
+from app.services.reservation_service import create_reservation, hold_expired
 from app.schemas.reservation import ConfirmPaymentIn
 from app.models.cinema import Screening
 from app.schemas.reservation import ReservationRescheduleIn
+from app.services.seat_map import seat_maps
 
 router = APIRouter(prefix="/reservations", tags=["reservations"])
 
@@ -29,6 +32,7 @@ def to_out(r: Reservation) -> ReservationOut:
         created_at=r.created_at,
         notes=r.notes,
         tickets=[ReservationTicketOut(seat_row=t.seat_row, seat_col=t.seat_col) for t in r.tickets],
+        expires_at=r.expires_at,
     )
 
 
@@ -36,7 +40,7 @@ def to_out(r: Reservation) -> ReservationOut:
 def create_my_reservation(
     payload: ReservationCreateIn,
     db: Session = Depends(get_db),
-    user: User = Depends(require_role(UserRole.USER, UserRole.PROVIDER, UserRole.ADMIN)),
+    user: Principal = Depends(require_role(UserRole.USER, UserRole.PROVIDER, UserRole.ADMIN)),
 ) -> ReservationOut:
     r = create_reservation(db, user, payload)
     return to_out(r)
@@ -44,10 +48,18 @@ def create_my_reservation(
 
 @router.get("/me", response_model=list[ReservationOut])
 def list_my_reservations(
+    response: Response,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
+    cursor: str | None = None,
+    limit: int | None = Query(default=None, ge=1),
 ) -> list[ReservationOut]:
-    rows = db.query(Reservation).filter(Reservation.user_id == user.id).order_by(Reservation.id.desc()).all()
+    mine = (
+        db.query(Reservation)
+        .options(selectinload(Reservation.tickets))
+        .filter(Reservation.user_id == user.id)
+    )
+    rows = paginate(mine, [Reservation.id], cursor, limit, response, descending=True)
     return [to_out(r) for r in rows]
 
 
@@ -55,7 +67,7 @@ def list_my_reservations(
 def get_reservation(
     reservation_id: int,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ) -> ReservationOut:
     r = db.get(Reservation, reservation_id)
     if not r:
@@ -71,7 +83,7 @@ def get_reservation(
 def cancel_reservation(
     reservation_id: int,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ) -> ReservationOut:
     r = db.get(Reservation, reservation_id)
     if not r:
@@ -83,10 +95,12 @@ def cancel_reservation(
     if r.status in (ReservationStatus.CANCELED, ReservationStatus.COMPLETED):
         raise HTTPException(status_code=400, detail="Cannot cancel in this status")
 
+    released = [(t.seat_row, t.seat_col) for t in r.tickets]
     r.tickets.clear()
     r.status = ReservationStatus.CANCELED
 
     db.commit()
+    seat_maps.release(r.screening_id, released)
     db.refresh(r)
 
     return to_out(r)
@@ -96,7 +110,7 @@ def confirm_reservation_payment(
     reservation_id: int,
     payload: ConfirmPaymentIn,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ) -> ReservationOut:
     r = db.get(Reservation, reservation_id)
     if not r:
@@ -108,6 +122,9 @@ def confirm_reservation_payment(
     if r.status != ReservationStatus.PENDING:
         raise HTTPException(status_code=400, detail="Reservation is not pending")
 
+    if hold_expired(r):
+        raise HTTPException(status_code=400, detail="Reservation hold expired")
+
     screening: Screening | None = db.get(Screening, r.screening_id)
     if not screening:
         raise HTTPException(status_code=404, detail="Screening not found")
@@ -120,6 +137,7 @@ def confirm_reservation_payment(
         raise HTTPException(status_code=400, detail="Screening already started")
 
     r.status = ReservationStatus.CONFIRMED
+    r.expires_at = None
     db.commit()
     db.refresh(r)
 
@@ -130,7 +148,7 @@ def reschedule_reservation(
     reservation_id: int,
     payload: ReservationRescheduleIn,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ) -> ReservationOut:
     r = db.get(Reservation, reservation_id)
     if not r:
@@ -142,9 +160,11 @@ def reschedule_reservation(
     if r.status == ReservationStatus.COMPLETED:
         raise HTTPException(status_code=400, detail="Cannot reschedule completed reservation")
 
-    r.tickets.clear() 
+    released = [(t.seat_row, t.seat_col) for t in r.tickets]
+    r.tickets.clear()
     r.status = ReservationStatus.CANCELED
     db.commit()
+    seat_maps.release(r.screening_id, released)
     db.refresh(r)
 
     new_data = ReservationCreateIn(
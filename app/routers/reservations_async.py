@@ -0,0 +1,145 @@
+"""AsyncSession-backed reservation endpoints, mounted when ``db_mode="async"``.
+
+Same paths, payloads and status rules as :mod:`app.routers.reservations`;
+handlers await the database instead of holding a threadpool thread.
+"""
+
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.deps import get_async_db, get_current_user_async, require_role_async
+from app.core.pagination import keyset, page, page_limit
+from app.core.principals import Principal
+from app.models.cinema import Screening
+from app.models.reservation import Reservation, ReservationStatus
+from app.models.user import UserRole
+from app.routers.reservations import to_out
+from app.schemas.reservation import ConfirmPaymentIn, ReservationCreateIn, ReservationOut, ReservationRescheduleIn
+from app.services.reservation_service import create_reservation_async, hold_expired, load_reservation_async
+from app.services.seat_map import seat_maps
+
+router = APIRouter(prefix="/reservations", tags=["reservations"])
+
+
+async def _owned_reservation(db: AsyncSession, reservation_id: int, user: Principal) -> Reservation:
+    r = await load_reservation_async(db, reservation_id)
+    if not r:
+        raise HTTPException(status_code=404, detail="Reservation not found")
+
+    if r.user_id != user.id and user.role not in (UserRole.PROVIDER, UserRole.ADMIN):
+        raise HTTPException(status_code=403, detail="Not allowed")
+    return r
+
+
+async def _release(db: AsyncSession, r: Reservation) -> None:
+    released = [(t.seat_row, t.seat_col) for t in r.tickets]
+    r.tickets.clear()
+    r.status = ReservationStatus.CANCELED
+    await db.commit()
+    seat_maps.release(r.screening_id, released)
+
+
+@router.post("", response_model=ReservationOut)
+async def create_my_reservation(
+    payload: ReservationCreateIn,
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(require_role_async(UserRole.USER, UserRole.PROVIDER, UserRole.ADMIN)),
+) -> ReservationOut:
+    r = await create_reservation_async(db, user, payload)
+    return to_out(r)
+
+
+@router.get("/me", response_model=list[ReservationOut])
+async def list_my_reservations(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user_async),
+    cursor: str | None = None,
+    limit: int | None = Query(default=None, ge=1),
+) -> list[ReservationOut]:
+    size = page_limit(limit)
+    stmt = select(Reservation).options(selectinload(Reservation.tickets)).where(Reservation.user_id == user.id)
+    rows = (await db.scalars(keyset(stmt, [Reservation.id], cursor, size, descending=True))).all()
+    return [to_out(r) for r in page(rows, [Reservation.id], size, response)]
+
+
+@router.get("/{reservation_id}", response_model=ReservationOut)
+async def get_reservation(
+    reservation_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user_async),
+) -> ReservationOut:
+    return to_out(await _owned_reservation(db, reservation_id, user))
+
+
+@router.post("/{reservation_id}/cancel", response_model=ReservationOut)
+async def cancel_reservation(
+    reservation_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user_async),
+) -> ReservationOut:
+    r = await _owned_reservation(db, reservation_id, user)
+
+    if r.status in (ReservationStatus.CANCELED, ReservationStatus.COMPLETED):
+        raise HTTPException(status_code=400, detail="Cannot cancel in this status")
+
+    await _release(db, r)
+    return to_out(r)
+
+
+@router.post("/{reservation_id}/confirm", response_model=ReservationOut)
+async def confirm_reservation_payment(
+    reservation_id: int,
+    payload: ConfirmPaymentIn,
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user_async),
+) -> ReservationOut:
+    r = await _owned_reservation(db, reservation_id, user)
+
+    if r.status != ReservationStatus.PENDING:
+        raise HTTPException(status_code=400, detail="Reservation is not pending")
+
+    if hold_expired(r):
+        raise HTTPException(status_code=400, detail="Reservation hold expired")
+
+    screening = await db.get(Screening, r.screening_id)
+    if not screening:
+        raise HTTPException(status_code=404, detail="Screening not found")
+
+    screening_time = screening.starts_at
+    if screening_time.tzinfo is None:
+        screening_time = screening_time.replace(tzinfo=timezone.utc)
+    if screening_time <= datetime.now(timezone.utc):
+        raise HTTPException(status_code=400, detail="Screening already started")
+
+    r.status = ReservationStatus.CONFIRMED
+    r.expires_at = None
+    await db.commit()
+    return to_out(r)
+
+
+@router.post("/{reservation_id}/reschedule", response_model=ReservationOut)
+async def reschedule_reservation(
+    reservation_id: int,
+    payload: ReservationRescheduleIn,
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user_async),
+) -> ReservationOut:
+    r = await _owned_reservation(db, reservation_id, user)
+
+    if r.status == ReservationStatus.COMPLETED:
+        raise HTTPException(status_code=400, detail="Cannot reschedule completed reservation")
+
+    await _release(db, r)
+
+    new_data = ReservationCreateIn(
+        screening_id=payload.new_screening_id,
+        seats=payload.seats,
+        notes=payload.notes,
+    )
+    new_r = await create_reservation_async(db, user, new_data)
+    return to_out(new_r)
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
 from app.core.deps import get_db, get_current_user
+from app.core.pagination import paginate
+from app.core.principals import Principal
 from app.models.review import Review
 from app.models.cinema import Movie
-from app.models.user import User
 from app.schemas.review import ReviewCreateIn, ReviewOut
+from app.services.ratings import record_rating
 
 router = APIRouter(prefix="/movies", tags=["reviews"])
 
@@ -13,14 +15,17 @@ router = APIRouter(prefix="/movies", tags=["reviews"])
 @router.get("/{movie_id}/reviews", response_model=list[ReviewOut])
 def list_reviews(
     movie_id: int,
+    response: Response,
     db: Session = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100,
+    cursor: str | None = None,
+    limit: int | None = Query(default=None, ge=1),
+    skip: int = Query(default=0, ge=0, deprecated=True),
 ) -> list[ReviewOut]:
     if not db.get(Movie, movie_id):
         raise HTTPException(status_code=404, detail="Movie not found")
 
-    rows = db.query(Review).filter(Review.movie_id == movie_id).order_by(Review.id.desc()).offset(skip).limit(min(limit, 100)).all()
+    q = db.query(Review).filter(Review.movie_id == movie_id)
+    rows = paginate(q, [Review.id], cursor, limit, response, descending=True, skip=skip)
     return [ReviewOut(id=r.id, user_id=r.user_id, movie_id=r.movie_id, rating=r.rating, comment=r.comment) for r in rows]
 
 
@@ -29,13 +34,14 @@ def create_review(
     movie_id: int,
     payload: ReviewCreateIn,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ) -> ReviewOut:
     if not db.get(Movie, movie_id):
         raise HTTPException(status_code=404, detail="Movie not found")
 
     r = Review(user_id=user.id, movie_id=movie_id, rating=payload.rating, comment=payload.comment)
     db.add(r)
+    record_rating(db, movie_id, payload.rating)
     db.commit()
     db.refresh(r)
     return ReviewOut(id=r.id, user_id=r.user_id, movie_id=r.movie_id, rating=r.rating, comment=r.comment)
@@ -1,14 +1,18 @@
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, EmailStr
 from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
 from app.core.deps import get_db, get_current_user
+from app.core.principals import Principal, principals, token_versions
 from app.core.security import hash_password
 from app.models.user import User
+from app.schemas.cinema import RecommendationOut
 from app.schemas.user import UserOut
+from app.services.ratings import movie_out
+from app.services.recommendations import recommend_movies
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -20,19 +24,38 @@ class UserMeUpdateIn(BaseModel):
 
 
 @router.get("/me", response_model=UserOut)
-def me(user: User = Depends(get_current_user)) -> UserOut:
+def me(user: Principal = Depends(get_current_user)) -> UserOut:
     return UserOut(id=user.id, email=user.email, username=user.username, role=user.role)
 
 
+@router.get("/me/recommendations", response_model=list[RecommendationOut])
+def my_recommendations(
+    limit: int = Query(default=10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    principal: Principal = Depends(get_current_user),
+) -> list[RecommendationOut]:
+    """Movies liked by people who like what you favorited or rated highly."""
+    return [
+        RecommendationOut(
+            movie=movie_out(movie), score=round(score, 4), has_upcoming_screenings=showing
+        )
+        for movie, score, showing in recommend_movies(db, principal.id, limit)
+    ]
+
+
 @router.patch("/me", response_model=UserOut)
 def update_me(
     payload: UserMeUpdateIn,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_user),
 ) -> UserOut:
     if payload.email is None and payload.username is None and payload.password is None:
         raise HTTPException(status_code=400, detail="No fields provided")
 
+    user = db.get(User, principal.id)
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+
     if payload.email is not None:
         exists = (
             db.query(User)
@@ -53,6 +76,11 @@ def update_me(
             raise HTTPException(status_code=400, detail="Username already in use")
         user.username = payload.username
 
+    # tokens carry the name and email as claims, so retire the old ones
+    renamed = payload.email is not None or payload.username is not None
+    if renamed:
+        user.token_version += 1
+
     if payload.password is not None:
         if len(payload.password) < 8:
             raise HTTPException(status_code=400, detail="Password must be at least 8 characters")
@@ -60,5 +88,8 @@ def update_me(
 
     db.commit()
     db.refresh(user)
+    principals.invalidate(user.id)
+    if renamed:
+        token_versions.put(user.id, user.token_version)
 
     return UserOut(id=user.id, email=user.email, username=user.username, role=user.role)
@@ -2,11 +2,23 @@ from datetime import datetime
 from pydantic import BaseModel, Field
 from typing import Optional
 
+# upper bound on a movie's runtime; the hall overlap check relies on it
+MAX_RUNTIME_MINUTES = 600
+# rows accepted by one bulk schedule import
+MAX_SCHEDULE_ROWS = 2000
+
 
 class MovieCreateIn(BaseModel):
     title: str = Field(min_length=1, max_length=200)
     description: str = ""
     category: str = "General"
+    runtime_minutes: int = Field(default=120, ge=1, le=MAX_RUNTIME_MINUTES)
+
+
+class RatingSummaryOut(BaseModel):
+    count: int
+    average: float
+    histogram: list[int]  # reviews with 1..5 stars
 
 
 class MovieOut(BaseModel):
@@ -14,6 +26,14 @@ class MovieOut(BaseModel):
     title: str
     description: str
     category: str
+    runtime_minutes: int
+    rating: Optional[RatingSummaryOut] = None
+
+
+class RecommendationOut(BaseModel):
+    movie: MovieOut
+    score: float
+    has_upcoming_screenings: bool
 
 
 class HallCreateIn(BaseModel):
@@ -40,12 +60,45 @@ class ScreeningOut(BaseModel):
     movie_id: int
     hall_id: int
     starts_at: datetime
+    ends_at: datetime
     provider_id: int
 
+
+class ShowtimeOut(BaseModel):
+    screening_id: int
+    starts_at: datetime
+    ends_at: datetime
+    movie_id: int
+    movie_title: str
+    movie_category: str
+    runtime_minutes: int
+    hall_id: int
+    hall_name: str
+    seats_total: int
+    seats_left: int
+
+
+class ScheduleImportIn(BaseModel):
+    screenings: list[ScreeningCreateIn] = Field(min_length=1, max_length=MAX_SCHEDULE_ROWS)
+
+
+class ScheduleConflict(BaseModel):
+    index: int
+    error: str
+    screening_id: Optional[int] = None  # existing screening in the way
+    row: Optional[int] = None  # earlier row of the same import in the way
+
+
+class ScheduleImportOut(BaseModel):
+    created: list[ScreeningOut]
+    conflicts: list[ScheduleConflict]
+
+
 class MovieUpdateIn(BaseModel):
     title: Optional[str] = Field(default=None, min_length=1, max_length=200)
     description: Optional[str] = None
     category: Optional[str] = None
+    runtime_minutes: Optional[int] = Field(default=None, ge=1, le=MAX_RUNTIME_MINUTES)
 
 
 class HallUpdateIn(BaseModel):
@@ -1,6 +1,6 @@
 from datetime import datetime
-from typing import List
-from pydantic import BaseModel, Field
+from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
 
 from app.models.reservation import ReservationStatus
 
@@ -12,9 +12,16 @@ class SeatIn(BaseModel):
 
 class ReservationCreateIn(BaseModel):
     screening_id: int
-    seats: List[SeatIn]
+    seats: List[SeatIn] = Field(default_factory=list)
+    quantity: Optional[int] = Field(default=None, ge=1, le=20)
     notes: str = ""
 
+    @model_validator(mode="after")
+    def seats_or_quantity(self) -> "ReservationCreateIn":
+        if bool(self.seats) == (self.quantity is not None):
+            raise ValueError("Provide either explicit seats or a quantity for best available seats")
+        return self
+
 
 class ReservationTicketOut(BaseModel):
     seat_row: int
@@ -29,11 +36,12 @@ class ReservationOut(BaseModel):
     created_at: datetime
     notes: str
     tickets: List[ReservationTicketOut]
+    expires_at: Optional[datetime] = None
 
 class ConfirmPaymentIn(BaseModel):
     method: str = "stripe_mock"
 
 class ReservationRescheduleIn(BaseModel):
     new_screening_id: int
-    seats: List[SeatIn]
+    seats: List[SeatIn] = Field(min_length=1)
     notes: str = ""
\ No newline at end of file
@@ -1,5 +1,8 @@
+from datetime import datetime
+from typing import Optional
+
 from pydantic import BaseModel, EmailStr
-from app.models.user import UserRole
+from app.models.user import ImportJobStatus, UserRole
 
 
 class UserOut(BaseModel):
@@ -11,3 +14,25 @@ class UserOut(BaseModel):
 
 class UserRoleUpdateIn(BaseModel):
     role: UserRole
+
+
+class UserImportError(BaseModel):
+    line: int
+    error: str
+
+
+class UserImportOut(BaseModel):
+    created: int
+    failed: int
+    errors: list[UserImportError]
+    elapsed_seconds: float
+    rows_per_second: float
+
+
+class UserImportJobOut(BaseModel):
+    id: str
+    status: ImportJobStatus
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    report: Optional[UserImportOut] = None
+    error: Optional[str] = None
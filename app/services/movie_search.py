@@ -0,0 +1,117 @@
+"""Ranked movie search backed by an SQLite FTS5 index.
+
+``movies_fts`` is an external-content FTS5 table over ``movies`` (title,
+description, category). Triggers keep it in sync with every insert, update
+and delete, whichever code path performs them. It is created, and on first
+creation filled from existing rows, whenever ``Base.metadata.create_all``
+runs against SQLite. Other backends, and SQLite builds without FTS5, fall
+back to ``LIKE`` matching on the same three columns.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import weakref
+from typing import Any
+
+from sqlalchemy import Connection, Engine, column, event, literal_column, or_, table, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Query, Session, selectinload
+
+from app.db.base import Base
+from app.models.cinema import Movie, MovieRating
+
+logger = logging.getLogger(__name__)
+
+# bm25 column weights: title, description, category
+RANK = "bm25(movies_fts, 10.0, 1.0, 4.0)"
+
+_FTS_DDL = [
+    "CREATE VIRTUAL TABLE movies_fts USING fts5("
+    "title, description, category, content='movies', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS movies_fts_ai AFTER INSERT ON movies BEGIN "
+    "INSERT INTO movies_fts(rowid, title, description, category) "
+    "VALUES (new.id, new.title, new.description, new.category); END",
+    "CREATE TRIGGER IF NOT EXISTS movies_fts_ad AFTER DELETE ON movies BEGIN "
+    "INSERT INTO movies_fts(movies_fts, rowid, title, description, category) "
+    "VALUES ('delete', old.id, old.title, old.description, old.category); END",
+    "CREATE TRIGGER IF NOT EXISTS movies_fts_au AFTER UPDATE ON movies BEGIN "
+    "INSERT INTO movies_fts(movies_fts, rowid, title, description, category) "
+    "VALUES ('delete', old.id, old.title, old.description, old.category); "
+    "INSERT INTO movies_fts(rowid, title, description, category) "
+    "VALUES (new.id, new.title, new.description, new.category); END",
+    "INSERT INTO movies_fts(movies_fts) VALUES ('rebuild')",
+]
+
+movies_fts = table("movies_fts", column("rowid"))
+
+_fts_ready: weakref.WeakKeyDictionary[Engine, bool] = weakref.WeakKeyDictionary()
+
+
+@event.listens_for(Base.metadata, "after_create")
+def install_fts(_: Any, connection: Connection, **__: Any) -> None:
+    """Create the FTS5 table and triggers (once) after ``create_all``."""
+    if connection.dialect.name != "sqlite":
+        return
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'movies_fts'")
+    ).first()
+    if exists:
+        return
+    try:
+        for statement in _FTS_DDL:
+            connection.execute(text(statement))
+    except OperationalError:
+        logger.warning("SQLite FTS5 unavailable; movie search falls back to LIKE", exc_info=True)
+
+
+def fts_available(db: Session) -> bool:
+    engine = db.get_bind().engine
+    ready = _fts_ready.get(engine)
+    if ready is None:
+        ready = engine.dialect.name == "sqlite" and db.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'movies_fts'")
+        ).first() is not None
+        _fts_ready[engine] = ready
+    return ready
+
+
+def match_expression(query: str) -> str | None:
+    """Turn free text into an FTS5 query: every word must match as a prefix."""
+    words = re.findall(r"\w+", query)
+    if not words:
+        return None
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def _filtered(q: Query[Movie], category: str | None, min_rating: float | None) -> Query[Movie]:
+    if category:
+        q = q.filter(Movie.category == category)
+    if min_rating is not None:
+        q = q.join(Movie.rating).filter(MovieRating.average >= min_rating)
+    return q.options(selectinload(Movie.rating))
+
+
+def search_movies(
+    db: Session, query: str, category: str | None, limit: int, min_rating: float | None = None
+) -> list[Movie]:
+    """Best matches first; without FTS5, newest ``LIKE`` matches first."""
+    if fts_available(db):
+        expression = match_expression(query)
+        if expression is None:
+            return []
+        stmt = (
+            db.query(Movie)
+            .join(movies_fts, movies_fts.c.rowid == Movie.id)
+            .filter(literal_column("movies_fts").op("MATCH")(expression))
+        )
+        stmt = _filtered(stmt, category, min_rating)
+        return stmt.order_by(literal_column(RANK)).limit(limit).all()
+
+    pattern = f"%{query}%"
+    columns = (Movie.title, Movie.description, Movie.category)
+    fallback = db.query(Movie).filter(or_(*(c.ilike(pattern) for c in columns)))
+    fallback = _filtered(fallback, category, min_rating)
+    return fallback.order_by(Movie.id.desc()).limit(limit).all()
@@ -0,0 +1,147 @@
+"""Per-movie rating summaries maintained alongside ``reviews``.
+
+Every path that adds or removes reviews adjusts the movie's
+``movie_ratings`` row in the same transaction: count, sum, average and the
+1-5 star histogram. Movie pages and "top rated" listings read that row and
+never aggregate ``reviews``. Each change bumps the ``ratings`` data version,
+which is part of the movie list's ETag and cache key.
+
+:func:`rebuild_ratings` recomputes every row from ``reviews``, e.g. to fill
+the table on a database created before it existed::
+
+    python -m app.services.ratings
+"""
+
+# sqlalchemy.func members are generated at runtime, which pylint cannot see
+# pylint: disable=not-callable,assignment-from-no-return
+
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import (
+    ColumnElement,
+    Executable,
+    Float,
+    case,
+    cast,
+    delete,
+    func,
+    insert,
+    select,
+    update,
+)
+from sqlalchemy.orm import Session
+
+from app.core.etag import bump_version
+from app.db.upsert import upsert
+from app.models.cinema import Movie, MovieRating
+from app.models.review import Review
+from app.schemas.cinema import MovieOut, RatingSummaryOut
+
+STARS = (1, 2, 3, 4, 5)
+
+
+def _stars(rating: int) -> str:
+    return f"stars_{rating}"
+
+
+def record_rating(db: Session, movie_id: int, rating: int, delta: int = 1) -> None:
+    """Add (``delta > 0``) or remove ``delta`` reviews with ``rating`` stars.
+
+    Additions are one upsert, so two first reviews of a movie arriving
+    together cannot both try to create its row.
+    """
+    star = _stars(rating)
+    new_count = MovieRating.review_count + delta
+    new_sum = MovieRating.rating_sum + rating * delta
+    changes: dict[str, Any] = {
+        "review_count": new_count,
+        "rating_sum": new_sum,
+        "average": func.coalesce(cast(new_sum, Float) / func.nullif(new_count, 0), 0.0),
+        star: getattr(MovieRating, star) + delta,
+    }
+    if delta > 0:
+        first = {
+            "movie_id": movie_id,
+            "review_count": delta,
+            "rating_sum": rating * delta,
+            "average": float(rating),
+            **{_stars(s): delta if s == rating else 0 for s in STARS},
+        }
+        stmt: Executable = (
+            upsert(db, MovieRating)
+            .values(first)
+            .on_conflict_do_update(index_elements=[MovieRating.movie_id], set_=changes)
+        )
+    else:
+        stmt = update(MovieRating).where(MovieRating.movie_id == movie_id).values(changes)
+    db.execute(stmt)
+    bump_version(db, "ratings")
+
+
+def forget_reviews(db: Session, *criteria: ColumnElement[bool]) -> None:
+    """Take the reviews matching ``criteria`` out of the summaries; call before deleting them."""
+    grouped = db.execute(
+        select(Review.movie_id, Review.rating, func.count())
+        .where(*criteria)
+        .group_by(Review.movie_id, Review.rating)
+    ).tuples()
+    for movie_id, rating, count in grouped.all():
+        record_rating(db, movie_id, rating, -count)
+
+
+def drop_summary(db: Session, movie_id: int) -> None:
+    db.execute(delete(MovieRating).where(MovieRating.movie_id == movie_id))
+    bump_version(db, "ratings")
+
+
+def rebuild_ratings(db: Session) -> int:
+    """Recompute every summary from ``reviews``; returns the number of rated movies."""
+    columns: dict[str, Any] = {
+        "movie_id": Review.movie_id,
+        "review_count": func.count(Review.id),
+        "rating_sum": func.sum(Review.rating),
+        "average": func.avg(Review.rating),
+    }
+    for s in STARS:
+        columns[_stars(s)] = func.sum(case((Review.rating == s, 1), else_=0))
+    summary = select(*(c.label(name) for name, c in columns.items())).group_by(Review.movie_id)
+    db.execute(delete(MovieRating))
+    rated = db.execute(insert(MovieRating).from_select(list(columns), summary)).rowcount
+    bump_version(db, "ratings")
+    db.commit()
+    return rated
+
+
+def summary_out(rating: MovieRating | None) -> RatingSummaryOut | None:
+    if rating is None or rating.review_count <= 0:
+        return None
+    return RatingSummaryOut(
+        count=rating.review_count,
+        average=round(rating.average, 2),
+        histogram=[getattr(rating, _stars(s)) for s in STARS],
+    )
+
+
+def movie_out(m: Movie) -> MovieOut:
+    return MovieOut(
+        id=m.id,
+        title=m.title,
+        description=m.description,
+        category=m.category,
+        runtime_minutes=m.runtime_minutes,
+        rating=summary_out(m.rating),
+    )
+
+
+def main() -> None:
+    # imported lazily so the module imports without a configured database
+    from app.db.session import SessionLocal  # pylint: disable=import-outside-toplevel
+
+    with SessionLocal() as db:
+        print(f"rebuilt ratings for {rebuild_ratings(db)} movies")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Item-item recommendations from favorites and positive reviews.
+
+A user *likes* a movie they favorited or reviewed with at least
+``recommendation_min_rating`` stars. :class:`SimilarityIndex` keeps, per
+worker, the sparse co-occurrence counts of likes (how many users like both
+movies) and each movie's top-K neighbours by cosine similarity::
+
+    sim(i, j) = both(i, j) / sqrt(likes(i) * likes(j))
+
+The index is built from ``favorite_movies`` and ``reviews`` at startup and
+then catches up incrementally: :meth:`SimilarityIndex.refresh` reads only
+rows past the last ids it has seen and re-ranks just the movies they touch.
+Removals (unfavorites, deleted users or movies) are picked up by the full
+rebuild that runs every ``recommendation_rebuild_seconds``.
+
+Scoring a user merges the neighbour lists of the movies they like in
+memory. One query loads the best candidates and whether each still has
+screenings ahead, which boosts its score; when there are fewer than asked
+for, top-rated movies still showing fill the remaining places.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable
+
+from sqlalchemy import Exists, exists, select
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.config import settings
+from app.models.cinema import Movie, MovieRating, Screening
+from app.models.favorite import FavoriteMovie
+from app.models.review import Review
+
+logger = logging.getLogger(__name__)
+
+Neighbours = list[tuple[int, float]]
+
+# Candidates loaded per requested recommendation, so that movies with
+# screenings ahead can overtake slightly better-scored ones without them
+CANDIDATES_PER_RESULT = 4
+
+
+@dataclass
+class _Likes:
+    """Sparse like data: who likes what, and the co-occurrence counts."""
+
+    by_user: dict[int, set[int]] = field(default_factory=lambda: defaultdict(set))
+    users_per_movie: Counter[int] = field(default_factory=Counter)
+    both: dict[int, Counter[int]] = field(default_factory=lambda: defaultdict(Counter))
+
+    def add(self, user_id: int, movie_id: int) -> set[int]:
+        """Record a like; returns the movies whose neighbour lists changed.
+
+        That is the movie itself and everything co-liked with it, since its
+        like count is in the denominator of all of their similarities.
+        """
+        liked = self.by_user[user_id]
+        if movie_id in liked or len(liked) >= settings.recommendation_max_likes_per_user:
+            return set()
+        for other in liked:
+            self.both[movie_id][other] += 1
+            self.both[other][movie_id] += 1
+        liked.add(movie_id)
+        self.users_per_movie[movie_id] += 1
+        return {movie_id, *self.both[movie_id]}
+
+    def rank(self, movie_id: int) -> Neighbours:
+        likes = self.users_per_movie[movie_id]
+        scored = (
+            (other, count / math.sqrt(likes * self.users_per_movie[other]))
+            for other, count in self.both[movie_id].items()
+        )
+        return heapq.nlargest(settings.recommendation_top_k, scored, key=lambda pair: pair[1])
+
+
+def _new_likes(
+    db: Session, after: tuple[int, int]
+) -> tuple[list[tuple[int, int]], tuple[int, int]]:
+    """(user, movie) likes recorded after the ``(favorite, review)`` ids."""
+    favorites = db.execute(
+        select(FavoriteMovie.id, FavoriteMovie.user_id, FavoriteMovie.movie_id)
+        .where(FavoriteMovie.id > after[0])
+        .order_by(FavoriteMovie.id)
+    ).tuples().all()
+    reviews = db.execute(
+        select(Review.id, Review.user_id, Review.movie_id, Review.rating)
+        .where(Review.id > after[1])
+        .order_by(Review.id)
+    ).tuples().all()
+    likes = [(user_id, movie_id) for _, user_id, movie_id in favorites]
+    likes += [
+        (user_id, movie_id)
+        for _, user_id, movie_id, rating in reviews
+        if rating >= settings.recommendation_min_rating
+    ]
+    seen = (
+        favorites[-1][0] if favorites else after[0],
+        reviews[-1][0] if reviews else after[1],
+    )
+    return likes, seen
+
+
+class SimilarityIndex:
+    """Per-worker top-K neighbour lists, refreshed from new likes."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()  # guards reads against in-place refreshes
+        self._updating = threading.Lock()  # one build or refresh at a time
+        self._likes = _Likes()
+        self._neighbours: dict[int, Neighbours] = {}
+        self._seen = (0, 0)
+        self._built_at: float | None = None
+        self._refreshed_at = 0.0
+        self.counters = {"rebuilds": 0, "refreshes": 0}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._likes = _Likes()
+            self._neighbours = {}
+            self._seen = (0, 0)
+            self._built_at = None
+            self._refreshed_at = 0.0
+            self.counters = {"rebuilds": 0, "refreshes": 0}
+
+    def rebuild(self, db: Session) -> None:
+        """Recompute everything from the database, then swap it in."""
+        with self._updating:
+            likes = _Likes()
+            rows, seen = _new_likes(db, (0, 0))
+            for user_id, movie_id in rows:
+                likes.add(user_id, movie_id)
+            neighbours = {movie_id: likes.rank(movie_id) for movie_id in likes.users_per_movie}
+            with self._lock:
+                self._likes, self._neighbours, self._seen = likes, neighbours, seen
+                self._built_at = self._refreshed_at = time.monotonic()
+                self.counters["rebuilds"] += 1
+
+    def refresh(self, db: Session) -> None:
+        """Fold in likes added since the last build or refresh.
+
+        Skipped when another thread is already updating the index; callers
+        then serve the slightly older neighbour lists.
+        """
+        # pylint: disable-next=consider-using-with
+        if not self._updating.acquire(blocking=False):
+            return
+        try:
+            rows, seen = _new_likes(db, self._seen)
+            likes = self._likes
+            dirty: set[int] = set()
+            with self._lock:
+                for user_id, movie_id in rows:
+                    dirty |= likes.add(user_id, movie_id)
+            # only the thread holding ``_updating`` changes the like data,
+            # so ranking can run without blocking readers
+            ranked = {movie_id: likes.rank(movie_id) for movie_id in dirty}
+            with self._lock:
+                self._neighbours.update(ranked)
+                self._seen = seen
+                self._refreshed_at = time.monotonic()
+                self.counters["refreshes"] += 1
+        finally:
+            self._updating.release()
+
+    def ensure_fresh(self, db: Session) -> None:
+        """Refresh when older than the refresh interval.
+
+        Builds the index if the startup build has not happened (or failed).
+        """
+        if self._built_at is None:
+            self.rebuild(db)
+        elif time.monotonic() - self._refreshed_at >= settings.recommendation_refresh_seconds:
+            self.refresh(db)
+
+    def liked(self, user_id: int) -> set[int]:
+        with self._lock:
+            return set(self._likes.by_user.get(user_id, ()))
+
+    def scores(self, liked: set[int]) -> dict[int, float]:
+        """Summed similarity of every neighbour of ``liked`` not liked yet."""
+        with self._lock:
+            lists = [self._neighbours.get(movie_id, []) for movie_id in liked]
+        scores: dict[int, float] = defaultdict(float)
+        for neighbours in lists:
+            for movie_id, similarity in neighbours:
+                if movie_id not in liked:
+                    scores[movie_id] += similarity
+        return scores
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            age = 0.0 if self._built_at is None else time.monotonic() - self._refreshed_at
+            return {
+                **self.counters,
+                "movies": len(self._neighbours),
+                "users": len(self._likes.by_user),
+                "likes": sum(self._likes.users_per_movie.values()),
+                "age_seconds": round(age, 3),
+            }
+
+
+recommender = SimilarityIndex()
+
+
+Pick = tuple[Movie, float, bool]
+
+
+def _upcoming() -> Exists:
+    return exists().where(
+        Screening.movie_id == Movie.id,
+        Screening.starts_at > datetime.now(timezone.utc).replace(tzinfo=None),
+    )
+
+
+def _top_rated(db: Session, exclude: set[int], limit: int) -> list[Pick]:
+    stmt = (
+        select(Movie)
+        .options(selectinload(Movie.rating))
+        .join(MovieRating, MovieRating.movie_id == Movie.id)
+        .where(_upcoming(), Movie.id.not_in(exclude))
+        .order_by(MovieRating.average.desc(), Movie.id)
+        .limit(limit)
+    )
+    return [(movie, 0.0, True) for movie in db.scalars(stmt)]
+
+
+def _scored(db: Session, scores: dict[int, float], limit: int) -> list[Pick]:
+    candidates = heapq.nlargest(limit * CANDIDATES_PER_RESULT, scores, key=scores.__getitem__)
+    upcoming = _upcoming()
+    stmt = (
+        select(Movie, upcoming)
+        .options(selectinload(Movie.rating))
+        .where(Movie.id.in_(candidates))
+    )
+    boost = settings.recommendation_upcoming_boost
+    picks = [
+        (movie, scores[movie.id] * (boost if showing else 1.0), showing)
+        for movie, showing in db.execute(stmt).tuples()
+    ]
+    picks.sort(key=lambda pick: (-pick[1], pick[0].id))
+    return picks[:limit]
+
+
+def recommend_movies(db: Session, user_id: int, limit: int) -> list[Pick]:
+    """Best ``(movie, score, has upcoming screenings)`` picks for a user.
+
+    Places the user's neighbours cannot fill, all of them for users without
+    likes, go to the top-rated movies that are still showing.
+    """
+    recommender.ensure_fresh(db)
+    liked = recommender.liked(user_id)
+    scores = recommender.scores(liked)
+    picks = _scored(db, scores, limit) if scores else []
+    if len(picks) < limit:
+        exclude = liked | {movie.id for movie, _, _ in picks}
+        picks += _top_rated(db, exclude, limit - len(picks))
+    return picks
+
+
+def build_recommendation_index(session_factory: Callable[[], Session]) -> None:
+    with session_factory() as db:
+        recommender.rebuild(db)
+
+
+async def run_recommendation_rebuilder(
+    session_factory: Callable[[], Session], interval_seconds: float
+) -> None:
+    """Periodically rebuild the index so removed likes drop out of it."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(build_recommendation_index, session_factory)
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Recommendation index rebuild failed")
@@ -1,47 +1,279 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy.exc import IntegrityError
 
+from app.core.config import settings
+from app.core.principals import Principal
 from app.models.reservation import Reservation, ReservationTicket, ReservationStatus
-from app.models.cinema import Screening
-from app.models.user import User
+from app.models.cinema import Hall, Screening
 from app.schemas.reservation import ReservationCreateIn
+from app.services.seat_allocator import best_available
+from app.services.seat_map import (
+    Seat,
+    get_seat_map,
+    get_seat_map_async,
+    reload_seat_map,
+    reload_seat_map_async,
+    seat_maps,
+)
 
+logger = logging.getLogger(__name__)
 
-def create_reservation(db: Session, user: User, data: ReservationCreateIn) -> Reservation:
-    screening = db.get(Screening, data.screening_id)
-    if not screening:
-        raise HTTPException(status_code=404, detail="Screening not found")
 
-    hall = screening.hall
-    for s in data.seats:
-        if s.seat_row > hall.rows or s.seat_col > hall.cols:
-            raise HTTPException(status_code=400, detail="Seat out of hall bounds")
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _hold_deadline() -> datetime | None:
+    if settings.pending_hold_minutes <= 0:
+        return None
+    return _utcnow() + timedelta(minutes=settings.pending_hold_minutes)
+
+
+def hold_expired(reservation: Reservation) -> bool:
+    return (
+        reservation.status == ReservationStatus.PENDING
+        and reservation.expires_at is not None
+        and reservation.expires_at <= _utcnow()
+    )
+
+
+class SeatsUnavailable(Exception):
+    """One or more requested seats are already taken."""
+
+
+def _taken_seat_query(screening_id: int, seats: list[Seat]) -> Select[tuple[int]]:
+    return (
+        select(ReservationTicket.id)
+        .where(
+            ReservationTicket.screening_id == screening_id,
+            tuple_(ReservationTicket.seat_row, ReservationTicket.seat_col).in_(seats),
+        )
+        .limit(1)
+    )
+
 
-    reservation = Reservation(
+def _new_reservation(user: Principal, screening_id: int, notes: str) -> Reservation:
+    return Reservation(
         user_id=user.id,
-        screening_id=screening.id,
+        screening_id=screening_id,
         status=ReservationStatus.PENDING,
-        notes=data.notes,
+        notes=notes,
+        expires_at=_hold_deadline(),
     )
-    db.add(reservation)
-    db.flush()
 
+
+def _ticket_rows(reservation_id: int, screening_id: int, seats: list[Seat]) -> list[dict[str, int]]:
+    return [
+        {"reservation_id": reservation_id, "screening_id": screening_id, "seat_row": r, "seat_col": c}
+        for (r, c) in seats
+    ]
+
+
+def _explicit_seats(rows: int, cols: int, data: ReservationCreateIn) -> list[Seat]:
     for s in data.seats:
-        db.add(
-            ReservationTicket(
-                reservation_id=reservation.id,
-                screening_id=screening.id,
-                seat_row=s.seat_row,
-                seat_col=s.seat_col,
-            )
-        )
+        if s.seat_row > rows or s.seat_col > cols:
+            raise HTTPException(status_code=400, detail="Seat out of hall bounds")
+
+    seats = [(s.seat_row, s.seat_col) for s in data.seats]
+    if len(set(seats)) != len(seats):
+        raise HTTPException(status_code=400, detail="Duplicate seats in request")
+    return seats
+
+
+def _book_seats(db: Session, user: Principal, screening_id: int, seats: list[Seat], notes: str) -> Reservation:
+    # Reject known conflicts before writing anything; uq_screening_seat still
+    # catches the race between this check and the commit.
+    if db.execute(_taken_seat_query(screening_id, seats)).first() is not None:
+        raise SeatsUnavailable()
+
+    reservation = _new_reservation(user, screening_id, notes)
+    db.add(reservation)
 
     try:
+        db.flush()
+        db.execute(insert(ReservationTicket), _ticket_rows(reservation.id, screening_id, seats))
         db.commit()
     except IntegrityError as exc:
         db.rollback()
-        raise HTTPException(status_code=409, detail="One or more seats already booked") from exc
+        raise SeatsUnavailable() from exc
 
+    seat_maps.take(screening_id, seats)
     db.refresh(reservation)
     return reservation
+
+
+def _book_best_available(db: Session, user: Principal, screening_id: int, quantity: int, notes: str) -> Reservation:
+    seat_map = get_seat_map(db, screening_id)
+    for _ in range(max(settings.seat_allocation_attempts, 1)):
+        if seat_map is None:
+            raise HTTPException(status_code=404, detail="Screening not found")
+
+        seats = best_available(seat_map, quantity)
+        if seats is None:
+            raise HTTPException(status_code=409, detail="Not enough adjacent seats available")
+
+        try:
+            return _book_seats(db, user, screening_id, seats, notes)
+        except SeatsUnavailable:
+            # Someone took one of the picked seats first; re-read occupancy and try
+            # again, without resetting every stream watching this screening
+            seat_map = reload_seat_map(db, screening_id)
+
+    raise HTTPException(status_code=409, detail="Seats are in high demand, please try again")
+
+
+def create_reservation(db: Session, user: Principal, data: ReservationCreateIn) -> Reservation:
+    screening = db.get(Screening, data.screening_id, options=[joinedload(Screening.hall)])
+    if not screening:
+        raise HTTPException(status_code=404, detail="Screening not found")
+
+    if data.quantity is not None:
+        return _book_best_available(db, user, screening.id, data.quantity, data.notes)
+
+    hall = screening.hall
+    seats = _explicit_seats(hall.rows, hall.cols, data)
+    try:
+        return _book_seats(db, user, screening.id, seats, data.notes)
+    except SeatsUnavailable as exc:
+        raise HTTPException(status_code=409, detail="One or more seats already booked") from exc
+
+
+async def load_reservation_async(db: AsyncSession, reservation_id: int) -> Reservation | None:
+    """Fetch a reservation with its tickets; async sessions cannot lazy-load."""
+    result = await db.execute(
+        select(Reservation)
+        .options(selectinload(Reservation.tickets))
+        .where(Reservation.id == reservation_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
+async def _book_seats_async(
+    db: AsyncSession, user: Principal, screening_id: int, seats: list[Seat], notes: str
+) -> Reservation:
+    if (await db.execute(_taken_seat_query(screening_id, seats))).first() is not None:
+        raise SeatsUnavailable()
+
+    reservation = _new_reservation(user, screening_id, notes)
+    db.add(reservation)
+
+    try:
+        await db.flush()
+        await db.execute(insert(ReservationTicket), _ticket_rows(reservation.id, screening_id, seats))
+        await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        raise SeatsUnavailable() from exc
+
+    seat_maps.take(screening_id, seats)
+    loaded = await load_reservation_async(db, reservation.id)
+    if loaded is None:
+        raise HTTPException(status_code=404, detail="Reservation not found")
+    return loaded
+
+
+async def create_reservation_async(db: AsyncSession, user: Principal, data: ReservationCreateIn) -> Reservation:
+    screening = await db.get(Screening, data.screening_id)
+    if not screening:
+        raise HTTPException(status_code=404, detail="Screening not found")
+    screening_id = screening.id
+
+    if data.quantity is not None:
+        seat_map = await get_seat_map_async(db, screening_id)
+        for _ in range(max(settings.seat_allocation_attempts, 1)):
+            if seat_map is None:
+                raise HTTPException(status_code=404, detail="Screening not found")
+            picked = best_available(seat_map, data.quantity)
+            if picked is None:
+                raise HTTPException(status_code=409, detail="Not enough adjacent seats available")
+            try:
+                return await _book_seats_async(db, user, screening_id, picked, data.notes)
+            except SeatsUnavailable:
+                seat_map = await reload_seat_map_async(db, screening_id)
+        raise HTTPException(status_code=409, detail="Seats are in high demand, please try again")
+
+    hall = await db.get(Hall, screening.hall_id)
+    if hall is None:
+        raise HTTPException(status_code=404, detail="Hall not found")
+    seats = _explicit_seats(hall.rows, hall.cols, data)
+    try:
+        return await _book_seats_async(db, user, screening_id, seats, data.notes)
+    except SeatsUnavailable as exc:
+        raise HTTPException(status_code=409, detail="One or more seats already booked") from exc
+
+
+def release_expired_holds(db: Session, batch_size: int | None = None) -> int:
+    """Cancel PENDING reservations whose hold has expired and free their seats.
+
+    Works in batches through ix_reservations_status_expires_at: one UPDATE
+    for the statuses, then one SELECT and one bulk DELETE for the tickets per
+    batch. The freed seats are published as releases.
+    """
+    batch_size = batch_size or settings.hold_sweep_batch_size
+    now = _utcnow()
+    released = 0
+
+    while True:
+        rows = (
+            db.query(Reservation.id, Reservation.screening_id)
+            .filter(Reservation.status == ReservationStatus.PENDING, Reservation.expires_at <= now)
+            .order_by(Reservation.expires_at.asc())
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+
+        ids = [rid for (rid, _) in rows]
+        count = (
+            db.query(Reservation)
+            .filter(Reservation.id.in_(ids), Reservation.status == ReservationStatus.PENDING)
+            .update({Reservation.status: ReservationStatus.CANCELED}, synchronize_session=False)
+        )
+        # only drop tickets of rows this sweep actually canceled (not ones confirmed meanwhile)
+        canceled_ids = select(Reservation.id).where(
+            Reservation.id.in_(ids), Reservation.status == ReservationStatus.CANCELED
+        )
+        tickets = ReservationTicket.reservation_id.in_(canceled_ids)
+        seats_of = select(
+            ReservationTicket.screening_id, ReservationTicket.seat_row, ReservationTicket.seat_col
+        ).where(tickets)
+        freed: dict[int, list[Seat]] = defaultdict(list)
+        for screening_id, seat_row, seat_col in db.execute(seats_of).tuples():
+            freed[screening_id].append((seat_row, seat_col))
+        db.query(ReservationTicket).filter(tickets).delete(synchronize_session=False)
+        db.commit()
+
+        for screening_id, seats in freed.items():
+            seat_maps.release(screening_id, seats)
+        released += count
+        if len(rows) < batch_size:
+            break
+
+    return released
+
+
+def _sweep_once(session_factory: Callable[[], Session]) -> int:
+    with session_factory() as db:
+        return release_expired_holds(db)
+
+
+async def run_hold_sweeper(session_factory: Callable[[], Session], interval_seconds: float) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            released = await asyncio.to_thread(_sweep_once, session_factory)
+            if released:
+                logger.info("Released %d expired seat holds", released)
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Seat hold sweep failed")
@@ -0,0 +1,233 @@
+"""Hall schedule rules: screening end times and overlap detection.
+
+A screening occupies its hall from ``starts_at`` until ``ends_at`` (start
+plus the movie's runtime) and then for ``screening_turnaround_minutes`` of
+cleaning. Two screenings in a hall clash when those intervals intersect.
+
+The overlap query is a bounded range scan of the covering
+``(hall_id, starts_at, ends_at)`` index. No runtime exceeds
+:data:`~app.schemas.cinema.MAX_RUNTIME_MINUTES`, so any clashing screening started within that
+window before the new one. The scan therefore never reaches older history.
+
+Bulk imports (:func:`check_schedule`) load each affected hall's schedule
+for the batch's time window once. A sort-and-sweep pass then checks every
+row against that schedule and against the other rows.
+:func:`ensure_retimed_fit` does the same for existing screenings whose end
+moved together, e.g. after their movie's runtime changed.
+"""
+
+from __future__ import annotations
+
+import heapq
+from bisect import bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterator, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.cinema import Hall, Movie, Screening
+from app.schemas.cinema import MAX_RUNTIME_MINUTES, ScheduleConflict, ScreeningCreateIn
+
+
+def screening_end(starts_at: datetime, runtime_minutes: int) -> datetime:
+    return starts_at + timedelta(minutes=runtime_minutes)
+
+
+def find_overlap(
+    db: Session,
+    hall_id: int,
+    starts_at: datetime,
+    ends_at: datetime,
+    exclude_id: int | None = None,
+) -> int | None:
+    """Id of a screening in ``hall_id`` clashing with ``[starts_at, ends_at)``, if any."""
+    gap = timedelta(minutes=settings.screening_turnaround_minutes)
+    stmt = select(Screening.id).where(
+        Screening.hall_id == hall_id,
+        Screening.starts_at > starts_at - gap - timedelta(minutes=MAX_RUNTIME_MINUTES),
+        Screening.starts_at < ends_at + gap,
+        Screening.ends_at > starts_at - gap,
+    )
+    if exclude_id is not None:
+        stmt = stmt.where(Screening.id != exclude_id)
+    return db.scalar(stmt.limit(1))
+
+
+def ensure_hall_free(
+    db: Session,
+    hall_id: int,
+    starts_at: datetime,
+    ends_at: datetime,
+    exclude_id: int | None = None,
+) -> None:
+    if find_overlap(db, hall_id, starts_at, ends_at, exclude_id) is not None:
+        detail = "Screening overlaps with existing one in this hall"
+        raise HTTPException(status_code=400, detail=detail)
+
+
+@dataclass(frozen=True, slots=True)
+class _Slot:
+    starts_at: datetime
+    ends_at: datetime
+    index: int | None = None  # row of the import
+    screening_id: int | None = None  # existing screening
+
+
+def _order(slot: _Slot) -> tuple[datetime, bool, int]:
+    # existing screenings sort before import rows starting at the same time
+    return slot.starts_at, slot.index is not None, slot.index or 0
+
+
+def wall_clock(value: datetime) -> datetime:
+    """Naive wall-clock time, which is what the DateTime columns store."""
+    return value.replace(tzinfo=None)
+
+
+def _sweep(
+    rows: list[_Slot], existing: list[_Slot], gap: timedelta
+) -> Iterator[tuple[int, _Slot, _Slot | None]]:
+    """Yield ``(index, row, clash)`` per import row; ``clash`` is ``None`` when it fits.
+
+    Slots are visited in start order while tracking the accepted slot that
+    ends last; a row clashes with it, or else with the first existing
+    screening starting at or after the row. Earlier rows win over later ones.
+    """
+    existing_starts = [e.starts_at for e in existing]
+    blocker: _Slot | None = None
+    for slot in heapq.merge(existing, sorted(rows, key=_order), key=_order):
+        clash = blocker if blocker is not None and blocker.ends_at + gap > slot.starts_at else None
+        if slot.index is not None:
+            if clash is None:
+                after = bisect_right(existing_starts, slot.starts_at)
+                if after < len(existing) and existing[after].starts_at < slot.ends_at + gap:
+                    clash = existing[after]
+            yield slot.index, slot, clash
+            if clash is not None:
+                continue
+        if blocker is None or slot.ends_at > blocker.ends_at:
+            blocker = slot
+
+
+def _existing_slots(
+    db: Session, by_hall: dict[int, list[_Slot]], gap: timedelta
+) -> dict[int, list[_Slot]]:
+    """Screenings of the affected halls that could clash with any row, by hall and start."""
+    slots = [s for hall_slots in by_hall.values() for s in hall_slots]
+    window_start = min(s.starts_at for s in slots) - gap - timedelta(minutes=MAX_RUNTIME_MINUTES)
+    window_end = max(s.ends_at for s in slots) + gap
+    existing: dict[int, list[_Slot]] = defaultdict(list)
+    scheduled = db.execute(
+        select(Screening.hall_id, Screening.id, Screening.starts_at, Screening.ends_at)
+        .where(
+            Screening.hall_id.in_(by_hall),
+            Screening.starts_at > window_start,
+            Screening.starts_at < window_end,
+        )
+        .order_by(Screening.hall_id, Screening.starts_at)
+    ).tuples()
+    for hall_id, screening_id, starts_at, ends_at in scheduled:
+        existing[hall_id].append(_Slot(starts_at, ends_at, screening_id=screening_id))
+    return existing
+
+
+def _moved_clash(moved: list[_Slot], others: list[_Slot], gap: timedelta) -> bool:
+    """Whether a moved slot clashes with any other slot, moved or not.
+
+    Clashes between two unmoved slots predate the change and are ignored.
+    """
+    timeline = sorted(
+        [(slot, True) for slot in moved] + [(slot, False) for slot in others],
+        key=lambda item: item[0].starts_at,
+    )
+    last_end = last_moved_end = datetime.min
+    for slot, is_moved in timeline:
+        if (last_end if is_moved else last_moved_end) + gap > slot.starts_at:
+            return True
+        last_end = max(last_end, slot.ends_at)
+        if is_moved:
+            last_moved_end = max(last_moved_end, slot.ends_at)
+    return False
+
+
+def ensure_retimed_fit(db: Session, screenings: Sequence[Screening]) -> None:
+    """Raise 400 if any of ``screenings``, with their new ``ends_at``, clashes in its hall.
+
+    One query loads the affected halls' schedules around them.
+    """
+    if not screenings:
+        return
+    gap = timedelta(minutes=settings.screening_turnaround_minutes)
+    by_hall: dict[int, list[_Slot]] = defaultdict(list)
+    for s in screenings:
+        by_hall[s.hall_id].append(_Slot(s.starts_at, s.ends_at, screening_id=s.id))
+    moved = {s.id for s in screenings}
+    existing = _existing_slots(db, by_hall, gap)
+    for hall_id, slots in by_hall.items():
+        others = [e for e in existing[hall_id] if e.screening_id not in moved]
+        if _moved_clash(slots, others, gap):
+            detail = "Screening overlaps with existing one in this hall"
+            raise HTTPException(status_code=400, detail=detail)
+
+
+def _rows_by_hall(
+    db: Session, rows: Sequence[ScreeningCreateIn], conflicts: list[ScheduleConflict]
+) -> dict[int, list[_Slot]]:
+    """Slots of the rows whose movie and hall exist; the others go to ``conflicts``."""
+    movie_ids = {r.movie_id for r in rows}
+    runtime_of = select(Movie.id, Movie.runtime_minutes).where(Movie.id.in_(movie_ids))
+    runtimes = dict(db.execute(runtime_of).tuples().all())
+    halls = set(db.scalars(select(Hall.id).where(Hall.id.in_({r.hall_id for r in rows}))))
+
+    by_hall: dict[int, list[_Slot]] = defaultdict(list)
+    for i, r in enumerate(rows):
+        if r.movie_id not in runtimes:
+            conflicts.append(ScheduleConflict(index=i, error="Movie not found"))
+        elif r.hall_id not in halls:
+            conflicts.append(ScheduleConflict(index=i, error="Hall not found"))
+        else:
+            starts_at = wall_clock(r.starts_at)
+            ends_at = screening_end(starts_at, runtimes[r.movie_id])
+            by_hall[r.hall_id].append(_Slot(starts_at, ends_at, index=i))
+    return by_hall
+
+
+def _conflict(index: int, clash: _Slot) -> ScheduleConflict:
+    if clash.screening_id is not None:
+        return ScheduleConflict(
+            index=index, error="Overlaps an existing screening", screening_id=clash.screening_id
+        )
+    return ScheduleConflict(
+        index=index, error="Overlaps another row of this import", row=clash.index
+    )
+
+
+def check_schedule(
+    db: Session, rows: Sequence[ScreeningCreateIn]
+) -> tuple[dict[int, datetime], list[ScheduleConflict]]:
+    """Validate a batch of screenings against their halls and each other.
+
+    Returns the accepted rows as ``{index: ends_at}`` and a conflict per
+    rejected row, using one query each for movies, halls and the existing
+    schedule of the affected halls.
+    """
+    conflicts: list[ScheduleConflict] = []
+    by_hall = _rows_by_hall(db, rows, conflicts)
+    if not by_hall:
+        return {}, conflicts
+
+    gap = timedelta(minutes=settings.screening_turnaround_minutes)
+    existing = _existing_slots(db, by_hall, gap)
+    accepted: dict[int, datetime] = {}
+    for hall_id, hall_slots in by_hall.items():
+        for index, slot, clash in _sweep(hall_slots, existing[hall_id], gap):
+            if clash is None:
+                accepted[index] = slot.ends_at
+            else:
+                conflicts.append(_conflict(index, clash))
+    conflicts.sort(key=lambda c: c.index)
+    return accepted, conflicts
@@ -0,0 +1,37 @@
+"""Best-available contiguous seat selection.
+
+Scans a :class:`~app.services.seat_map.SeatMap` row by row for runs of free
+seats long enough to seat the whole party together and picks the block whose
+centre is closest to the centre of the hall.
+"""
+
+from __future__ import annotations
+
+from app.services.seat_map import Seat, SeatMap
+
+
+def best_available(seat_map: SeatMap, quantity: int) -> list[Seat] | None:
+    if quantity < 1 or quantity > seat_map.cols:
+        return None
+
+    row_mid = (seat_map.rows + 1) / 2
+    col_mid = (seat_map.cols + 1) / 2
+    best: tuple[float, int, int] | None = None
+
+    for r in range(1, seat_map.rows + 1):
+        run_start = 1
+        for c in range(1, seat_map.cols + 2):
+            if c <= seat_map.cols and not seat_map.is_taken(r, c):
+                continue
+            # free run is [run_start, c - 1]
+            for start in range(run_start, c - quantity + 1):
+                block_mid = start + (quantity - 1) / 2
+                score = abs(r - row_mid) + abs(block_mid - col_mid)
+                if best is None or score < best[0]:
+                    best = (score, r, start)
+            run_start = c + 1
+
+    if best is None:
+        return None
+    _, row, first_col = best
+    return [(row, first_col + i) for i in range(quantity)]
@@ -0,0 +1,171 @@
+"""Fan-out of seat occupancy changes to streaming availability clients.
+
+Subscribers live on the event loop; publishers are the sync route handlers
+running in the threadpool, so delivery goes through ``call_soon_threadsafe``.
+
+Those local publishes only cover bookings made by this worker process. For
+the rest, each screening with subscribers gets one poller per worker that
+reads the taken seats from the database every
+``availability_stream_poll_seconds`` and sends every subscriber the
+``seat_taken`` / ``seat_released`` deltas between that and what the
+subscriber has been told so far. Changes committed by other workers
+therefore reach the stream within one poll interval. A poll that started
+before a local change was delivered says nothing about the seats that
+change touched, so those are left out of its comparison.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from app.core.config import settings
+from app.services.seat_map import Seat, seat_maps
+
+logger = logging.getLogger(__name__)
+
+SeatEvent = dict[str, Any]
+# reads the screening's taken seats from the database
+SeatPoller = Callable[[], Awaitable[set[Seat]]]
+
+
+@dataclass(eq=False)
+class Subscription:
+    screening_id: int
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue[SeatEvent] = field(default_factory=asyncio.Queue)
+    # taken seats as the client knows them (snapshot plus deltas); None after a reset
+    known: set[Seat] | None = None
+    # counts local changes delivered; ``changed`` maps seats to the count of their last one
+    stamp: int = 0
+    changed: dict[Seat, int] = field(default_factory=dict)
+
+
+def _seats(event: SeatEvent) -> set[Seat]:
+    return {(s["seat_row"], s["seat_col"]) for s in event.get("seats", ())}
+
+
+def _seat_event(kind: str, screening_id: int, seats: list[Seat]) -> SeatEvent:
+    event: SeatEvent = {"type": kind, "screening_id": screening_id}
+    if kind != "reset":
+        event["seats"] = [{"seat_row": r, "seat_col": c} for (r, c) in seats]
+    return event
+
+
+class SeatEventBroker:
+    def __init__(self, max_pending: int) -> None:
+        self.max_pending = max_pending
+        self._subscribers: dict[int, set[Subscription]] = {}
+        self._pollers: dict[int, asyncio.Task[None]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, screening_id: int, poll: SeatPoller | None = None) -> Subscription:
+        """Register a subscriber; must be called from the event loop.
+
+        ``poll`` starts the screening's database poller if none is running yet.
+        """
+        loop = asyncio.get_running_loop()
+        sub = Subscription(screening_id=screening_id, loop=loop)
+        with self._lock:
+            self._subscribers.setdefault(screening_id, set()).add(sub)
+            interval = settings.availability_stream_poll_seconds
+            if poll is not None and interval > 0 and screening_id not in self._pollers:
+                self._pollers[screening_id] = loop.create_task(
+                    self._poll(screening_id, poll, interval)
+                )
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subscribers.get(sub.screening_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.screening_id]
+                    poller = self._pollers.pop(sub.screening_id, None)
+                    if poller is not None:
+                        poller.cancel()
+
+    async def _poll(self, screening_id: int, poll: SeatPoller, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            with self._lock:
+                subs = list(self._subscribers.get(screening_id, ()))
+            # stamps only move on this loop, so none can change before the read starts
+            stamps = {sub: sub.stamp for sub in subs}
+            try:
+                taken = await poll()
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Seat poll for screening %d failed", screening_id)
+                continue
+            for sub, stamp in stamps.items():
+                self._catch_up(sub, taken, stamp)
+
+    def _catch_up(self, sub: Subscription, taken: set[Seat], stamp: int) -> None:
+        """Send ``sub`` whatever separates what it knows from ``taken``.
+
+        ``taken`` was read when ``sub`` was at ``stamp``; seats changed
+        locally after that are newer than the read and are skipped.
+        """
+        newer = {seat for seat, at in sub.changed.items() if at > stamp}
+        # later polls start at or after this stamp, so older marks are spent
+        sub.changed = {seat: sub.changed[seat] for seat in newer}
+        if sub.known is None:
+            # after a reset the client refetched; start diffing from here
+            sub.known = set(taken)
+            return
+        changes = (
+            ("seat_taken", taken - sub.known - newer),
+            ("seat_released", sub.known - taken - newer),
+        )
+        for kind, seats in changes:
+            if seats:
+                self._deliver(sub, _seat_event(kind, sub.screening_id, sorted(seats)))
+
+    def subscriber_count(self, screening_id: int) -> int:
+        with self._lock:
+            return len(self._subscribers.get(screening_id, ()))
+
+    def publish(self, screening_id: int, event: SeatEvent) -> None:
+        with self._lock:
+            subs = list(self._subscribers.get(screening_id, ()))
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(self._deliver_local, sub, event)
+            except RuntimeError:
+                # loop already closed; the stream's cleanup will unsubscribe it
+                continue
+
+    def _deliver_local(self, sub: Subscription, event: SeatEvent) -> None:
+        sub.stamp += 1
+        for seat in _seats(event):
+            sub.changed[seat] = sub.stamp
+        self._deliver(sub, event)
+
+    def _deliver(self, sub: Subscription, event: SeatEvent) -> None:
+        if sub.queue.qsize() >= self.max_pending:
+            # a consumer this far behind gets a single reset instead of the backlog
+            while not sub.queue.empty():
+                sub.queue.get_nowait()
+            event = _seat_event("reset", sub.screening_id, [])
+        if event["type"] == "reset" or sub.known is None:
+            sub.known = None
+        elif event["type"] == "seat_taken":
+            sub.known |= _seats(event)
+        else:
+            sub.known -= _seats(event)
+        sub.queue.put_nowait(event)
+
+
+seat_events = SeatEventBroker(settings.availability_stream_max_pending)
+
+
+def _on_seat_change(kind: str, screening_id: int, seats: list[Seat]) -> None:
+    event = _seat_event(kind if kind == "reset" else f"seat_{kind}", screening_id, seats)
+    seat_events.publish(screening_id, event)
+
+
+seat_maps.add_listener(_on_seat_change)
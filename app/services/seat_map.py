@@ -0,0 +1,266 @@
+"""Per-screening seat occupancy bitmaps and their in-process LRU cache.
+
+A :class:`SeatMap` stores one bit per seat (row-major, ``rows * cols`` bits)
+together with the hall dimensions, so availability reads can be answered
+without touching ``reservation_tickets``. Write paths update the cached map
+after their transaction commits; anything that cannot describe its change
+precisely invalidates the entry instead.
+"""
+
+from __future__ import annotations
+
+import base64
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.change_log import ChangeLog
+from app.core.config import settings
+from app.models.cinema import Hall, Screening
+from app.models.reservation import ReservationTicket
+
+Seat = tuple[int, int]
+# (kind, screening_id, seats) with kind one of "taken", "released", "reset"
+SeatListener = Callable[[str, int, list[Seat]], None]
+
+_version_counter = itertools.count(1)
+
+
+class SeatMap:
+    """Occupancy bitmap; ``version`` changes (process-wide unique) on every load or mutation."""
+
+    __slots__ = ("rows", "cols", "version", "_bits")
+
+    def __init__(self, rows: int, cols: int, taken: Iterable[Seat] = ()) -> None:
+        self.rows = rows
+        self.cols = cols
+        self._bits = bytearray((rows * cols + 7) // 8)
+        self.take(taken)
+
+    def _index(self, seat_row: int, seat_col: int) -> int | None:
+        if not (1 <= seat_row <= self.rows and 1 <= seat_col <= self.cols):
+            return None
+        return (seat_row - 1) * self.cols + (seat_col - 1)
+
+    def is_taken(self, seat_row: int, seat_col: int) -> bool:
+        i = self._index(seat_row, seat_col)
+        return i is not None and bool(self._bits[i >> 3] & (0x80 >> (i & 7)))
+
+    def take(self, seats: Iterable[Seat]) -> None:
+        for r, c in seats:
+            i = self._index(r, c)
+            if i is not None:
+                self._bits[i >> 3] |= 0x80 >> (i & 7)
+        self.version = next(_version_counter)
+
+    def release(self, seats: Iterable[Seat]) -> None:
+        for r, c in seats:
+            i = self._index(r, c)
+            if i is not None:
+                self._bits[i >> 3] &= ~(0x80 >> (i & 7)) & 0xFF
+        self.version = next(_version_counter)
+
+    def taken_seats(self) -> list[Seat]:
+        out: list[Seat] = []
+        for byte_no, byte in enumerate(self._bits):
+            if not byte:
+                continue
+            for bit in range(8):
+                if byte & (0x80 >> bit):
+                    i = byte_no * 8 + bit
+                    out.append((i // self.cols + 1, i % self.cols + 1))
+        return out
+
+    def to_bytes(self) -> bytes:
+        return bytes(self._bits)
+
+    def to_base64(self) -> str:
+        """Row-major bitmask, most significant bit first, 1 = taken."""
+        return base64.b64encode(self._bits).decode("ascii")
+
+    def to_rle(self) -> str:
+        """Rows separated by ``/``, each a sequence of ``<count><.|x>`` runs.
+
+        ``.`` marks free seats and ``x`` taken ones, e.g. ``2.3x1.`` for a
+        six-seat row with seats 3-5 taken.
+        """
+        rows_out: list[str] = []
+        for r in range(1, self.rows + 1):
+            runs: list[str] = []
+            current = self.is_taken(r, 1)
+            length = 0
+            for c in range(1, self.cols + 1):
+                taken = self.is_taken(r, c)
+                if taken != current:
+                    runs.append(f"{length}{'x' if current else '.'}")
+                    current, length = taken, 0
+                length += 1
+            runs.append(f"{length}{'x' if current else '.'}")
+            rows_out.append("".join(runs))
+        return "/".join(rows_out)
+
+    def copy(self) -> SeatMap:
+        clone = SeatMap.__new__(SeatMap)
+        clone.rows = self.rows
+        clone.cols = self.cols
+        clone.version = self.version
+        clone._bits = bytearray(self._bits)
+        return clone
+
+
+class SeatMapCache:
+    """Bounded LRU of seat maps keyed by screening id.
+
+    Every mutation advances one cache-wide generation and records it as the
+    screening's last change, so a loader that read the database before a
+    concurrent write committed cannot store its stale snapshot afterwards.
+    Only the ``max_entries`` most recent changes are remembered; screenings
+    older than that are treated as changed at the newest forgotten one.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[int, tuple[float, SeatMap]] = OrderedDict()
+        self._changes: ChangeLog[int] = ChangeLog(max_entries)
+        self._lock = threading.Lock()
+        self._listeners: list[SeatListener] = []
+        self.hits = 0
+        self.misses = 0
+
+    def add_listener(self, listener: SeatListener) -> None:
+        self._listeners.append(listener)
+
+    def get(self, screening_id: int) -> SeatMap | None:
+        with self._lock:
+            entry = self._entries.get(screening_id)
+            if entry is None or (self.ttl_seconds > 0 and time.monotonic() - entry[0] > self.ttl_seconds):
+                self._entries.pop(screening_id, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(screening_id)
+            self.hits += 1
+            return entry[1].copy()
+
+    def generation(self) -> int:
+        """Take before loading a map; pass to :meth:`put` with the result."""
+        with self._lock:
+            return self._changes.generation
+
+    def put(self, screening_id: int, seat_map: SeatMap, generation: int) -> None:
+        with self._lock:
+            if self._changes.changed_since(screening_id, generation):
+                return
+            self._entries[screening_id] = (time.monotonic(), seat_map.copy())
+            self._entries.move_to_end(screening_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def take(self, screening_id: int, seats: Iterable[Seat]) -> None:
+        seats = list(seats)
+        with self._lock:
+            self._changes.bump(screening_id)
+            entry = self._entries.get(screening_id)
+            if entry is not None:
+                entry[1].take(seats)
+        self._notify("taken", screening_id, seats)
+
+    def release(self, screening_id: int, seats: Iterable[Seat]) -> None:
+        seats = list(seats)
+        with self._lock:
+            self._changes.bump(screening_id)
+            entry = self._entries.get(screening_id)
+            if entry is not None:
+                entry[1].release(seats)
+        self._notify("released", screening_id, seats)
+
+    def invalidate(self, screening_id: int) -> None:
+        with self._lock:
+            self._changes.bump(screening_id)
+            self._entries.pop(screening_id, None)
+        self._notify("reset", screening_id, [])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._changes.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _notify(self, kind: str, screening_id: int, seats: list[Seat]) -> None:
+        for listener in self._listeners:
+            listener(kind, screening_id, seats)
+
+
+seat_maps = SeatMapCache(settings.seat_map_cache_size, settings.seat_map_cache_ttl_seconds)
+
+
+def _dims_query(screening_id: int) -> Select[tuple[int, int]]:
+    return select(Hall.rows, Hall.cols).join(Screening, Screening.hall_id == Hall.id).where(Screening.id == screening_id)
+
+
+def _taken_query(screening_id: int) -> Select[tuple[int, int]]:
+    return select(ReservationTicket.seat_row, ReservationTicket.seat_col).where(
+        ReservationTicket.screening_id == screening_id
+    )
+
+
+def load_taken_seats(db: Session, screening_id: int) -> set[Seat]:
+    return set(db.execute(_taken_query(screening_id)).tuples().all())
+
+
+async def load_taken_seats_async(db: AsyncSession, screening_id: int) -> set[Seat]:
+    return set((await db.execute(_taken_query(screening_id))).tuples().all())
+
+
+def load_seat_map(db: Session, screening_id: int) -> SeatMap | None:
+    dims = db.execute(_dims_query(screening_id)).first()
+    if dims is None:
+        return None
+    taken = db.execute(_taken_query(screening_id)).all()
+    return SeatMap(dims[0], dims[1], ((r, c) for (r, c) in taken))
+
+
+async def load_seat_map_async(db: AsyncSession, screening_id: int) -> SeatMap | None:
+    dims = (await db.execute(_dims_query(screening_id))).first()
+    if dims is None:
+        return None
+    taken = (await db.execute(_taken_query(screening_id))).all()
+    return SeatMap(dims[0], dims[1], ((r, c) for (r, c) in taken))
+
+
+def reload_seat_map(db: Session, screening_id: int) -> SeatMap | None:
+    """Re-read the map and cache it; unlike ``invalidate`` this notifies no one."""
+    generation = seat_maps.generation()
+    seat_map = load_seat_map(db, screening_id)
+    if seat_map is not None:
+        seat_maps.put(screening_id, seat_map, generation)
+    return seat_map
+
+
+async def reload_seat_map_async(db: AsyncSession, screening_id: int) -> SeatMap | None:
+    generation = seat_maps.generation()
+    seat_map = await load_seat_map_async(db, screening_id)
+    if seat_map is not None:
+        seat_maps.put(screening_id, seat_map, generation)
+    return seat_map
+
+
+def get_seat_map(db: Session, screening_id: int) -> SeatMap | None:
+    cached = seat_maps.get(screening_id)
+    if cached is not None:
+        return cached
+    return reload_seat_map(db, screening_id)
+
+
+async def get_seat_map_async(db: AsyncSession, screening_id: int) -> SeatMap | None:
+    cached = seat_maps.get(screening_id)
+    if cached is not None:
+        return cached
+    return await reload_seat_map_async(db, screening_id)
@@ -0,0 +1,55 @@
+"""What's-on listing: screenings with their movie, hall and seats left.
+
+One statement serves a whole date range. Screenings are joined to movies
+and halls. Taken seats come from a single ``GROUP BY`` over
+``reservation_tickets``, restricted to the screenings in the range. This
+replaces a list call plus a movie, hall and availability call per row.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.cinema import Hall, Movie, Screening
+from app.models.reservation import ReservationTicket
+from app.schemas.cinema import ShowtimeOut
+
+
+def list_showtimes(db: Session, first: date, last: date) -> list[ShowtimeOut]:
+    """Screenings starting on ``first`` through ``last``, earliest first."""
+    start = datetime.combine(first, datetime.min.time())
+    end = datetime.combine(last + timedelta(days=1), datetime.min.time())
+    in_range = (Screening.starts_at >= start, Screening.starts_at < end)
+    taken = (
+        # pylint: disable-next=not-callable
+        select(ReservationTicket.screening_id, func.count().label("seats"))
+        .join(Screening, Screening.id == ReservationTicket.screening_id)
+        .where(*in_range)
+        .group_by(ReservationTicket.screening_id)
+        .subquery()
+    )
+    seats_total = Hall.rows * Hall.cols
+    stmt = (
+        select(
+            Screening.id.label("screening_id"),
+            Screening.starts_at,
+            Screening.ends_at,
+            Movie.id.label("movie_id"),
+            Movie.title.label("movie_title"),
+            Movie.category.label("movie_category"),
+            Movie.runtime_minutes,
+            Hall.id.label("hall_id"),
+            Hall.name.label("hall_name"),
+            seats_total.label("seats_total"),
+            (seats_total - func.coalesce(taken.c.seats, 0)).label("seats_left"),
+        )
+        .join(Movie, Movie.id == Screening.movie_id)
+        .join(Hall, Hall.id == Screening.hall_id)
+        .outerjoin(taken, taken.c.screening_id == Screening.id)
+        .where(*in_range)
+        .order_by(Screening.starts_at, Screening.id)
+    )
+    return [ShowtimeOut.model_validate(dict(row)) for row in db.execute(stmt).mappings()]
@@ -0,0 +1,357 @@
+"""Booking contention load test.
+
+Seeds halls, screenings and users through the API, then drives a mix of
+seat bookings, availability polls and confirm/cancel calls with N concurrent
+clients for a fixed duration. Reports per-operation p50/p95/p99 latency,
+throughput, the 409 rate, and checks the double-booking invariant (no seat is
+held by two live reservations at the end of the run).
+
+Two targets:
+
+    # ASGI app in this process (no network, sync handlers in the threadpool)
+    python -m benchmarks.booking_load --mode inprocess --concurrency 32 --seconds 10
+
+    # real server: uvicorn with N worker processes on a temp SQLite file
+    python -m benchmarks.booking_load --mode uvicorn --workers 4 --concurrency 64
+
+Results are written as JSON (``--output``) so runs can be diffed across commits.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from statistics import quantiles
+from typing import Any
+
+import httpx
+from sqlalchemy import bindparam, create_engine, text
+
+ADMIN = {"username": "admin", "password": "admin1234"}
+# no background sweeps, and seeding many users from one IP must not hit the auth rate limit
+BENCH_ENV = {"HOLD_SWEEP_INTERVAL_SECONDS": "0", "AUTH_IP_BURST": "0"}
+
+
+@dataclass
+class LoadConfig:  # pylint: disable=too-many-instance-attributes  # one field per knob
+    concurrency: int = 16
+    seconds: float = 10.0
+    screenings: int = 2
+    rows: int = 20
+    cols: int = 30
+    users: int = 8
+    seats_per_booking: int = 2
+    # relative weights of the operations in the mix
+    book_weight: int = 4
+    poll_weight: int = 10
+    confirm_weight: int = 1
+    cancel_weight: int = 1
+    seed: int = 1
+
+
+@dataclass
+class Recorder:
+    latencies: dict[str, list[float]] = field(default_factory=dict)
+    statuses: dict[str, dict[int, int]] = field(default_factory=dict)
+
+    def add(self, op: str, seconds: float, status: int) -> None:
+        self.latencies.setdefault(op, []).append(seconds)
+        by_status = self.statuses.setdefault(op, {})
+        by_status[status] = by_status.get(status, 0) + 1
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    if len(samples) < 2:
+        value = samples[0] * 1000 if samples else 0.0
+        return {"p50_ms": value, "p95_ms": value, "p99_ms": value}
+    cuts = quantiles(samples, n=100, method="inclusive")
+    return {"p50_ms": cuts[49] * 1000, "p95_ms": cuts[94] * 1000, "p99_ms": cuts[98] * 1000}
+
+
+async def _token(client: httpx.AsyncClient, username: str, password: str) -> dict[str, str]:
+    r = await client.post("/auth/login", data={"username": username, "password": password})
+    r.raise_for_status()
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+Headers = dict[str, str]
+
+
+async def seed(client: httpx.AsyncClient, cfg: LoadConfig) -> tuple[list[int], list[Headers]]:
+    admin = await _token(client, **ADMIN)
+    tag = f"{time.time_ns()}"
+    movie = await client.post("/cinema/movies", json={"title": f"Load {tag}"}, headers=admin)
+    movie.raise_for_status()
+
+    screening_ids: list[int] = []
+    starts = datetime.now(timezone.utc) + timedelta(days=1)
+    for i in range(cfg.screenings):
+        hall = await client.post(
+            "/cinema/halls",
+            json={"name": f"Load {tag}-{i}", "rows": cfg.rows, "cols": cfg.cols},
+            headers=admin,
+        )
+        hall.raise_for_status()
+        s = await client.post(
+            "/cinema/screenings",
+            json={
+                "movie_id": movie.json()["id"],
+                "hall_id": hall.json()["id"],
+                "starts_at": starts.isoformat(),
+            },
+            headers=admin,
+        )
+        s.raise_for_status()
+        screening_ids.append(s.json()["id"])
+
+    async def register(i: int) -> dict[str, str]:
+        name = f"load{tag}-{i}"
+        r = await client.post(
+            "/auth/register",
+            json={"email": f"{name}@example.com", "username": name, "password": "pass1234"},
+        )
+        r.raise_for_status()
+        return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    users = list(await asyncio.gather(*(register(i) for i in range(cfg.users))))
+    return screening_ids, users
+
+
+def _database_seats(database_url: str, screening_ids: list[int]) -> list[tuple[int, int, int]]:
+    engine = create_engine(database_url)
+    try:
+        with engine.connect() as conn:
+            query = text(
+                "SELECT screening_id, seat_row, seat_col FROM reservation_tickets"
+                " WHERE screening_id IN :ids"
+            ).bindparams(bindparam("ids", expanding=True))
+            rows = conn.execute(query, {"ids": screening_ids}).all()
+    finally:
+        engine.dispose()
+    return [(int(s), int(r), int(c)) for (s, r, c) in rows]
+
+
+class _Mix:
+    """Concurrent clients running the weighted operation mix until a deadline."""
+
+    ops = ["book", "poll", "confirm", "cancel"]
+
+    def __init__(
+        self, client: httpx.AsyncClient, cfg: LoadConfig, screening_ids: list[int]
+    ) -> None:
+        self.client = client
+        self.cfg = cfg
+        self.screening_ids = screening_ids
+        self.rng = random.Random(cfg.seed)
+        self.rec = Recorder()
+        # reservation id -> (screening id, seats); only live (pending/confirmed) ones
+        self.live: dict[int, tuple[int, list[tuple[int, int]]]] = {}
+        self.pending: list[tuple[int, Headers]] = []
+        self.deadline = 0.0
+
+    async def timed(self, op: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        started = time.perf_counter()
+        r = await self.client.request(method, url, **kwargs)
+        self.rec.add(op, time.perf_counter() - started, r.status_code)
+        return r
+
+    async def book(self, screening_id: int, headers: Headers) -> None:
+        cfg = self.cfg
+        row = self.rng.randint(1, cfg.rows)
+        first = self.rng.randint(1, cfg.cols - cfg.seats_per_booking + 1)
+        seats = [{"seat_row": row, "seat_col": first + i} for i in range(cfg.seats_per_booking)]
+        payload = {"screening_id": screening_id, "seats": seats}
+        r = await self.timed("book", "POST", "/reservations", json=payload, headers=headers)
+        if r.status_code == 200:
+            body = r.json()
+            granted = [(t["seat_row"], t["seat_col"]) for t in body["tickets"]]
+            self.live[body["id"]] = (screening_id, granted)
+            self.pending.append((body["id"], headers))
+
+    async def settle(self, op: str) -> None:
+        """Confirm or cancel a random pending reservation as its owner."""
+        rid, owner = self.pending.pop(self.rng.randrange(len(self.pending)))
+        if op == "confirm":
+            url = f"/reservations/{rid}/confirm"
+            await self.timed(op, "POST", url, json={"method": "load"}, headers=owner)
+        else:
+            r = await self.timed(op, "POST", f"/reservations/{rid}/cancel", headers=owner)
+            if r.status_code == 200:
+                self.live.pop(rid, None)
+
+    async def worker(self, headers: Headers) -> None:
+        cfg = self.cfg
+        weights = [cfg.book_weight, cfg.poll_weight, cfg.confirm_weight, cfg.cancel_weight]
+        while time.perf_counter() < self.deadline:
+            op = self.rng.choices(self.ops, weights)[0]
+            screening_id = self.rng.choice(self.screening_ids)
+            if op == "poll":
+                await self.timed(op, "GET", f"/screenings/{screening_id}/availability")
+            elif op == "book":
+                await self.book(screening_id, headers)
+            elif self.pending:
+                await self.settle(op)
+
+    async def run(self, users: list[Headers]) -> float:
+        """Run every client until the deadline; return the elapsed seconds."""
+        started = time.perf_counter()
+        self.deadline = started + self.cfg.seconds
+        clients = range(self.cfg.concurrency)
+        await asyncio.gather(*(self.worker(users[i % len(users)]) for i in clients))
+        return time.perf_counter() - started
+
+
+async def _invariant(mix: _Mix, database_url: str) -> dict[str, Any]:
+    holders: dict[tuple[int, int, int], list[int]] = {}
+    for rid, (sid, seats) in mix.live.items():
+        for r, c in seats:
+            holders.setdefault((sid, r, c), []).append(rid)
+    double_booked = [f"{k}: {v}" for k, v in holders.items() if len(v) > 1]
+
+    # the database must hold exactly the seats clients were granted, each once
+    stored = _database_seats(database_url, mix.screening_ids)
+    stored_set = set(stored)
+    # availability is served from per-worker caches, so it may lag behind the database
+    served = 0
+    for sid in mix.screening_ids:
+        resp = await mix.client.get(f"/screenings/{sid}/availability")
+        served += len(resp.json()["taken_seats"])
+    return {
+        "double_booked_seats": double_booked,
+        "client_granted_seats": len(holders),
+        "database_taken_seats": len(stored),
+        "availability_taken_seats": served,
+        "ok": not double_booked and len(stored) == len(stored_set) and stored_set == set(holders),
+    }
+
+
+async def drive(client: httpx.AsyncClient, cfg: LoadConfig, database_url: str) -> dict[str, Any]:
+    screening_ids, users = await seed(client, cfg)
+    mix = _Mix(client, cfg, screening_ids)
+    elapsed = await mix.run(users)
+
+    rec = mix.rec
+    total = sum(len(v) for v in rec.latencies.values())
+    bookings = rec.statuses.get("book", {})
+    attempts = sum(bookings.values())
+    return {
+        "config": cfg.__dict__,
+        "elapsed_s": round(elapsed, 3),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "booking_409_rate": round(bookings.get(409, 0) / attempts, 4) if attempts else 0.0,
+        "operations": {
+            op: {"count": len(samples), "statuses": rec.statuses[op], **_percentiles(samples)}
+            for op, samples in rec.latencies.items()
+        },
+        "invariant": await _invariant(mix, database_url),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+async def _drive_server(cfg: LoadConfig, base_url: str, database_url: str) -> dict[str, Any]:
+    limits = httpx.Limits(
+        max_connections=cfg.concurrency, max_keepalive_connections=cfg.concurrency
+    )
+    async with httpx.AsyncClient(base_url=base_url, timeout=30, limits=limits) as client:
+        for _ in range(100):
+            try:
+                await client.get("/")
+                break
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+        return await drive(client, cfg, database_url)
+
+
+async def run_uvicorn(cfg: LoadConfig, workers: int) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        port = _free_port()
+        database_url = f"sqlite:///{Path(tmp) / 'load.db'}"
+        env = {**os.environ, "DATABASE_URL": database_url, **BENCH_ENV}
+        # create the schema once up front so workers do not race on it
+        subprocess.run(
+            [sys.executable, "-c", "import app.main"], env=env, check=True, capture_output=True
+        )
+        server = [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+        ]
+        with subprocess.Popen(server, env=env) as proc:
+            try:
+                result = await _drive_server(cfg, f"http://127.0.0.1:{port}", database_url)
+            finally:
+                proc.terminate()
+                proc.wait(timeout=10)
+    result["target"] = {"mode": "uvicorn", "workers": workers}
+    return result
+
+
+async def run_inprocess(cfg: LoadConfig) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{Path(tmp) / 'load.db'}"
+        os.environ.update({"DATABASE_URL": database_url, **BENCH_ENV})
+        from app.main import app  # pylint: disable=import-outside-toplevel
+
+        transport = httpx.ASGITransport(app=app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=30)
+        async with client:
+            result = await drive(client, cfg, database_url)
+    result["target"] = {"mode": "inprocess"}
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, default=LoadConfig.concurrency)
+    parser.add_argument("--seconds", type=float, default=LoadConfig.seconds)
+    parser.add_argument("--screenings", type=int, default=LoadConfig.screenings)
+    parser.add_argument("--users", type=int, default=LoadConfig.users)
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args()
+
+    cfg = LoadConfig(
+        concurrency=args.concurrency,
+        seconds=args.seconds,
+        screenings=args.screenings,
+        users=args.users,
+    )
+    if args.mode == "uvicorn":
+        result = asyncio.run(run_uvicorn(cfg, args.workers))
+    else:
+        result = asyncio.run(run_inprocess(cfg))
+
+    result["git_commit"] = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=False
+    ).stdout.strip()
+    Path(args.output).write_text(json.dumps(result, indent=2), encoding="utf-8")
+    summary = {k: result[k] for k in ("throughput_rps", "booking_409_rate", "invariant")}
+    print(json.dumps(summary, indent=2))
+    for op, stats in result["operations"].items():
+        print(
+            f"{op:8s} n={stats['count']:6d} p50={stats['p50_ms']:7.1f}ms "
+            f"p95={stats['p95_ms']:7.1f}ms p99={stats['p99_ms']:7.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Compare FTS5 movie search with the LIKE fallback on a large catalog.
+
+Seeds a temporary SQLite database with synthetic movies (the FTS index is
+filled by its triggers), then times ``search_movies`` for a handful of
+queries with FTS5 and with the ``LIKE '%q%'`` fallback.
+
+    python -m benchmarks.movie_search --movies 100000 --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from statistics import median
+from typing import Any
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.session import configure_sqlite
+from app.models import user as _user  # noqa: F401  registers "users" for the screenings FK
+from app.models.cinema import Movie
+from app.services import movie_search
+
+CATEGORIES = ["Drama", "Action", "Comedy", "Thriller", "Horror", "Family", "Documentary"]
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def _vocabulary(rng: random.Random, size: int) -> list[str]:
+    words: set[str] = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(LETTERS, k=rng.randint(4, 9))))
+    return sorted(words, key=lambda _: rng.random())
+
+
+def _queries(vocab: list[str]) -> dict[str, str]:
+    # word frequency follows a Zipf curve, so the vocabulary rank sets selectivity
+    return {
+        "common word": vocab[0],
+        "mid word": vocab[200],
+        "rare word": vocab[10_000],
+        "prefix": vocab[50][:3],
+        "two words": f"{vocab[5]} {vocab[300]}",
+        "no match": "zzzzzzzzzz",
+    }
+
+
+def _seed(session: Session, count: int, vocab: list[str], rng: random.Random) -> None:
+    weights = [1.0 / (rank + 1) for rank in range(len(vocab))]
+    batch: list[dict[str, Any]] = []
+    for _ in range(count):
+        words = rng.choices(vocab, weights, k=27)
+        batch.append({
+            "title": " ".join(words[:2]).title(),
+            "description": " ".join(words[2:]),
+            "category": rng.choice(CATEGORIES),
+        })
+        if len(batch) == 5000:
+            session.execute(insert(Movie), batch)
+            batch.clear()
+    if batch:
+        session.execute(insert(Movie), batch)
+    session.commit()
+
+
+def _time(session: Session, query: str, limit: int, repeat: int) -> dict[str, Any]:
+    samples = []
+    hits = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        hits = len(movie_search.search_movies(session, query, None, limit))
+        samples.append(time.perf_counter() - started)
+    return {"median_ms": round(median(samples) * 1000, 3), "results": hits}
+
+
+def _compare(session: Session, query: str, limit: int, repeat: int) -> dict[str, Any]:
+    """Time ``query`` through FTS5, then through the LIKE fallback."""
+    fts = _time(session, query, limit, repeat)
+    original = movie_search.fts_available
+    movie_search.fts_available = lambda _db: False  # type: ignore[assignment]
+    try:
+        like = _time(session, query, limit, repeat)
+    finally:
+        movie_search.fts_available = original
+    return {"query": query, "fts5": fts, "like": like}
+
+
+def run(movies: int, repeat: int, limit: int) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'search.db'}")
+        configure_sqlite(engine)
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            rng = random.Random(1)
+            vocab = _vocabulary(rng, 20_000)
+            started = time.perf_counter()
+            _seed(session, movies, vocab, rng)
+            seed_s = time.perf_counter() - started
+
+            results = {
+                label: _compare(session, query, limit, repeat)
+                for label, query in _queries(vocab).items()
+            }
+        engine.dispose()
+    return {"movies": movies, "limit": limit, "seed_s": round(seed_s, 2), "queries": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--movies", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(run(args.movies, args.repeat, args.limit), indent=2))
+
+
+if __name__ == "__main__":
+    main()
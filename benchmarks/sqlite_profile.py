@@ -0,0 +1,152 @@
+"""Compare booking throughput with and without the SQLite tuning profile.
+
+Runs concurrent writer threads (single-seat bookings through
+``create_reservation``) alongside reader threads (uncached seat map loads)
+against a temporary database file, once with SQLite defaults and once with
+the pragmas from ``app.db.session.configure_sqlite``.
+
+    python -m benchmarks.sqlite_profile --writers 8 --readers 8 --seconds 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.session import configure_sqlite
+from app.models.cinema import Hall, Movie, Screening
+from app.models.user import User
+from app.schemas.reservation import ReservationCreateIn, SeatIn
+from app.services.reservation_service import create_reservation
+from app.services.seat_map import load_seat_map
+
+
+def _seed(factory: sessionmaker[Any], rows: int, cols: int) -> tuple[int, int]:
+    with factory() as db:
+        user = User(email="bench@example.com", username="bench", hashed_password="x")
+        movie = Movie(title="Bench")
+        hall = Hall(name="Bench", rows=rows, cols=cols)
+        db.add_all([user, movie, hall])
+        db.flush()
+        starts_at = datetime.now() + timedelta(days=1)
+        screening = Screening(
+            movie_id=movie.id,
+            hall_id=hall.id,
+            starts_at=starts_at,
+            ends_at=starts_at + timedelta(minutes=120),
+            provider_id=user.id,
+        )
+        db.add(screening)
+        db.commit()
+        return user.id, screening.id
+
+
+class _Contention:
+    """Writer threads booking distinct seats while readers load the seat map."""
+
+    def __init__(self, factory: sessionmaker[Any], cols: int, seconds: float) -> None:
+        self.factory = factory
+        self.cols = cols
+        self.user_id, self.screening_id = _seed(factory, cols, cols)
+        self.counts = {"booked": 0, "conflicts": 0, "locked": 0, "reads": 0, "read_locked": 0}
+        self.lock = threading.Lock()
+        self.deadline = time.perf_counter() + seconds
+        self.seats = iter(range(cols * cols))
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.counts[key] += 1
+
+    def writer(self) -> None:
+        with self.factory() as db:
+            user = db.get(User, self.user_id)
+            assert user is not None
+            while time.perf_counter() < self.deadline:
+                with self.lock:
+                    i = next(self.seats, None)
+                if i is None:
+                    return
+                seat = SeatIn(seat_row=i // self.cols + 1, seat_col=i % self.cols + 1)
+                data = ReservationCreateIn(screening_id=self.screening_id, seats=[seat])
+                key = "booked"
+                try:
+                    create_reservation(db, user, data)
+                except HTTPException:
+                    key = "conflicts"
+                except OperationalError:
+                    db.rollback()
+                    key = "locked"
+                self.count(key)
+
+    def reader(self) -> None:
+        with self.factory() as db:
+            while time.perf_counter() < self.deadline:
+                key = "reads"
+                try:
+                    load_seat_map(db, self.screening_id)
+                    db.rollback()
+                except OperationalError:
+                    db.rollback()
+                    key = "read_locked"
+                self.count(key)
+
+
+def run(tuned: bool, writers: int, readers: int, seconds: float) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(
+            f"sqlite:///{Path(tmp) / 'bench.db'}",
+            connect_args={"check_same_thread": False},
+            pool_size=writers + readers,
+        )
+        if tuned:
+            configure_sqlite(engine)
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        bench = _Contention(factory, 100, seconds)
+
+        threads = [threading.Thread(target=bench.writer) for _ in range(writers)]
+        threads += [threading.Thread(target=bench.reader) for _ in range(readers)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+        engine.dispose()
+
+    counts = bench.counts
+    return {
+        "profile": "tuned" if tuned else "default",
+        "elapsed_s": round(elapsed, 2),
+        "bookings_per_s": round(counts["booked"] / elapsed, 1),
+        "reads_per_s": round(counts["reads"] / elapsed, 1),
+        **counts,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    for tuned in (False, True):
+        print(json.dumps(run(tuned, args.writers, args.readers, args.seconds)))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,8 @@ Provides a FastAPI `TestClient` backed by an in-memory SQLite database
 and initializes default data required by tests.
 """
 
-from typing import Generator
+from contextlib import contextmanager
+from typing import Callable, ContextManager, Generator
 import warnings
 import pytest
 from fastapi.testclient import TestClient
@@ -15,7 +16,14 @@ from sqlalchemy.pool import StaticPool
 from app.db.base import Base
 from app.core.deps import get_db
 from app.db.init_db import ensure_admin
+from app.db.session import configure_sqlite
+from app.core.principals import principals, token_versions
+from app.core.query_stats import QueryStats, observers
+from app.core.rate_limit import auth_limiter
+from app.core.response_cache import response_cache
 from app.main import app
+from app.services.recommendations import recommender
+from app.services.seat_map import seat_maps
 
 
 @pytest.fixture()
@@ -36,6 +44,7 @@ def client() -> Generator[TestClient, None, None]:
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
+    configure_sqlite(engine)
     TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
     Base.metadata.create_all(bind=engine)
@@ -53,8 +62,40 @@ def client() -> Generator[TestClient, None, None]:
             db.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    # Each test gets a fresh database, so ids are reused across tests
+    seat_maps.clear()
+    principals.clear()
+    token_versions.clear()
+    auth_limiter.reset()
+    response_cache.clear()
 
     with TestClient(app) as c:
+        # startup built it from the app's own database
+        recommender.clear()
         yield c
 
-    app.dependency_overrides.clear()
\ No newline at end of file
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture()
+def max_queries() -> Generator[Callable[[int], ContextManager[list[QueryStats]]], None, None]:
+    """Assert every request inside ``with max_queries(n):`` runs at most ``n``
+    statements and repeats none of them often enough to look like an N+1."""
+    seen: list[QueryStats] = []
+    observers.append(seen.append)
+
+    @contextmanager
+    def budget(limit: int) -> Generator[list[QueryStats], None, None]:
+        start = len(seen)
+        requests: list[QueryStats] = []
+        yield requests
+        requests.extend(seen[start:])
+        for stats in requests:
+            where = f"{stats.method} {stats.path}"
+            assert stats.statements <= limit, (
+                f"{where} ran {stats.statements} statements (max {limit})"
+            )
+            assert not stats.repeated(), f"{where} repeats statements: {stats.repeated()}"
+
+    yield budget
+    observers.remove(seen.append)
@@ -26,4 +26,211 @@ def test_admin_role_change_user_provider(client):
     # change role -> PROVIDER
     upd = client.patch(f"/admin/users/{target['id']}/role", json={"role": "PROVIDER"}, headers=headers)
     assert upd.status_code == 200
-    assert upd.json()["role"] == "PROVIDER"
\ No newline at end of file
+    assert upd.json()["role"] == "PROVIDER"
+
+def test_delete_movie_with_reviews_and_favorites(client):
+    headers = _login_admin(client)
+    m = client.post("/cinema/movies", json={"title": "Reviewed", "description": "", "category": "Drama"}, headers=headers)
+    movie_id = m.json()["id"]
+
+    reg = client.post("/auth/register", json={"email": "rv@x.com", "username": "rv1", "password": "pass1234"})
+    user = {"Authorization": f"Bearer {reg.json()['access_token']}"}
+    assert client.post(f"/movies/{movie_id}/reviews", json={"rating": 4}, headers=user).status_code == 200
+    assert client.post(f"/favorites/movies/{movie_id}", headers=user).status_code == 200
+
+    # foreign keys are enforced, so dependent rows must go first
+    d = client.delete(f"/cinema/movies/{movie_id}", headers=headers)
+    assert d.status_code == 200
+    assert client.get("/favorites/movies", headers=user).json() == []
+
+
+def test_cannot_delete_provider_with_screenings(client):
+    headers = _login_admin(client)
+    reg = client.post("/auth/register", json={"email": "pv@x.com", "username": "pv1", "password": "pass1234"})
+    provider = {"Authorization": f"Bearer {reg.json()['access_token']}"}
+    users = client.get("/admin/users", headers=headers).json()
+    target = next(u for u in users if u["username"] == "pv1")
+    client.patch(f"/admin/users/{target['id']}/role", json={"role": "PROVIDER"}, headers=headers)
+
+    m = client.post("/cinema/movies", json={"title": "PM", "description": "", "category": "Drama"}, headers=provider)
+    h = client.post("/cinema/halls", json={"name": "PH", "rows": 2, "cols": 2}, headers=provider)
+    s = client.post(
+        "/cinema/screenings",
+        json={"movie_id": m.json()["id"], "hall_id": h.json()["id"], "starts_at": "2031-01-01T10:00:00"},
+        headers=provider,
+    )
+    assert s.status_code == 200
+
+    d = client.delete(f"/admin/users/{target['id']}", headers=headers)
+    assert d.status_code == 400
+
+
+def test_principal_cache_follows_role_changes_and_deletes(client):
+    reg = client.post("/auth/register", json={"email": "c@c.com", "username": "cached", "password": "pass1234"})
+    user = {"Authorization": f"Bearer {reg.json()['access_token']}"}
+    admin = _login_admin(client)
+
+    assert client.get("/users/me", headers=user).json()["role"] == "USER"
+    before = client.get("/admin/metrics", headers=admin).json()["principal_cache"]
+    assert client.get("/users/me", headers=user).status_code == 200
+    after = client.get("/admin/metrics", headers=admin).json()["principal_cache"]
+    # the second /users/me and the admin's own metrics call are both served from the cache
+    assert after["hits"] == before["hits"] + 2
+    assert after["misses"] == before["misses"]
+
+    uid = client.get("/users/me", headers=user).json()["id"]
+    client.patch(f"/admin/users/{uid}/role", json={"role": "PROVIDER"}, headers=admin)
+    assert client.get("/users/me", headers=user).json()["role"] == "PROVIDER"
+    assert client.post("/cinema/movies", json={"title": "Cached"}, headers=user).status_code == 200
+
+    client.patch("/users/me", json={"username": "renamed"}, headers=user)
+    assert client.get("/users/me", headers=user).json()["username"] == "renamed"
+
+    assert client.delete(f"/admin/users/{uid}", headers=admin).status_code == 200
+    assert client.get("/users/me", headers=user).status_code == 401
+
+
+def test_bulk_user_import_reports_per_row_errors(client, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "bcrypt_rounds", 4)
+    monkeypatch.setattr(settings, "user_import_chunk_size", 2)
+    headers = _login_admin(client)
+    client.post("/auth/register", json={"email": "old@x.com", "username": "old", "password": "pass1234"})
+
+    csv_body = (
+        "email,username,password\n"
+        "m1@x.com,m1,pass1234\n"
+        "old@x.com,fresh,pass1234\n"
+        "not-an-email,m3,pass1234\n"
+        "m4@x.com,m1,pass1234\n"
+        "m5@x.com,m5,pass1234\n"
+    )
+    def run_import(name, body):
+        r = client.post("/admin/users/import", files={"file": (name, body)}, headers=headers)
+        assert r.status_code == 202
+        assert r.json()["status"] == "QUEUED"
+        # the test client returns once the background import has finished
+        job = client.get(r.headers["Location"], headers=headers).json()
+        assert job["status"] == "DONE"
+        return job["report"]
+
+    report = run_import("members.csv", csv_body)
+    assert report["created"] == 2
+    assert report["failed"] == 3
+    errors = {e["line"]: e["error"] for e in report["errors"]}
+    assert errors[3] == "Email already exists"
+    assert errors[4].startswith("email:")
+    assert errors[5] == "Username already exists"
+    assert report["rows_per_second"] > 0
+
+    ndjson_body = '{"email": "n1@x.com", "username": "n1", "password": "pass1234"}\n{broken\n'
+    report = run_import("members.ndjson", ndjson_body)
+    assert (report["created"], report["errors"]) == (1, [{"line": 2, "error": "Malformed row"}])
+
+    # a file that stops decoding keeps the rows before it and says where it stopped
+    monkeypatch.setattr(settings, "user_import_chunk_size", 50)
+    good = "".join(f"d{i}@x.com,d{i},pass1234\n" for i in range(400))
+    broken = b"email,username,password\n" + good.encode() + b"\xff,bad,pass1234\n"
+    report = run_import("members.csv", broken)
+    assert report["created"] > 0
+    # rows decoded in the same block as the bad byte are not imported either
+    assert report["errors"] == [{"line": report["created"] + 2, "error": report["errors"][0]["error"]}]
+    assert report["errors"][0]["error"].startswith("Unreadable data")
+
+    login = client.post("/auth/login", data={"username": "m5", "password": "pass1234"})
+    assert login.status_code == 200
+
+
+def test_rating_summaries_follow_reviews_and_deletes(client):
+    from app.core.deps import get_db
+    from app.main import app
+    from app.services.ratings import rebuild_ratings
+
+    admin = _login_admin(client)
+    drama_a, drama_b, comedy = (
+        client.post("/cinema/movies", json={"title": title, "category": category}, headers=admin).json()["id"]
+        for title, category in [("Rated A", "Drama"), ("Rated B", "Drama"), ("Rated C", "Comedy")]
+    )
+    users = []
+    for i in range(3):
+        reg = client.post("/auth/register", json={"email": f"rate{i}@x.com", "username": f"rate{i}", "password": "pass1234"})
+        users.append({"Authorization": f"Bearer {reg.json()['access_token']}"})
+    for movie_id, user, rating in [(drama_a, 0, 5), (drama_a, 1, 4), (drama_b, 0, 3), (comedy, 2, 5)]:
+        assert client.post(f"/movies/{movie_id}/reviews", json={"rating": rating}, headers=users[user]).status_code == 200
+
+    assert client.get(f"/cinema/movies/{drama_a}").json()["rating"] == {"count": 2, "average": 4.5, "histogram": [0, 0, 0, 1, 1]}
+
+    def ids(**params):
+        return [m["id"] for m in client.get("/cinema/movies", params=params).json()]
+
+    assert ids(sort="rating") == [comedy, drama_a, drama_b]
+    assert ids(sort="rating", category="Drama") == [drama_a, drama_b]
+    first = client.get("/cinema/movies", params={"sort": "rating", "category": "Drama", "limit": 1})
+    assert [m["id"] for m in first.json()] == [drama_a]
+    cursor = first.headers["X-Next-Cursor"]
+    assert ids(sort="rating", category="Drama", limit=1, cursor=cursor) == [drama_b]
+    assert ids(min_rating=4) == [comedy, drama_a]
+
+    # deleting a reviewer takes their ratings out of every summary
+    me = client.get("/users/me", headers=users[0]).json()["id"]
+    assert client.delete(f"/admin/users/{me}", headers=admin).status_code == 200
+    assert client.get(f"/cinema/movies/{drama_a}").json()["rating"] == {"count": 1, "average": 4.0, "histogram": [0, 0, 0, 1, 0]}
+    assert client.get(f"/cinema/movies/{drama_b}").json()["rating"] is None
+    assert ids(sort="rating") == [comedy, drama_a]
+
+    # a rebuild from the reviews table agrees with the running totals
+    incremental = client.get("/cinema/movies", params={"sort": "rating"}).json()
+    db_gen = app.dependency_overrides[get_db]()
+    db = next(db_gen)
+    assert rebuild_ratings(db) == 2
+    db_gen.close()
+    assert client.get("/cinema/movies", params={"sort": "rating"}).json() == incremental
+
+    assert client.delete(f"/admin/movies/{comedy}", headers=admin).status_code == 200
+    assert ids(sort="rating") == [drama_a]
+
+
+def test_recommendations_from_co_liked_movies(client, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "recommendation_refresh_seconds", 0)
+    admin = _login_admin(client)
+    a, b, c, d, e = (
+        client.post("/cinema/movies", json={"title": f"Co {t}", "category": "Drama"}, headers=admin).json()["id"]
+        for t in "ABCDE"
+    )
+    hall = client.post("/cinema/halls", json={"name": "CoHall", "rows": 2, "cols": 2}, headers=admin).json()["id"]
+    for movie_id, starts_at in ((d, "2031-01-01T10:00:00"), (e, "2031-01-02T10:00:00")):
+        shown = client.post("/cinema/screenings", json={"movie_id": movie_id, "hall_id": hall, "starts_at": starts_at}, headers=admin)
+        assert shown.status_code == 200
+    users = []
+    for i in range(5):
+        reg = client.post("/auth/register", json={"email": f"co{i}@x.com", "username": f"co{i}", "password": "pass1234"})
+        users.append({"Authorization": f"Bearer {reg.json()['access_token']}"})
+    for user, movies in enumerate([[a, b, c], [a, b], [a, d], [a]]):
+        for movie_id in movies:
+            assert client.post(f"/favorites/movies/{movie_id}", headers=users[user]).status_code == 200
+    # low ratings are not likes; high ones are
+    assert client.post(f"/movies/{c}/reviews", json={"rating": 2}, headers=users[1]).status_code == 200
+    assert client.post(f"/movies/{d}/reviews", json={"rating": 5}, headers=users[2]).status_code == 200
+    assert client.post(f"/movies/{e}/reviews", json={"rating": 4}, headers=users[4]).status_code == 200
+
+    def recs(user):
+        r = client.get("/users/me/recommendations", headers=users[user])
+        assert r.status_code == 200
+        return [(x["movie"]["id"], x["score"], x["has_upcoming_screenings"]) for x in r.json()]
+
+    # sim(A,B) = 2/sqrt(4*2); C and D 1/sqrt(4*1), D doubled for its screening;
+    # E is not co-liked with anything and tops up the list as a rated movie showing
+    assert recs(3) == [(d, 1.0, True), (b, 0.7071, False), (c, 0.5, False), (e, 0.0, True)]
+
+    # new likes are folded in without a rebuild
+    assert client.post(f"/favorites/movies/{b}", headers=users[3]).status_code == 200
+    assert [movie_id for movie_id, _, _ in recs(3)] == [c, d, e]
+
+    # no neighbours for what they like: top-rated movies that are still showing
+    assert recs(4) == [(d, 0.0, True)]
+
+    stats = client.get("/admin/metrics", headers=admin).json()["recommendations"]
+    assert stats["rebuilds"] == 1 and stats["refreshes"] >= 1
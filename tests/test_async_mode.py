@@ -0,0 +1,110 @@
+"""Async database mode integration tests.
+
+Auth and catalog routes stay on the sync session while reservations and
+availability go through AsyncSession, so both share a temporary SQLite file.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.deps import get_async_db, get_db
+from app.db.base import Base
+from app.db.init_db import ensure_admin
+from app.db.session import configure_sqlite
+from app.routers.auth import router as auth_router
+from app.routers.availability_async import router as availability_async_router
+from app.routers.cinema import router as cinema_router
+from app.routers.reservations_async import router as reservations_async_router
+from app.services.seat_map import seat_maps
+
+
+@pytest.fixture()
+def async_client(tmp_path):
+    pytest.importorskip("aiosqlite")
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    configure_sqlite(engine)
+    Base.metadata.create_all(bind=engine)
+    SyncSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with SyncSession() as db:
+        ensure_admin(db)
+
+    async_engine = create_async_engine(url.replace("sqlite:", "sqlite+aiosqlite:", 1))
+    configure_sqlite(async_engine.sync_engine)
+    AsyncSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    def override_get_db():
+        db = SyncSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with AsyncSession() as db:
+            yield db
+
+    app = FastAPI()
+    for router in (auth_router, cinema_router, availability_async_router, reservations_async_router):
+        app.include_router(router)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    seat_maps.clear()
+
+    with TestClient(app) as c:
+        yield c
+    engine.dispose()
+
+
+def _login(client, username, password):
+    r = client.post("/auth/login", data={"username": username, "password": password})
+    assert r.status_code == 200
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def test_async_reservation_flow(async_client):
+    admin = _login(async_client, "admin", "admin1234")
+    m = async_client.post("/cinema/movies", json={"title": "Async", "description": "", "category": "Action"}, headers=admin)
+    h = async_client.post("/cinema/halls", json={"name": "AsyncHall", "rows": 3, "cols": 4}, headers=admin)
+    starts_at = (datetime.now(timezone.utc) + timedelta(hours=2)).isoformat()
+    s = async_client.post(
+        "/cinema/screenings",
+        json={"movie_id": m.json()["id"], "hall_id": h.json()["id"], "starts_at": starts_at},
+        headers=admin,
+    )
+    screening_id = s.json()["id"]
+
+    assert async_client.post("/auth/register", json={"email": "as@example.com", "username": "u_as", "password": "pass1234"}).status_code == 200
+    user = _login(async_client, "u_as", "pass1234")
+
+    res = async_client.post("/reservations", json={"screening_id": screening_id, "seats": [{"seat_row": 1, "seat_col": 1}]}, headers=user)
+    assert res.status_code == 200, res.text
+    assert res.json()["tickets"] == [{"seat_row": 1, "seat_col": 1}]
+
+    clash = async_client.post("/reservations", json={"screening_id": screening_id, "seats": [{"seat_row": 1, "seat_col": 1}]}, headers=user)
+    assert clash.status_code == 409
+
+    best = async_client.post("/reservations", json={"screening_id": screening_id, "quantity": 2}, headers=user)
+    assert best.status_code == 200
+    assert len(best.json()["tickets"]) == 2
+
+    avail = async_client.get(f"/screenings/{screening_id}/availability").json()
+    assert len(avail["taken_seats"]) == 3
+
+    conf = async_client.post(f"/reservations/{res.json()['id']}/confirm", json={"method": "stripe_mock"}, headers=user)
+    assert conf.status_code == 200
+    assert conf.json()["status"] == "CONFIRMED"
+
+    cancel = async_client.post(f"/reservations/{best.json()['id']}/cancel", headers=user)
+    assert cancel.status_code == 200
+    assert cancel.json()["tickets"] == []
+
+    mine = async_client.get("/reservations/me", headers=user).json()
+    assert [r["status"] for r in mine] == ["CANCELED", "CONFIRMED"]
+    assert len(async_client.get(f"/screenings/{screening_id}/availability").json()["taken_seats"]) == 1
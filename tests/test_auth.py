@@ -1,3 +1,6 @@
+import pytest
+
+
 def test_register_and_login(client):
     r = client.post("/auth/register", json={"email": "a@b.com", "username": "user1", "password": "pass1234"})
     assert r.status_code == 200
@@ -19,3 +22,203 @@ def test_register_and_login(client):
         headers={"Content-Type": "application/x-www-form-urlencoded"},
     )
     assert bad.status_code == 401
+
+
+def _stored_hash(username):
+    from app.core.deps import get_db
+    from app.main import app
+    from app.models.user import User
+
+    db = next(app.dependency_overrides[get_db]())
+    try:
+        return db.query(User).filter(User.username == username).one().hashed_password
+    finally:
+        db.close()
+
+
+def test_login_rehashes_when_cost_changes(client, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "bcrypt_rounds", 4)
+    client.post("/auth/register", json={"email": "c@d.com", "username": "rehash", "password": "pass1234"})
+    assert _stored_hash("rehash").startswith("$2b$04$")
+
+    monkeypatch.setattr(settings, "bcrypt_rounds", 5)
+    r = client.post("/auth/login", data={"username": "rehash", "password": "pass1234"})
+    assert r.status_code == 200
+    assert _stored_hash("rehash").startswith("$2b$05$")
+    assert client.post("/auth/login", data={"username": "rehash", "password": "pass1234"}).status_code == 200
+
+
+def test_hashing_backpressure_returns_503(client, monkeypatch):
+    import threading
+
+    from app.core.security import password_hasher
+
+    full = threading.BoundedSemaphore(1)
+    full.acquire()
+    monkeypatch.setattr(password_hasher, "workers", 1)
+    monkeypatch.setattr(password_hasher, "queue_timeout", 0.01)
+    monkeypatch.setattr(password_hasher, "_slots", full)
+    r = client.post("/auth/login", data={"username": "admin", "password": "admin1234"})
+    assert r.status_code == 503
+    assert r.headers["retry-after"] == "1"
+
+
+def test_stateless_auth_revokes_tokens_on_role_change(client, monkeypatch):
+    from app.core.config import settings
+    from app.core.principals import principals
+
+    monkeypatch.setattr(settings, "stateless_auth", True)
+    admin_login = client.post("/auth/login", data={"username": "admin", "password": "admin1234"})
+    admin = {"Authorization": f"Bearer {admin_login.json()['access_token']}"}
+    reg = client.post("/auth/register", json={"email": "p@p.com", "username": "prov", "password": "pass1234"})
+    uid = client.get("/users/me", headers={"Authorization": f"Bearer {reg.json()['access_token']}"}).json()["id"]
+    client.patch(f"/admin/users/{uid}/role", json={"role": "PROVIDER"}, headers=admin)
+
+    login = client.post("/auth/login", data={"username": "prov", "password": "pass1234"})
+    provider = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    before = principals.stats()
+    assert client.post("/cinema/movies", json={"title": "Claims"}, headers=provider).status_code == 200
+    # authorized from the token's claims, without resolving the user
+    assert principals.stats() == before
+
+    client.patch(f"/admin/users/{uid}/role", json={"role": "USER"}, headers=admin)
+    r = client.post("/cinema/movies", json={"title": "Revoked"}, headers=provider)
+    assert r.status_code == 401
+    assert r.json()["detail"] == "Token revoked"
+
+    relogin = client.post("/auth/login", data={"username": "prov", "password": "pass1234"})
+    user = {"Authorization": f"Bearer {relogin.json()['access_token']}"}
+    assert client.post("/cinema/movies", json={"title": "Denied"}, headers=user).status_code == 403
+
+
+def test_stateless_auth_revokes_tokens_on_rename(client, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "stateless_auth", True)
+    admin_login = client.post("/auth/login", data={"username": "admin", "password": "admin1234"})
+    admin = {"Authorization": f"Bearer {admin_login.json()['access_token']}"}
+    assert client.get("/admin/users", headers=admin).status_code == 200
+
+    r = client.patch("/users/me", json={"username": "root"}, headers=admin)
+    assert r.status_code == 200
+    revoked = client.get("/admin/users", headers=admin)
+    assert revoked.status_code == 401
+    assert revoked.json()["detail"] == "Token revoked"
+    # routes that only need a signed-in user reject the old token too
+    me = client.get("/users/me", headers=admin)
+    assert me.status_code == 401
+    assert me.json()["detail"] == "Token revoked"
+
+    relogin = client.post("/auth/login", data={"username": "root", "password": "admin1234"})
+    fresh = {"Authorization": f"Bearer {relogin.json()['access_token']}"}
+    assert client.get("/admin/users", headers=fresh).status_code == 200
+    assert client.get("/users/me", headers=fresh).json()["username"] == "root"
+
+
+def test_principal_cache_skips_loads_that_raced_an_invalidation():
+    import hashlib
+
+    from app.core.principals import Principal, PrincipalCache
+    from app.models.user import UserRole
+
+    cache = PrincipalCache(max_entries=8, ttl_seconds=60)
+    before = cache.generation()
+    cache.invalidate(7)  # e.g. a role change committed while the row was being read
+    cache.put("token", Principal(7, UserRole.USER, "u", "u@example.com"), before)
+    assert cache.get(7, "token") is None
+
+    cache.put("token", Principal(7, UserRole.PROVIDER, "u", "u@example.com"), cache.generation())
+    assert cache.get(7, "token").role == UserRole.PROVIDER
+    # keyed by the token's digest, not the token itself
+    assert list(cache._entries) == [(7, hashlib.sha256(b"token").digest())]
+
+
+def test_login_is_rate_limited_per_identity_and_ip(client, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "auth_identity_burst", 2)
+    monkeypatch.setattr(settings, "auth_identity_per_minute", 1.0)
+    for _ in range(2):
+        assert client.post("/auth/login", data={"username": "nobody", "password": "x"}).status_code == 401
+    limited = client.post("/auth/login", data={"username": "NoBody ", "password": "x"})
+    assert limited.status_code == 429
+    assert int(limited.headers["retry-after"]) >= 1
+
+    # another identity from the same client still gets through
+    ok = client.post("/auth/login", data={"username": "admin", "password": "admin1234"})
+    assert ok.status_code == 200
+    admin = {"Authorization": f"Bearer {ok.json()['access_token']}"}
+
+    monkeypatch.setattr(settings, "auth_ip_burst", 1)
+    monkeypatch.setattr(settings, "auth_ip_per_minute", 1.0)
+    client.post("/auth/register", json={"email": "r1@x.com", "username": "r1", "password": "pass1234"})
+    r = client.post("/auth/register", json={"email": "r2@x.com", "username": "r2", "password": "pass1234"})
+    assert r.status_code == 429
+
+    counters = client.get("/admin/metrics", headers=admin).json()["auth_rate_limit"]
+    assert counters["identity_rejected"] == 1
+    assert counters["ip_rejected"] == 1
+
+
+def test_sqlite_bucket_store_is_shared_between_instances(tmp_path):
+    from app.core.rate_limit import SqliteBucketStore
+
+    path = str(tmp_path / "buckets.db")
+    first, second = SqliteBucketStore(path), SqliteBucketStore(path)
+    assert first.take([("ip:1.2.3.4", 2, 1 / 60)]) == [0]
+    assert second.take([("ip:1.2.3.4", 2, 1 / 60)]) == [0]
+    assert first.take([("ip:1.2.3.4", 2, 1 / 60)])[0] > 0
+    assert second.take([("ip:5.6.7.8", 2, 1 / 60)]) == [0]
+
+
+def _request(peer, forwarded=None):
+    from starlette.requests import Request
+
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "client": (peer, 1234), "headers": headers})
+
+
+def test_client_ip_is_read_through_trusted_proxies_only(monkeypatch):
+    from app.core.config import settings
+    from app.core.rate_limit import client_ip
+
+    # untrusted peers cannot pick their own bucket with the header
+    assert client_ip(_request("203.0.113.9", "198.51.100.1")) == "203.0.113.9"
+    monkeypatch.setattr(settings, "trusted_proxies", ["10.0.0.0/8"])
+    assert client_ip(_request("10.0.0.2", "198.51.100.1, 10.0.0.7")) == "198.51.100.1"
+    # a client-supplied left-most entry is ignored in favour of what the proxy appended
+    assert client_ip(_request("10.0.0.2", "1.1.1.1, 198.51.100.1")) == "198.51.100.1"
+    assert client_ip(_request("203.0.113.9", "198.51.100.1")) == "203.0.113.9"
+
+
+@pytest.mark.parametrize("store_kind", ["memory", "sqlite"])
+def test_rejected_attempts_spend_no_tokens_and_identity_spans_ips(monkeypatch, tmp_path, store_kind):
+    from fastapi import HTTPException
+
+    from app.core.config import settings
+    from app.core.rate_limit import AuthRateLimiter, MemoryBucketStore, SqliteBucketStore
+
+    store = MemoryBucketStore() if store_kind == "memory" else SqliteBucketStore(str(tmp_path / "b.db"))
+    limiter = AuthRateLimiter(store)
+    monkeypatch.setattr(settings, "auth_ip_burst", 3)
+    monkeypatch.setattr(settings, "auth_ip_per_minute", 0.001)
+    monkeypatch.setattr(settings, "auth_identity_burst", 1)
+    monkeypatch.setattr(settings, "auth_identity_per_minute", 0.001)
+    attacker = _request("203.0.113.9")
+
+    limiter.check(attacker, "victim")
+    for _ in range(5):
+        with pytest.raises(HTTPException):
+            limiter.check(attacker, "victim")
+    # the identity rejections left the IP bucket untouched: two tokens remain
+    limiter.check(attacker, "other1")
+    limiter.check(attacker, "other2")
+    with pytest.raises(HTTPException):
+        limiter.check(attacker, "other3")
+    # moving to other addresses does not buy more attempts on the same account
+    for i in range(3):
+        with pytest.raises(HTTPException):
+            limiter.check(_request(f"198.51.100.{i + 1}"), "victim")
+    assert limiter.stats()["identity_rejected"] == 8
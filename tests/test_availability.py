@@ -0,0 +1,309 @@
+"""Seat availability integration tests."""
+
+import asyncio
+import base64
+import threading
+from datetime import datetime, timedelta, timezone
+
+from app.services.seat_events import seat_events
+from app.services.seat_map import SeatMap, SeatMapCache, seat_maps
+
+
+def _admin_headers(client):
+    r = client.post(
+        "/auth/login",
+        data={"username": "admin", "password": "admin1234"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    assert r.status_code == 200
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def _register_user(client, email, username):
+    r = client.post("/auth/register", json={"email": email, "username": username, "password": "pass1234"})
+    assert r.status_code == 200
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def _create_screening(client, admin, suffix, rows=4, cols=6):
+    m = client.post("/cinema/movies", json={"title": f"Avail-{suffix}", "description": "", "category": "Action"}, headers=admin)
+    h = client.post("/cinema/halls", json={"name": f"AvailHall-{suffix}", "rows": rows, "cols": cols}, headers=admin)
+    starts_at = (datetime.now(timezone.utc) + timedelta(hours=2)).isoformat()
+    s = client.post(
+        "/cinema/screenings",
+        json={"movie_id": m.json()["id"], "hall_id": h.json()["id"], "starts_at": starts_at},
+        headers=admin,
+    )
+    return s.json()["id"]
+
+
+def _taken(client, screening_id):
+    r = client.get(f"/screenings/{screening_id}/availability")
+    assert r.status_code == 200
+    return {(s["seat_row"], s["seat_col"]) for s in r.json()["taken_seats"]}
+
+
+def test_availability_not_found(client):
+    assert client.get("/screenings/999999/availability").status_code == 404
+
+
+def test_availability_tracks_reservation_lifecycle(client):
+    admin = _admin_headers(client)
+    screening_id = _create_screening(client, admin, "life")
+    user = _register_user(client, "av1@example.com", "u_av1")
+
+    avail = client.get(f"/screenings/{screening_id}/availability").json()
+    assert avail["hall"] == {"rows": 4, "cols": 6}
+    assert avail["taken_seats"] == []
+
+    res = client.post(
+        "/reservations",
+        json={"screening_id": screening_id, "seats": [{"seat_row": 2, "seat_col": 3}, {"seat_row": 4, "seat_col": 6}]},
+        headers=user,
+    )
+    assert res.status_code == 200
+    assert _taken(client, screening_id) == {(2, 3), (4, 6)}
+
+    cancel = client.post(f"/reservations/{res.json()['id']}/cancel", headers=user)
+    assert cancel.status_code == 200
+    assert _taken(client, screening_id) == set()
+
+
+def test_decline_and_admin_delete_release_seats(client):
+    admin = _admin_headers(client)
+    screening_id = _create_screening(client, admin, "release")
+    user = _register_user(client, "av2@example.com", "u_av2")
+
+    r1 = client.post("/reservations", json={"screening_id": screening_id, "seats": [{"seat_row": 1, "seat_col": 1}]}, headers=user)
+    r2 = client.post("/reservations", json={"screening_id": screening_id, "seats": [{"seat_row": 1, "seat_col": 2}]}, headers=user)
+    assert _taken(client, screening_id) == {(1, 1), (1, 2)}
+
+    assert client.post(f"/provider/reservations/{r1.json()['id']}/decline", headers=admin).status_code == 200
+    assert _taken(client, screening_id) == {(1, 2)}
+
+    assert client.delete(f"/admin/reservations/{r2.json()['id']}", headers=admin).status_code == 200
+    assert _taken(client, screening_id) == set()
+
+    # seats released by a decline can be booked again
+    again = client.post("/reservations", json={"screening_id": screening_id, "seats": [{"seat_row": 1, "seat_col": 1}]}, headers=user)
+    assert again.status_code == 200
+
+
+def test_availability_served_from_cache(client):
+    admin = _admin_headers(client)
+    screening_id = _create_screening(client, admin, "cache")
+
+    _taken(client, screening_id)
+    hits = seat_maps.hits
+    _taken(client, screening_id)
+    assert seat_maps.hits == hits + 1
+
+
+def test_stale_load_is_not_cached_after_eviction():
+    cache = SeatMapCache(max_entries=1, ttl_seconds=0)
+    cache.put(1, SeatMap(1, 2), cache.generation())
+    stale = cache.generation()
+    cache.take(1, [(1, 1)])
+    cache.put(2, SeatMap(1, 2), cache.generation())  # evicts screening 1
+
+    cache.put(1, SeatMap(1, 2), stale)
+    assert cache.get(1) is None
+    cache.put(1, SeatMap(1, 2, [(1, 1)]), cache.generation())
+    assert cache.get(1).taken_seats() == [(1, 1)]
+
+
+def test_availability_compact_formats(client):
+    admin = _admin_headers(client)
+    screening_id = _create_screening(client, admin, "compact", rows=2, cols=6)
+    user = _register_user(client, "av3@example.com", "u_av3")
+    seats = [{"seat_row": 1, "seat_col": c} for c in (3, 4, 5)] + [{"seat_row": 2, "seat_col": 1}]
+    assert client.post("/reservations", json={"screening_id": screening_id, "seats": seats}, headers=user).status_code == 200
+
+    bitmap = client.get(f"/screenings/{screening_id}/availability", params={"format": "bitmap"}).json()
+    assert bitmap["hall"] == {"rows": 2, "cols": 6}
+    assert "taken_seats" not in bitmap
+    raw = base64.b64decode(bitmap["seat_map"])
+    bits = "".join(f"{b:08b}" for b in raw)[: 2 * 6]
+    assert bits == "001110" + "100000"
+
+    rle = client.get(f"/screenings/{screening_id}/availability", params={"format": "rle"}).json()
+    assert rle["seat_map"] == "2.3x1./1x5."
+
+    assert client.get(f"/screenings/{screening_id}/availability", params={"format": "xml"}).status_code == 422
+
+
+def test_seat_changes_are_fanned_out_to_subscribers():
+    async def scenario():
+        sub = seat_events.subscribe(4242)
+        other = seat_events.subscribe(4243)
+        try:
+            # writers run in the threadpool, not on the loop
+            writer = threading.Thread(target=lambda: (seat_maps.take(4242, [(1, 2)]), seat_maps.release(4242, [(1, 2)])))
+            writer.start()
+            writer.join()
+            taken = await asyncio.wait_for(sub.queue.get(), timeout=1)
+            released = await asyncio.wait_for(sub.queue.get(), timeout=1)
+            seat_maps.invalidate(4242)
+            reset = await asyncio.wait_for(sub.queue.get(), timeout=1)
+            return taken, released, reset, other.queue.qsize()
+        finally:
+            seat_events.unsubscribe(sub)
+            seat_events.unsubscribe(other)
+
+    taken, released, reset, other_pending = asyncio.run(scenario())
+    assert taken == {"type": "seat_taken", "screening_id": 4242, "seats": [{"seat_row": 1, "seat_col": 2}]}
+    assert released["type"] == "seat_released"
+    assert reset == {"type": "reset", "screening_id": 4242}
+    assert other_pending == 0
+    assert seat_events.subscriber_count(4242) == 0
+
+
+def test_other_workers_bookings_reach_the_stream_through_polling(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "availability_stream_poll_seconds", 0.01)
+    # what the database holds, as written by some other worker
+    database = {(1, 1)}
+
+    async def poll():
+        return set(database)
+
+    async def next_event(sub):
+        return await asyncio.wait_for(sub.queue.get(), timeout=1)
+
+    async def scenario():
+        sub = seat_events.subscribe(4244, poll)
+        sub.known = {(1, 1)}
+        try:
+            database.add((2, 3))
+            taken = await next_event(sub)
+            database.discard((1, 1))
+            released = await next_event(sub)
+            # a local booking is published once, and the poller does not repeat it
+            seat_maps.take(4244, [(3, 3)])
+            database.add((3, 3))
+            local = await next_event(sub)
+            await asyncio.sleep(0.05)
+            return taken, released, local, sub.queue.qsize()
+        finally:
+            seat_events.unsubscribe(sub)
+
+    taken, released, local, pending = asyncio.run(scenario())
+    assert taken == {"type": "seat_taken", "screening_id": 4244, "seats": [{"seat_row": 2, "seat_col": 3}]}
+    assert released == {"type": "seat_released", "screening_id": 4244, "seats": [{"seat_row": 1, "seat_col": 1}]}
+    assert local["seats"] == [{"seat_row": 3, "seat_col": 3}]
+    assert pending == 0
+    assert seat_events.subscriber_count(4244) == 0
+
+
+def test_poll_started_before_a_local_booking_does_not_release_it(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "availability_stream_poll_seconds", 0.01)
+
+    async def scenario():
+        read_started = asyncio.Event()
+        finish_read = asyncio.Event()
+
+        async def poll():
+            if read_started.is_set():
+                return {(2, 2)}
+            # this read ran before the booking below committed
+            read_started.set()
+            await finish_read.wait()
+            return set()
+
+        sub = seat_events.subscribe(4245, poll)
+        sub.known = set()
+        try:
+            await asyncio.wait_for(read_started.wait(), timeout=1)
+            seat_maps.take(4245, [(2, 2)])
+            local = await asyncio.wait_for(sub.queue.get(), timeout=1)
+            finish_read.set()
+            await asyncio.sleep(0.05)
+            return local, sub.queue.qsize(), set(sub.known)
+        finally:
+            seat_events.unsubscribe(sub)
+
+    local, pending, known = asyncio.run(scenario())
+    assert local["type"] == "seat_taken"
+    assert pending == 0
+    assert known == {(2, 2)}
+
+
+def test_availability_stream_unknown_screening(client):
+    assert client.get("/screenings/999999/availability/stream").status_code == 404
+
+
+def test_availability_etag_follows_seat_changes(client):
+    admin = _admin_headers(client)
+    screening_id = _create_screening(client, admin, "etag")
+    user = _register_user(client, "av4@example.com", "u_av4")
+    url = f"/screenings/{screening_id}/availability"
+
+    etag = client.get(url).headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    client.post("/reservations", json={"screening_id": screening_id, "seats": [{"seat_row": 1, "seat_col": 1}]}, headers=user)
+    fresh = client.get(url, headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.json()["taken_seats"] == [{"seat_row": 1, "seat_col": 1}]
+
+
+def test_showtimes_join_movie_hall_and_seats_left(client, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "showtimes_max_age_seconds", 3600)
+    admin = _admin_headers(client)
+    user = _register_user(client, "show@example.com", "u_show")
+    movie = client.post("/cinema/movies", json={"title": "Showing", "category": "Drama", "runtime_minutes": 95}, headers=admin).json()
+    halls = [
+        client.post("/cinema/halls", json={"name": f"Show {i}", "rows": 3, "cols": 4}, headers=admin).json()["id"]
+        for i in range(2)
+    ]
+    day = (datetime.now(timezone.utc) + timedelta(days=3)).date()
+    noon = datetime(day.year, day.month, day.day, 12, tzinfo=timezone.utc)
+
+    def schedule(hall_id, starts_at):
+        body = {"movie_id": movie["id"], "hall_id": hall_id, "starts_at": starts_at.isoformat()}
+        return client.post("/cinema/screenings", json=body, headers=admin).json()["id"]
+
+    later = schedule(halls[0], noon + timedelta(hours=6))
+    earlier = schedule(halls[1], noon)
+    schedule(halls[0], noon + timedelta(days=1))
+    seats = [{"seat_row": 1, "seat_col": 1}, {"seat_row": 1, "seat_col": 2}]
+    assert client.post("/reservations", json={"screening_id": later, "seats": seats}, headers=user).status_code == 200
+
+    r = client.get("/cinema/showtimes", params={"date_from": day.isoformat()})
+    assert r.status_code == 200
+    assert "max-age=" in r.headers["Cache-Control"]
+    shows = r.json()
+    assert [s["screening_id"] for s in shows] == [earlier, later]
+    assert shows[1] | {"starts_at": None, "ends_at": None} == {
+        "screening_id": later,
+        "starts_at": None,
+        "ends_at": None,
+        "movie_id": movie["id"],
+        "movie_title": "Showing",
+        "movie_category": "Drama",
+        "runtime_minutes": 95,
+        "hall_id": halls[0],
+        "hall_name": "Show 0",
+        "seats_total": 12,
+        "seats_left": 10,
+    }
+    assert shows[0]["seats_left"] == 12
+
+    # the response is cached per range; a schedule change shows up at once
+    again = client.get("/cinema/showtimes", params={"date_from": day.isoformat()})
+    assert again.json() == shows and again.headers["ETag"] == r.headers["ETag"]
+    assert client.get("/cinema/showtimes", params={"date_from": day.isoformat()}, headers={"If-None-Match": r.headers["ETag"]}).status_code == 304
+    schedule(halls[1], noon + timedelta(hours=3))
+    assert len(client.get("/cinema/showtimes", params={"date_from": day.isoformat()}).json()) == 3
+
+    two_days = {"date_from": day.isoformat(), "date_to": (day + timedelta(days=1)).isoformat()}
+    assert len(client.get("/cinema/showtimes", params=two_days).json()) == 4
+    backwards = {"date_from": day.isoformat(), "date_to": (day - timedelta(days=1)).isoformat()}
+    assert client.get("/cinema/showtimes", params=backwards).status_code == 400
+    too_long = {"date_from": day.isoformat(), "date_to": (day + timedelta(days=30)).isoformat()}
+    assert client.get("/cinema/showtimes", params=too_long).status_code == 400
@@ -54,4 +54,217 @@ def test_screening_crud(client):
 
     # delete
     d = client.delete(f"/cinema/screenings/{sid}", headers=headers)
-    assert d.status_code == 200
\ No newline at end of file
+    assert d.status_code == 200
+
+def test_catalog_etags(client):
+    headers = _login_admin(client)
+
+    first = client.get("/cinema/movies")
+    etag = first.headers["ETag"]
+    again = client.get("/cinema/movies", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+
+    # a write bumps the version, so the old tag no longer matches
+    client.post("/cinema/movies", json={"title": "Tagged", "description": "", "category": "Drama"}, headers=headers)
+    changed = client.get("/cinema/movies", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert [m["title"] for m in changed.json()] == ["Tagged"]
+
+    # other datasets are unaffected by movie writes
+    halls_tag = client.get("/cinema/halls").headers["ETag"]
+    client.put(f"/cinema/movies/{changed.json()[0]['id']}", json={"title": "Retagged"}, headers=headers)
+    assert client.get("/cinema/halls", headers={"If-None-Match": halls_tag}).status_code == 304
+
+
+def test_movie_search_is_ranked_prefix_and_stays_in_sync(client, monkeypatch):
+    headers = _login_admin(client)
+    movies = [
+        {"title": "Starfall", "description": "A quiet drama", "category": "Drama"},
+        {"title": "Harbour Lights", "description": "Stars over a fishing town", "category": "Drama"},
+        {"title": "Night Shift", "description": "", "category": "Thriller"},
+    ]
+    ids = [client.post("/cinema/movies", json=m, headers=headers).json()["id"] for m in movies]
+
+    # prefix match across title and description; the title hit ranks first
+    found = client.get("/cinema/movies", params={"query": "star"}).json()
+    assert [m["id"] for m in found] == [ids[0], ids[1]]
+    assert [m["id"] for m in client.get("/cinema/movies", params={"query": "thrill"}).json()] == [ids[2]]
+    assert client.get("/cinema/movies", params={"query": "star", "limit": 1}).json()[0]["id"] == ids[0]
+    assert client.get("/cinema/movies", params={"query": "star", "category": "Thriller"}).json() == []
+    assert client.get("/cinema/movies", params={"query": "\"*)"}).json() == []
+
+    client.put(f"/cinema/movies/{ids[2]}", json={"title": "Starlight Shift"}, headers=headers)
+    client.delete(f"/cinema/movies/{ids[0]}", headers=headers)
+    found = client.get("/cinema/movies", params={"query": "star"}).json()
+    assert {m["id"] for m in found} == {ids[1], ids[2]}
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "search_limit_default", 1)
+    assert len(client.get("/cinema/movies", params={"query": "st"}).json()) == 1
+
+    # backends without FTS5 fall back to LIKE over the same columns
+    from app.services import movie_search
+
+    monkeypatch.setattr(movie_search, "fts_available", lambda db: False)
+    assert [m["id"] for m in client.get("/cinema/movies", params={"query": "fishing"}).json()] == [ids[1]]
+
+
+def _walk(client, url, **params):
+    seen, cursor, pages = [], None, 0
+    while True:
+        r = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert r.status_code == 200
+        seen.extend(item["id"] for item in r.json())
+        pages += 1
+        cursor = r.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return seen, pages
+
+
+def test_lists_are_keyset_paginated(client):
+    headers = _login_admin(client)
+    movie_ids = [
+        client.post("/cinema/movies", json={"title": f"Paged {i}", "description": "", "category": "Paged"}, headers=headers).json()["id"]
+        for i in range(5)
+    ]
+    seen, pages = _walk(client, "/cinema/movies", category="Paged", limit=2)
+    assert seen == sorted(movie_ids, reverse=True)
+    assert pages == 3
+
+    # screenings page on (starts_at, id): equal start times must neither repeat nor vanish
+    base = datetime.now(UTC) + timedelta(days=3)
+    screening_ids = []
+    for i, hours in enumerate((2, 0, 1, 1, 1)):
+        hall = client.post("/cinema/halls", json={"name": f"Paged hall {i}", "rows": 2, "cols": 2}, headers=headers)
+        starts = (base + timedelta(hours=hours)).isoformat()
+        s = client.post("/cinema/screenings", json={"movie_id": movie_ids[0], "hall_id": hall.json()["id"], "starts_at": starts}, headers=headers)
+        screening_ids.append(s.json()["id"])
+    seen, _ = _walk(client, "/cinema/screenings", movie_id=movie_ids[0], limit=2)
+    order = [screening_ids[1], *sorted(screening_ids[2:]), screening_ids[0]]
+    assert seen == order
+
+    assert client.get("/cinema/movies", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/cinema/screenings", params={"cursor": "WzFd"}).status_code == 400
+
+
+def test_catalog_lists_are_served_from_the_response_cache(client):
+    headers = _login_admin(client)
+    for i in range(3):
+        client.post("/cinema/movies", json={"title": f"Cached {i}", "description": "", "category": "Drama"}, headers=headers)
+    client.post("/cinema/halls", json={"name": "Cached hall", "rows": 2, "cols": 2}, headers=headers)
+
+    def stats():
+        return client.get("/admin/metrics", headers=headers).json()["response_cache"]
+
+    first = client.get("/cinema/movies", params={"category": "Drama", "limit": 2})
+    client.get("/cinema/halls")
+    before = stats()
+    # same parameters in a different order hit the same entry, headers included
+    again = client.get("/cinema/movies?limit=2&category=Drama")
+    assert again.json() == first.json()
+    assert again.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+    assert again.headers["ETag"] == first.headers["ETag"]
+    assert stats()["hits"] == before["hits"] + 1
+
+    # a movie write drops the movie entries only, and the next read sees it
+    client.put(f"/cinema/movies/{first.json()[0]['id']}", json={"title": "Recached"}, headers=headers)
+    after_write = stats()
+    assert after_write["invalidations"] == before["invalidations"] + 1
+    assert after_write["entries"] == before["entries"] - 1
+    assert client.get("/cinema/movies?limit=2&category=Drama").json()[0]["title"] == "Recached"
+    client.get("/cinema/halls")
+    assert stats()["hits"] == after_write["hits"] + 1
+    assert 0 < stats()["hit_ratio"] < 1
+
+
+def test_screening_overlap_uses_runtime_and_turnaround(client, max_queries):
+    headers = _login_admin(client)
+    movie = client.post("/cinema/movies", json={"title": "Epic", "runtime_minutes": 180}, headers=headers).json()
+    assert movie["runtime_minutes"] == 180
+    short = client.post("/cinema/movies", json={"title": "Short", "runtime_minutes": 90}, headers=headers).json()
+    hall_id = client.post("/cinema/halls", json={"name": "Overlap hall", "rows": 2, "cols": 2}, headers=headers).json()["id"]
+    base = (datetime.now(UTC) + timedelta(days=5)).replace(hour=12, minute=0, second=0, microsecond=0)
+
+    def schedule(movie_id, minutes):
+        starts = (base + timedelta(minutes=minutes)).isoformat()
+        return client.post("/cinema/screenings", json={"movie_id": movie_id, "hall_id": hall_id, "starts_at": starts}, headers=headers)
+
+    first = schedule(movie["id"], 0)
+    assert first.status_code == 200
+    assert first.json()["ends_at"].startswith((base + timedelta(hours=3)).strftime("%Y-%m-%dT%H:%M"))
+
+    assert schedule(short["id"], 120).status_code == 400  # inside the 3-hour run
+    assert schedule(short["id"], 190).status_code == 400  # during the 15-minute turnaround
+    assert schedule(short["id"], -100).status_code == 400  # its turnaround runs into the start
+    assert schedule(short["id"], -105).status_code == 200
+    later = schedule(short["id"], 195)
+    assert later.status_code == 200
+
+    # updates are checked too, excluding the screening itself
+    moved = client.put(f"/cinema/screenings/{later.json()['id']}", json={"starts_at": (base + timedelta(minutes=60)).isoformat()}, headers=headers)
+    assert moved.status_code == 400
+    nudged = client.put(f"/cinema/screenings/{later.json()['id']}", json={"starts_at": (base + timedelta(minutes=200)).isoformat()}, headers=headers)
+    assert nudged.status_code == 200
+    swapped = client.put(f"/cinema/screenings/{later.json()['id']}", json={"movie_id": movie["id"]}, headers=headers)
+    assert swapped.status_code == 200
+    assert swapped.json()["ends_at"].startswith((base + timedelta(minutes=380)).strftime("%Y-%m-%dT%H:%M"))
+
+    # a longer runtime that would collide is refused and changes nothing
+    assert client.put(f"/cinema/movies/{movie['id']}", json={"runtime_minutes": 200}, headers=headers).status_code == 400
+    assert client.get(f"/cinema/movies/{movie['id']}").json()["runtime_minutes"] == 180
+    with max_queries(9):
+        assert client.put(f"/cinema/movies/{movie['id']}", json={"runtime_minutes": 170}, headers=headers).status_code == 200
+    ends = client.get(f"/cinema/screenings/{first.json()['id']}").json()["ends_at"]
+    assert ends.startswith((base + timedelta(minutes=170)).strftime("%Y-%m-%dT%H:%M"))
+
+
+def test_bulk_schedule_import_reports_conflicts_per_row(client):
+    headers = _login_admin(client)
+    movie_id = client.post("/cinema/movies", json={"title": "Weekly"}, headers=headers).json()["id"]
+    hall_a = client.post("/cinema/halls", json={"name": "Bulk A", "rows": 2, "cols": 2}, headers=headers).json()["id"]
+    hall_b = client.post("/cinema/halls", json={"name": "Bulk B", "rows": 2, "cols": 2}, headers=headers).json()["id"]
+    base = (datetime.now(UTC) + timedelta(days=7)).replace(hour=12, minute=0, second=0, microsecond=0)
+
+    def at(minutes):
+        return (base + timedelta(minutes=minutes)).isoformat()
+
+    existing = client.post("/cinema/screenings", json={"movie_id": movie_id, "hall_id": hall_a, "starts_at": at(0)}, headers=headers).json()["id"]
+
+    plan = [
+        {"movie_id": movie_id, "hall_id": hall_a, "starts_at": at(60)},
+        {"movie_id": movie_id, "hall_id": hall_a, "starts_at": at(135)},
+        {"movie_id": movie_id, "hall_id": hall_a, "starts_at": at(200)},
+        {"movie_id": movie_id, "hall_id": hall_b, "starts_at": at(0)},
+        {"movie_id": 999_999, "hall_id": hall_b, "starts_at": at(600)},
+        {"movie_id": movie_id, "hall_id": 999_999, "starts_at": at(600)},
+        {"movie_id": movie_id, "hall_id": hall_a, "starts_at": at(-130)},
+        {"movie_id": movie_id, "hall_id": hall_b, "starts_at": at(0)},
+        {"movie_id": movie_id, "hall_id": hall_b, "starts_at": at(-135)},
+    ]
+    r = client.post("/cinema/screenings/bulk", json={"screenings": plan}, headers=headers)
+    assert r.status_code == 200
+    body = r.json()
+    assert [(c["index"], c["screening_id"], c["row"]) for c in body["conflicts"]] == [
+        (0, existing, None),
+        (2, None, 1),
+        (4, None, None),
+        (5, None, None),
+        (6, existing, None),
+        (7, None, 3),
+    ]
+    assert body["conflicts"][2]["error"] == "Movie not found"
+    assert body["conflicts"][3]["error"] == "Hall not found"
+    created = body["created"]
+    assert len(created) == 3
+    assert {(s["hall_id"], s["starts_at"][:16]) for s in created} == {
+        (hall_a, at(135)[:16]), (hall_b, at(0)[:16]), (hall_b, at(-135)[:16])
+    }
+    listed = client.get("/cinema/screenings", params={"movie_id": movie_id}).json()
+    assert len(listed) == 4
+
+    # a second pass over the same plan creates nothing
+    again = client.post("/cinema/screenings/bulk", json={"screenings": plan}, headers=headers).json()
+    assert again["created"] == [] and len(again["conflicts"]) == len(plan)
+    assert client.post("/cinema/screenings/bulk", json={"screenings": []}, headers=headers).status_code == 422
@@ -49,21 +49,21 @@ def test_provider_approve_and_decline(client):
     user = _register_user(client, "p1@example.com", "user_p1")
     provider_candidate = _register_user(client, "prov@example.com", "prov1")
 
-    # create screening and reservation
-    screening_id = _create_screening(client, admin, "prov-1")
-    r = client.post("/reservations", json={"screening_id": screening_id, "seats": [{"seat_row": 1, "seat_col": 1}], "notes": ""}, headers=user)
-    assert r.status_code == 200
-    reservation_id = r.json()["id"]
-
     # promote provider_candidate to PROVIDER via admin
     users = client.get("/admin/users", headers=admin).json()
     prov_info = next(u for u in users if u["username"] == "prov1")
     prov_id = prov_info["id"]
     patch = client.patch(f"/admin/users/{prov_id}/role", json={"role": "PROVIDER"}, headers=admin)
     assert patch.status_code == 200
+    prov_headers = provider_candidate
+
+    # provider creates a screening and the user reserves a seat
+    screening_id = _create_screening(client, prov_headers, "prov-1")
+    r = client.post("/reservations", json={"screening_id": screening_id, "seats": [{"seat_row": 1, "seat_col": 1}], "notes": ""}, headers=user)
+    assert r.status_code == 200
+    reservation_id = r.json()["id"]
 
     # provider approves reservation
-    prov_headers = provider_candidate
     approve = client.post(f"/provider/reservations/{reservation_id}/approve", headers=prov_headers)
     assert approve.status_code == 200, approve.text
     assert approve.json()["status"] == "CONFIRMED"
@@ -90,3 +90,51 @@ def test_admin_confirm_reservation(client):
     conf = client.post(f"/admin/reservations/{reservation_id}/confirm", headers=admin)
     assert conf.status_code == 200
     assert conf.json()["status"] == "CONFIRMED"
+
+
+def test_provider_inbox_is_scoped_and_filtered(client, max_queries):
+    admin = _admin_headers(client)
+    user = _register_user(client, "inbox@example.com", "inbox_user")
+    providers = []
+    for name in ("inbox_pa", "inbox_pb"):
+        headers = _register_user(client, f"{name}@example.com", name)
+        me = client.get("/users/me", headers=headers).json()["id"]
+        assert client.patch(f"/admin/users/{me}/role", json={"role": "PROVIDER"}, headers=admin).status_code == 200
+        providers.append(headers)
+    pa, pb = providers
+    soon = _create_screening(client, pa, "inbox-a", start_offset_hours=2)
+    later = _create_screening(client, pb, "inbox-b", start_offset_hours=30)
+
+    def reserve(screening_id, col):
+        seats = [{"seat_row": 1, "seat_col": col}]
+        r = client.post("/reservations", json={"screening_id": screening_id, "seats": seats}, headers=user)
+        assert r.status_code == 200
+        return r.json()["id"]
+
+    first, second, other = reserve(soon, 1), reserve(soon, 2), reserve(later, 1)
+    # providers can only act on reservations for their own screenings
+    for action in ("approve", "decline"):
+        denied = client.post(f"/provider/reservations/{first}/{action}", headers=pb)
+        assert denied.status_code == 404
+    assert client.post(f"/provider/reservations/{first}/approve", headers=pa).status_code == 200
+
+    def inbox(headers, **params):
+        r = client.get("/provider/reservations", params=params, headers=headers)
+        assert r.status_code == 200
+        return [x["id"] for x in r.json()]
+
+    with max_queries(3):
+        assert inbox(pa) == [second, first]
+    assert inbox(pb) == [other]
+    assert inbox(admin) == [other, second, first]
+    assert inbox(pa, status="CONFIRMED") == [first]
+    assert inbox(pb, screening_id=soon) == []
+    until = (datetime.now(timezone.utc) + timedelta(hours=10)).replace(tzinfo=None).isoformat()
+    assert inbox(admin, date_to=until) == [second, first]
+    # times are wall clock, as stored: an offset on the filter is dropped, not applied
+    until = (datetime.now(timezone.utc) + timedelta(hours=10)).replace(tzinfo=timezone(timedelta(hours=-8)))
+    assert inbox(admin, date_to=until.isoformat()) == [second, first]
+
+    page = client.get("/provider/reservations", params={"limit": 1}, headers=pa)
+    assert [x["id"] for x in page.json()] == [second]
+    assert inbox(pa, limit=1, cursor=page.headers["X-Next-Cursor"]) == [first]
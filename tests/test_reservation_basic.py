@@ -3,6 +3,8 @@
 
 from datetime import datetime, timedelta, timezone
 
+from app.services.seat_map import seat_maps
+
 
 def _admin_headers(client):
     r = client.post(
@@ -77,3 +79,101 @@ def test_reservation_double_booking(client):
         headers=user2,
     )
     assert res2.status_code == 409
+
+
+def _create_screening(client, admin, name, rows, cols):
+    m = client.post("/cinema/movies", json={"title": f"M-{name}", "description": "", "category": "Action"}, headers=admin)
+    h = client.post("/cinema/halls", json={"name": name, "rows": rows, "cols": cols}, headers=admin)
+    starts_at = (datetime.now(timezone.utc) + timedelta(hours=2)).isoformat()
+    s = client.post(
+        "/cinema/screenings",
+        json={"movie_id": m.json()["id"], "hall_id": h.json()["id"], "starts_at": starts_at},
+        headers=admin,
+    )
+    return s.json()["id"]
+
+
+def _seats(response):
+    return sorted((t["seat_row"], t["seat_col"]) for t in response.json()["tickets"])
+
+
+def test_best_available_picks_centre_block(client):
+    admin = _admin_headers(client)
+    screening_id = _create_screening(client, admin, "BA1", rows=5, cols=8)
+    user = _register_user(client, "d1@example.com", "u_d1")
+
+    first = client.post("/reservations", json={"screening_id": screening_id, "quantity": 2}, headers=user)
+    assert first.status_code == 200
+    assert _seats(first) == [(3, 4), (3, 5)]
+
+    # the centre is taken, so the next party of four moves off-centre but stays together
+    second = client.post("/reservations", json={"screening_id": screening_id, "quantity": 4}, headers=user)
+    assert second.status_code == 200
+    seats = _seats(second)
+    assert len({r for r, _ in seats}) == 1
+    assert [c for _, c in seats] == list(range(seats[0][1], seats[0][1] + 4))
+
+
+def test_best_available_retries_on_stale_occupancy(client, monkeypatch):
+    admin = _admin_headers(client)
+    screening_id = _create_screening(client, admin, "BA2", rows=1, cols=5)
+    user = _register_user(client, "d2@example.com", "u_d2")
+
+    first = client.post("/reservations", json={"screening_id": screening_id, "quantity": 1}, headers=user)
+    assert _seats(first) == [(1, 3)]
+
+    # simulate another worker's stale view: the cache believes the centre seat is free
+    seat_maps.release(screening_id, [(1, 3)])
+    kinds = []
+    monkeypatch.setattr(seat_maps, "_listeners", [lambda kind, *_: kinds.append(kind)])
+    second = client.post("/reservations", json={"screening_id": screening_id, "quantity": 1}, headers=user)
+    assert second.status_code == 200
+    assert _seats(second) in ([(1, 2)], [(1, 4)])
+    # the lost race re-reads the map quietly; viewers only hear about the booking
+    assert kinds == ["taken"]
+
+
+def test_best_available_not_enough_adjacent_seats(client):
+    admin = _admin_headers(client)
+    screening_id = _create_screening(client, admin, "BA3", rows=2, cols=3)
+    user = _register_user(client, "d3@example.com", "u_d3")
+
+    blockers = [{"seat_row": 1, "seat_col": 2}, {"seat_row": 2, "seat_col": 2}]
+    assert client.post("/reservations", json={"screening_id": screening_id, "seats": blockers}, headers=user).status_code == 200
+
+    r = client.post("/reservations", json={"screening_id": screening_id, "quantity": 2}, headers=user)
+    assert r.status_code == 409
+
+
+def test_reservation_requires_seats_or_quantity(client):
+    user = _register_user(client, "d4@example.com", "u_d4")
+    both = {"screening_id": 1, "seats": [{"seat_row": 1, "seat_col": 1}], "quantity": 1}
+    assert client.post("/reservations", json=both, headers=user).status_code == 422
+    assert client.post("/reservations", json={"screening_id": 1}, headers=user).status_code == 422
+
+
+def test_partial_conflict_rejected_without_side_effects(client):
+    admin = _admin_headers(client)
+    screening_id = _create_screening(client, admin, "PC1", rows=2, cols=4)
+    user1 = _register_user(client, "e1@example.com", "u_e1")
+    user2 = _register_user(client, "e2@example.com", "u_e2")
+
+    assert client.post("/reservations", json={"screening_id": screening_id, "seats": [{"seat_row": 1, "seat_col": 2}]}, headers=user1).status_code == 200
+
+    seats = [{"seat_row": 1, "seat_col": 1}, {"seat_row": 1, "seat_col": 2}]
+    r = client.post("/reservations", json={"screening_id": screening_id, "seats": seats}, headers=user2)
+    assert r.status_code == 409
+    assert client.get("/reservations/me", headers=user2).json() == []
+
+    # the non-conflicting seat from the rejected request is still free
+    ok = client.post("/reservations", json={"screening_id": screening_id, "seats": [{"seat_row": 1, "seat_col": 1}]}, headers=user2)
+    assert ok.status_code == 200
+
+
+def test_duplicate_seats_in_request(client):
+    admin = _admin_headers(client)
+    screening_id = _create_screening(client, admin, "PC2", rows=2, cols=2)
+    user = _register_user(client, "e3@example.com", "u_e3")
+    seats = [{"seat_row": 1, "seat_col": 1}, {"seat_row": 1, "seat_col": 1}]
+    r = client.post("/reservations", json={"screening_id": screening_id, "seats": seats}, headers=user)
+    assert r.status_code == 400
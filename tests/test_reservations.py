@@ -105,4 +105,80 @@ def test_confirm_forbidden_for_other_user(client):
 
     user2 = _register_user(client, "r5@example.com", "u_r5")
     conf = client.post(f"/reservations/{reservation_id}/confirm", json={"method": "stripe_mock"}, headers=user2)
-    assert conf.status_code == 403
\ No newline at end of file
+    assert conf.status_code == 403
+
+def test_expired_holds_are_released(client, monkeypatch):
+    from app.services import reservation_service
+
+    admin = _admin_headers(client)
+    screening_id = _create_screening(client, admin, start_offset_hours=5)
+
+    user = _register_user(client, "r6@example.com", "u_r6")
+    held = client.post("/reservations", json={"screening_id": screening_id, "seats": [{"seat_row": 3, "seat_col": 3}], "notes": ""}, headers=user)
+    kept = client.post("/reservations", json={"screening_id": screening_id, "seats": [{"seat_row": 3, "seat_col": 4}], "notes": ""}, headers=user)
+    assert held.status_code == 200 and kept.status_code == 200
+    assert held.json()["expires_at"] is not None
+
+    conf = client.post(f"/reservations/{kept.json()['id']}/confirm", json={"method": "stripe_mock"}, headers=user)
+    assert conf.status_code == 200
+    assert conf.json()["expires_at"] is None
+
+    later = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=1)
+    monkeypatch.setattr(reservation_service, "_utcnow", lambda: later)
+
+    late_conf = client.post(f"/reservations/{held.json()['id']}/confirm", json={"method": "stripe_mock"}, headers=user)
+    assert late_conf.status_code == 400
+    assert "hold expired" in late_conf.text
+    # nor can an admin or provider confirm it on the user's behalf
+    for url in (f"/admin/reservations/{held.json()['id']}/confirm", f"/provider/reservations/{held.json()['id']}/approve"):
+        late = client.post(url, headers=admin)
+        assert late.status_code == 400
+        assert "hold expired" in late.text
+
+    from app.services.seat_map import seat_maps
+
+    events = []
+    monkeypatch.setattr(seat_maps, "_listeners", [lambda *event: events.append(event)])
+    sweep = client.post("/admin/release-expired-holds", headers=admin)
+    assert sweep.status_code == 200
+    assert sweep.json() == {"released": 1}
+    # viewers get the freed seat rather than a reset of the whole screening
+    assert events == [("released", screening_id, [(3, 3)])]
+
+    released = client.get(f"/reservations/{held.json()['id']}", headers=user).json()
+    assert released["status"] == "CANCELED"
+    assert released["tickets"] == []
+    assert client.get(f"/reservations/{kept.json()['id']}", headers=user).json()["status"] == "CONFIRMED"
+
+    taken = client.get(f"/screenings/{screening_id}/availability").json()["taken_seats"]
+    assert taken == [{"seat_row": 3, "seat_col": 4}]
+
+
+def test_reservation_lists_run_a_fixed_number_of_queries(client, max_queries, monkeypatch):
+    from app.core.config import settings
+
+    admin = _admin_headers(client)
+    user = _register_user(client, "budget@example.com", "budget")
+    screening_id = _create_screening(client, admin, rows=4, cols=4)
+    for row in range(1, 5):
+        seats = [{"seat_row": row, "seat_col": 1}, {"seat_row": row, "seat_col": 2}]
+        r = client.post("/reservations", json={"screening_id": screening_id, "seats": seats}, headers=user)
+        assert r.status_code == 200
+
+    # one query per page plus one for all tickets, however many reservations
+    with max_queries(4) as requests:
+        assert len(client.get("/reservations/me", headers=user).json()) == 4
+        assert len(client.get("/provider/reservations", headers=admin).json()) == 4
+    assert len(requests) == 2
+
+    monkeypatch.setattr(settings, "debug", True)
+    r = client.get("/reservations/me", headers=user)
+    assert int(r.headers["X-DB-Queries"]) >= 2
+    assert float(r.headers["X-DB-Time-Ms"]) >= 0
+    assert r.headers["X-DB-N-Plus-One"] == "0"
+
+    # deleting the user clears their reservations without per-reservation statements
+    monkeypatch.setattr(settings, "n_plus_one_threshold", 2)
+    me = client.get("/users/me", headers=user).json()["id"]
+    with max_queries(20):
+        assert client.delete(f"/admin/users/{me}", headers=admin).status_code == 200
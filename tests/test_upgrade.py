@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine, inspect, text
+
+from app.db.upgrade import upgrade
+
+# the schema as the first release created it, with one screening and reservation
+OLD_SCHEMA = [
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR(255), username VARCHAR(50), "
+    "hashed_password VARCHAR(255), role VARCHAR(8))",
+    "CREATE TABLE movies (id INTEGER PRIMARY KEY, title VARCHAR(200), "
+    "description VARCHAR(2000), category VARCHAR(100))",
+    "CREATE TABLE halls (id INTEGER PRIMARY KEY, name VARCHAR(120), rows INTEGER, cols INTEGER)",
+    "CREATE TABLE screenings (id INTEGER PRIMARY KEY, movie_id INTEGER, hall_id INTEGER, "
+    "starts_at DATETIME, provider_id INTEGER)",
+    "CREATE TABLE reservations (id INTEGER PRIMARY KEY, created_at DATETIME, status VARCHAR(9), "
+    "user_id INTEGER, screening_id INTEGER, notes VARCHAR(1000))",
+    "CREATE INDEX ix_reservations_screening_id ON reservations (screening_id)",
+    "INSERT INTO users VALUES (1, 'p@example.com', 'prov', 'x', 'PROVIDER')",
+    "INSERT INTO movies VALUES (1, 'Old Movie', '', 'General')",
+    "INSERT INTO halls VALUES (1, 'Hall A', 5, 5)",
+    "INSERT INTO screenings VALUES (1, 1, 1, '2030-01-01 18:00:00.000000', 1)",
+    "INSERT INTO reservations VALUES (1, '2029-12-01 10:00:00.000000', 'CONFIRMED', 1, 1, '')",
+]
+
+
+def test_upgrade_adds_and_backfills_new_columns(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        for statement in OLD_SCHEMA:
+            conn.execute(text(statement))
+
+    changes = upgrade(engine)
+    assert "added screenings.ends_at" in changes
+    assert "added reservations.expires_at" in changes
+    assert "added users.token_version" in changes
+    assert "dropped index ix_reservations_screening_id" in changes
+
+    with engine.connect() as conn:
+        runtime, token_version, expires_at = conn.execute(text(
+            "SELECT runtime_minutes, token_version, expires_at FROM movies, users, reservations"
+        )).one()
+        ends_at = conn.execute(text("SELECT ends_at FROM screenings")).scalar_one()
+        assert conn.execute(text(
+            "SELECT title FROM movies_fts WHERE movies_fts MATCH 'old'"
+        )).scalar_one() == "Old Movie"
+    assert (runtime, token_version, expires_at) == (120, 0, None)
+    assert datetime.fromisoformat(ends_at) == datetime(2030, 1, 1, 20, 0)
+    indexes = {i["name"] for i in inspect(engine).get_indexes("screenings")}
+    assert "ix_screenings_hall_schedule" in indexes
+
+    # a second run finds nothing to do
+    assert upgrade(engine) == []